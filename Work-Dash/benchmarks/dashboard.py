@@ -0,0 +1,142 @@
+"""Mede vazão e pico de memória das etapas do Dashboard em bases sintéticas de 10 mil a 10 milhões de linhas.
+
+As etapas são as de cada rerun sem cache, fora do Streamlit:
+process_data, colunas derivadas, filter_data, calculate_metrics e cada
+função plot_*. Os contratos vêm de gerador_dados (ou de arquivos gerados
+por ele, com --pasta) e passam pelo esquema de tipos, como na carga do app.
+
+O tempo é o menor entre as repetições, depois de uma execução de
+aquecimento; o pico de memória (tracemalloc) é
+medido em uma execução à parte, para não distorcer o tempo. Com --saida
+os resultados são gravados em JSON-lines; com --referencia, comparados a
+uma execução anterior: o comando sai com código 1 se alguma etapa ficar
+mais lenta que `--tolerancia` vezes a referência.
+
+As mesmas etapas e tamanhos estão em tests/test_benchmark_dashboard.py,
+para o pytest-benchmark; este script dispensa o plugin e mede também o pico
+de memória.
+
+Uso (a partir da pasta Work-Dash):
+    python -m benchmarks.dashboard --tamanhos 10000 100000 1000000 --saida base.jsonl
+    python -m benchmarks.dashboard --tamanhos 10000 100000 1000000 --referencia base.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from esquema import aplica_esquema
+from gerador_dados import carrega, gera_contratos
+from graficos import (plot_contracts_per_month, plot_index_analysis, plot_pie_chart,
+                      plot_regression_chart, plot_value_acrescentado)
+from metricas import calculate_metrics
+from processamento import adiciona_colunas_derivadas, filter_data, process_data
+
+PLOTS = (plot_value_acrescentado, plot_pie_chart, plot_regression_chart,
+         plot_contracts_per_month, plot_index_analysis)
+# Nomes das etapas, na ordem de um rerun (ver etapas)
+ETAPAS = ('process_data', 'adiciona_colunas_derivadas', 'filter_data', 'calculate_metrics') + tuple(
+    plot.__name__ for plot in PLOTS
+)
+
+def _mede(funcao, repeticoes):
+    """Retorna o menor tempo (em segundos) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def _pico_memoria(funcao):
+    """Pico de memória alocada (em MB) durante uma execução da função."""
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+def contratos(tamanho, pasta=None, formato='parquet'):
+    """Contratos com o esquema aplicado: gerados em memória ou lidos de `pasta`."""
+    if pasta is not None:
+        df = carrega(pasta, f'sintetico_{tamanho}', 'Contratos', formato)
+    else:
+        df = gera_contratos(tamanho)
+    return aplica_esquema(df, 'Contratos').assign(ANO=2024)
+
+def etapas(df):
+    """Etapas medidas, na ordem de um rerun: nome -> (função sem argumentos, linhas processadas)."""
+    agrupado_sem_derivadas = process_data(df)
+    agrupado = adiciona_colunas_derivadas(agrupado_sem_derivadas)
+    # Seleção típica: os três status mais comuns e metade dos meses
+    status = agrupado['STATUS / AÇÃO'].value_counts().index[:3].tolist()
+    meses = sorted(agrupado['MÊS'].dropna().unique().tolist())[::2]
+    filtrado = filter_data(agrupado, status, meses)
+    lista = {
+        'process_data': (lambda: process_data(df), len(df)),
+        'adiciona_colunas_derivadas': (lambda: adiciona_colunas_derivadas(agrupado_sem_derivadas),
+                                       len(agrupado_sem_derivadas)),
+        'filter_data': (lambda: filter_data(agrupado, status, meses), len(agrupado)),
+        'calculate_metrics': (lambda: calculate_metrics(filtrado), len(filtrado))
+    }
+    for plot in PLOTS:
+        lista[plot.__name__] = (lambda plot=plot: plot(filtrado), len(filtrado))
+    return lista
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--pasta', type=Path, help='Lê os contratos gerados por gerador_dados.py nesta pasta')
+    parser.add_argument('--formato', choices=['parquet', 'feather'], default='parquet')
+    parser.add_argument('--saida', type=Path, help='Grava os resultados (JSON-lines)')
+    parser.add_argument('--referencia', type=Path, help='Resultados anteriores para comparação')
+    parser.add_argument('--tolerancia', type=float, default=1.5, help='Razão de tempo que conta como regressão')
+    args = parser.parse_args()
+
+    referencia = {}
+    if args.referencia:
+        with open(args.referencia, encoding='utf-8') as f:
+            for linha in f:
+                resultado = json.loads(linha)
+                referencia[(resultado['tamanho'], resultado['etapa'])] = resultado
+
+    resultados, regressoes = [], []
+    print(f"{'tamanho':>10}  {'etapa':<28}{'linhas':>10}{'ms':>10}{'linhas/s':>14}{'pico (MB)':>11}{'vs ref.':>9}")
+    for tamanho in args.tamanhos:
+        df = contratos(tamanho, args.pasta, args.formato)
+        for nome, (funcao, linhas) in etapas(df).items():
+            funcao()  # Aquecimento: o plotly é importado na primeira figura
+            segundos = _mede(funcao, args.repeticoes)
+            resultado = {
+                'tamanho': tamanho,
+                'etapa': nome,
+                'linhas': linhas,
+                'ms': round(segundos * 1000, 3),
+                'linhas_por_s': round(linhas / segundos) if segundos else None,
+                'pico_mb': round(_pico_memoria(funcao), 3)
+            }
+            resultados.append(resultado)
+            comparacao = ''
+            anterior = referencia.get((tamanho, nome))
+            if anterior and anterior['ms']:
+                razao = resultado['ms'] / anterior['ms']
+                comparacao = f'{razao:.2f}x'
+                if razao > args.tolerancia:
+                    comparacao += ' <-'
+                    regressoes.append(f'{nome} ({tamanho} linhas): {razao:.2f}x')
+            print(f"{tamanho:>10}  {nome:<28}{linhas:>10}{resultado['ms']:>10.1f}"
+                  f"{resultado['linhas_por_s'] or 0:>14,}{resultado['pico_mb']:>11.1f}{comparacao:>9}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            for resultado in resultados:
+                f.write(json.dumps(resultado) + '\n')
+    if regressoes:
+        print(f"\nMais lentas que {args.tolerancia}x a referência: {'; '.join(regressoes)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
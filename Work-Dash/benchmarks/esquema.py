@@ -0,0 +1,62 @@
+"""Compara memória e tempo de agrupamento e filtro dos contratos com e sem o esquema de tipos.
+
+A aba 'Contratos' é replicada `--copias` vezes (com números de contrato
+distintos) para simular planilhas maiores. As operações são as do
+Dashboard: agrupamento por contrato (processamento.process_data),
+agrupamento por status e mês, filtro por status e meses e contagem por
+índice.
+
+Uso (a partir da pasta Work-Dash):
+    python -m benchmarks.esquema --copias 200
+"""
+import argparse
+import time
+import pandas as pd
+from carregar_dados import ARQUIVO_PADRAO, _carrega_aba, assinatura_arquivo
+from esquema import aplica_esquema, memoria_mb
+from processamento import process_data
+
+def _mede(funcao, repeticoes):
+    """Retorna o menor tempo (em ms) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--copias', type=int, default=100)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    original = _carrega_aba(ARQUIVO_PADRAO, 'Contratos', assinatura_arquivo(ARQUIVO_PADRAO))
+    bruto = pd.concat(
+        [original.assign(**{'CONTRATO Nº': original['CONTRATO Nº'] + f'-{i}'}) for i in range(args.copias)],
+        ignore_index=True
+    ).assign(ANO=2024)
+    tipado = aplica_esquema(bruto, 'Contratos')
+    pd.testing.assert_frame_equal(
+        process_data(bruto), process_data(tipado), check_dtype=False, check_categorical=False
+    )
+
+    status = list(bruto['STATUS / AÇÃO'].unique()[:2])
+    meses = list(bruto['MÊS'].unique()[:6])
+    operacoes = {
+        'process_data': lambda df: process_data(df),
+        'groupby status/mês': lambda df: df.groupby(['STATUS / AÇÃO', 'MÊS'], observed=True)['VALOR PAGO'].sum(),
+        'filtro status/mês': lambda df: df[df['STATUS / AÇÃO'].isin(status) & df['MÊS'].isin(meses)],
+        'contagem por índice': lambda df: df['ÍNDICE'].value_counts()
+    }
+
+    print(f'{len(bruto)} linhas; memória {memoria_mb(bruto):.1f} MB sem esquema, '
+          f'{memoria_mb(tipado):.1f} MB com esquema')
+    print(f"{'operação':<22}{'sem esquema (ms)':>18}{'com esquema (ms)':>18}{'ganho':>8}")
+    for nome, operacao in operacoes.items():
+        t_bruto = _mede(lambda: operacao(bruto), args.repeticoes)
+        t_tipado = _mede(lambda: operacao(tipado), args.repeticoes)
+        print(f'{nome:<22}{t_bruto:>18.1f}{t_tipado:>18.1f}{t_bruto / t_tipado:>7.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Compara recall e latência dos índices FAISS do ChatPDF com a busca exata (plana).
+
+Os vetores são sintéticos: grupos gaussianos normalizados, como embeddings
+de trechos de PDFs sobre poucos assuntos. O recall@k é a fração dos k
+vizinhos exatos encontrada pelo índice; com k = fetch_k da busca MMR, mede
+quantos dos candidatos do MMR mudam.
+
+Uso (a partir da pasta Work-Dash):
+    python -m benchmarks.indices_faiss --vetores 100000 --dimensao 1536
+"""
+import argparse
+import time
+import faiss
+import numpy as np
+from configs import FAISS_INDICE_KWARGS, RETRIEVAL_KWARGS
+from indices_faiss import TIPOS_INDICE, ajusta_busca, cria_indice, descricao_indice
+
+def corpus_sintetico(vetores, dimensao, grupos, semente=0):
+    """Vetores normalizados em torno de `grupos` centros aleatórios."""
+    rng = np.random.default_rng(semente)
+    centros = rng.standard_normal((grupos, dimensao)).astype(np.float32)
+    dados = centros[rng.integers(grupos, size=vetores)]
+    dados += 0.5 * rng.standard_normal((vetores, dimensao)).astype(np.float32)
+    faiss.normalize_L2(dados)
+    return dados
+
+def _busca(indice, consultas, k):
+    """Busca uma consulta por vez, como no ChatPDF; retorna (ids, ms por consulta)."""
+    resultados = []
+    inicio = time.perf_counter()
+    for consulta in consultas:
+        resultados.append(indice.search(consulta[None, :], k)[1][0])
+    return np.array(resultados), (time.perf_counter() - inicio) * 1000 / len(consultas)
+
+def _recall(encontrados, exatos):
+    return np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(encontrados, exatos)])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vetores', type=int, default=100000)
+    parser.add_argument('--dimensao', type=int, default=1536)
+    parser.add_argument('--grupos', type=int, default=200)
+    parser.add_argument('--consultas', type=int, default=200)
+    parser.add_argument('--k', type=int, default=RETRIEVAL_KWARGS.get('fetch_k', 20))
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--ef-search', type=int, nargs='+', default=[16, 32, 64, 128])
+    parser.add_argument('--tipos', nargs='+', choices=TIPOS_INDICE, default=list(TIPOS_INDICE))
+    args = parser.parse_args()
+
+    dados = corpus_sintetico(args.vetores, args.dimensao, args.grupos)
+    # Consultas próximas aos dados, mas fora do corpus
+    consultas = corpus_sintetico(args.consultas, args.dimensao, args.grupos, semente=1)
+
+    print(f'{args.vetores} vetores de dimensão {args.dimensao}, {args.consultas} consultas, recall@{args.k}')
+    print(f"{'índice':<22}{'busca':<14}{'montagem (s)':>13}{'memória (MB)':>14}{'ms/consulta':>13}{'recall':>8}")
+    exatos = None
+    ajustes_por_tipo = {
+        'ivf_flat': [{'nprobe': n} for n in args.nprobe],
+        'hnsw': [{'ef_search': ef} for ef in args.ef_search],
+        'ivf_pq': [{'nprobe': n} for n in args.nprobe]
+    }
+    # A busca exata vem primeiro: é a referência do recall
+    for tipo in ['flat'] + [tipo for tipo in args.tipos if tipo != 'flat']:
+        ajustes = ajustes_por_tipo.get(tipo, [{}])
+        parametros = dict(FAISS_INDICE_KWARGS)
+        inicio = time.perf_counter()
+        indice = cria_indice(tipo, dados, parametros)
+        montagem = time.perf_counter() - inicio
+        memoria = faiss.serialize_index(indice).nbytes / 1024 ** 2
+        descricao = descricao_indice(tipo, args.dimensao, args.vetores, parametros)
+        for ajuste in ajustes:
+            ajusta_busca(indice, dict(parametros, **ajuste))
+            encontrados, latencia = _busca(indice, consultas, args.k)
+            if exatos is None:
+                exatos = encontrados
+            busca = ', '.join(f'{nome}={valor}' for nome, valor in ajuste.items()) or 'exata'
+            print(f'{descricao:<22}{busca:<14}{montagem:>13.1f}{memoria:>14.1f}'
+                  f'{latencia:>13.2f}{_recall(encontrados, exatos):>8.3f}')
+
+if __name__ == '__main__':
+    main()
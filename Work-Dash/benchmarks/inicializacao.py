@@ -0,0 +1,131 @@
+"""Mede a inicialização do app: tempo de import dos módulos e da primeira renderização das páginas.
+
+Cada medida roda em um processo Python novo (partida a frio). O import é
+medido com `python -X importtime`, descontados streamlit e pandas, que
+toda página carrega. A primeira renderização é a execução da página pelo
+AppTest do Streamlit, com os imports da página.
+
+Sai com código 1 se algum tempo passar do orçamento ou se um módulo
+pesado for carregado antes de ser usado; pode ser executado no CI para
+detectar regressões.
+
+Uso (a partir da pasta Work-Dash):
+    python -m benchmarks.inicializacao --fator 2
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PASTA_APP = Path(__file__).resolve().parents[1]
+BASE = 'import streamlit, pandas'
+PESADOS_CHATPDF = ('langchain', 'langchain_core', 'langchain_community', 'langchain_openai',
+                   'faiss', 'pypdf', 'openai', 'langsmith')
+
+# Módulo -> (orçamento do import em ms, módulos que ele não pode carregar)
+MODULOS = {
+    'carregar_dados': (100, ()),
+    'regressao': (100, ()),
+    'graficos': (100, ('plotly.express',)),
+    'persistencia': (100, ()),
+    'utils': (100, PESADOS_CHATPDF)
+}
+# Página -> (orçamento da primeira renderização em ms, módulos que ela não pode carregar)
+PAGINAS = {
+    'Dashboard.py': (3000, PESADOS_CHATPDF),
+    'pages/2_Dados.py': (2000, PESADOS_CHATPDF + ('plotly.express',)),
+    'pages/3_ChatPDF.py': (1000, PESADOS_CHATPDF + ('plotly.express',))
+}
+
+def _executa(argumentos):
+    resultado = subprocess.run(
+        [sys.executable, *argumentos], cwd=PASTA_APP, capture_output=True, text=True, encoding='utf-8'
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr[-2000:])
+    return resultado
+
+def _proibidos(modulos, proibidos):
+    """Módulos proibidos (ou seus submódulos) presentes em `modulos`."""
+    return sorted({
+        proibido for proibido in proibidos
+        for modulo in modulos if modulo == proibido or modulo.startswith(proibido + '.')
+    })
+
+def mede_import(modulo):
+    """Retorna (ms do import, módulos mais pesados, módulos carregados) em um processo novo."""
+    resultado = _executa([
+        '-X', 'importtime', '-c',
+        f'{BASE}\nimport {modulo}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))'
+    ])
+    # O -X importtime lista os filhos (recuados) antes do pai; o recuo cresce 2 espaços por nível
+    total, filhos, pesados = 0.0, [], []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, cumulativo, nome = linha[len('import time:'):].split('|')
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        if nivel == 0:
+            if nome.strip() == modulo:
+                total, pesados = int(cumulativo) / 1000, sorted(filhos, reverse=True)[:3]
+            filhos = []
+        elif nivel == 1:
+            filhos.append((int(cumulativo) / 1000, nome.strip()))
+    return total, pesados, json.loads(resultado.stdout.splitlines()[-1])
+
+def mede_pagina(pagina, timeout):
+    """Retorna (ms da primeira renderização, exceções, módulos carregados) em um processo novo."""
+    codigo = (
+        'import json, sys, time\n'
+        'from streamlit.testing.v1 import AppTest\n'
+        f'{BASE}\n'
+        'inicio = time.perf_counter()\n'
+        f'at = AppTest.from_file({pagina!r}, default_timeout={timeout})\n'
+        'at.run()\n'
+        'print(json.dumps({"ms": (time.perf_counter() - inicio) * 1000,'
+        ' "excecoes": [e.message for e in at.exception], "modulos": sorted(sys.modules)}))'
+    )
+    dados = json.loads(_executa(['-c', codigo]).stdout.splitlines()[-1])
+    return dados['ms'], dados['excecoes'], dados['modulos']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fator', type=float, default=1.0, help='Multiplica os orçamentos (máquinas lentas)')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    falhas = []
+    print(f"{'módulo':<22}{'import (ms)':>12}{'orçamento':>11}  mais pesados")
+    for modulo, (orcamento, proibidos) in MODULOS.items():
+        total, pesados, modulos = mede_import(modulo)
+        orcamento *= args.fator
+        carregados = _proibidos(modulos, proibidos)
+        situacao = '' if total <= orcamento and not carregados else '  <- FALHA'
+        print(f'{modulo:<22}{total:>12.0f}{orcamento:>11.0f}  '
+              + ', '.join(f'{nome} ({ms:.0f})' for ms, nome in pesados) + situacao)
+        if carregados:
+            print(f'{"":<22}carregou {", ".join(carregados)}')
+        if situacao:
+            falhas.append(modulo)
+
+    print(f"\n{'página':<22}{'render (ms)':>12}{'orçamento':>11}")
+    for pagina, (orcamento, proibidos) in PAGINAS.items():
+        total, excecoes, modulos = mede_pagina(pagina, args.timeout)
+        orcamento *= args.fator
+        carregados = _proibidos(modulos, proibidos)
+        situacao = '' if total <= orcamento and not carregados and not excecoes else '  <- FALHA'
+        print(f'{pagina:<22}{total:>12.0f}{orcamento:>11.0f}{situacao}')
+        if carregados:
+            print(f'{"":<22}carregou {", ".join(carregados)}')
+        for excecao in excecoes:
+            print(f'{"":<22}exceção: {excecao}')
+        if situacao:
+            falhas.append(pagina)
+
+    if falhas:
+        print(f"\nAcima do orçamento ou com imports antecipados: {', '.join(falhas)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
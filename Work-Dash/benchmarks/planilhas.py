@@ -0,0 +1,43 @@
+"""Compara o tempo de carga das planilhas pelo Excel e pelo sidecar colunar.
+
+Uso (a partir da pasta Work-Dash):
+    python -m benchmarks.planilhas --repeticoes 5
+"""
+import argparse
+import time
+from pathlib import Path
+import pandas as pd
+from carregar_dados import (PASTA_DATASETS, _abre_sidecar, _normaliza_tipos,
+                            abas_da_planilha, aquecer_sidecars, assinatura_arquivo)
+
+def _mede(funcao, repeticoes):
+    """Retorna o menor tempo (em segundos) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pasta', type=Path, default=PASTA_DATASETS)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    aquecer_sidecars(args.pasta)
+    print(f"{'planilha':<28}{'aba':<14}{'linhas':>8}{'excel (ms)':>12}{'sidecar (ms)':>14}{'ganho':>8}")
+    for caminho in sorted(args.pasta.glob('*.xlsx')):
+        assinatura = assinatura_arquivo(caminho)
+        for aba in abas_da_planilha(caminho):
+            excel = lambda: _normaliza_tipos(pd.read_excel(caminho, sheet_name=aba), aba)
+            sidecar = lambda: _abre_sidecar(caminho, aba, assinatura).to_pandas()
+            df_excel, df_sidecar = excel(), sidecar()
+            pd.testing.assert_frame_equal(df_excel, df_sidecar)
+            t_excel = _mede(excel, args.repeticoes)
+            t_sidecar = _mede(sidecar, args.repeticoes)
+            print(f'{caminho.name:<28}{aba:<14}{len(df_excel):>8}{t_excel * 1000:>12.1f}'
+                  f'{t_sidecar * 1000:>14.1f}{t_excel / t_sidecar:>7.0f}x')
+
+if __name__ == '__main__':
+    main()
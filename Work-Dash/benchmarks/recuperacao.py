@@ -0,0 +1,109 @@
+"""Compara latência e taxa de acerto das buscas densa, BM25 e híbrida do ChatPDF.
+
+O corpus são os trechos dos PDFs de `pdfs/` (divididos como no ChatPDF)
+mais trechos sintéticos, cada um com um número de contrato próprio. Há
+dois tipos de consulta com resposta conhecida:
+- 'trecho': palavras consecutivas de um trecho sorteado;
+- 'contrato': pergunta pelo número de um contrato sintético.
+Há acerto quando o trecho de origem está entre os k recuperados.
+
+Com `--embeddings fake` (padrão, sem rede) a busca densa é aleatória e a
+tabela mostra apenas o que o BM25 acrescenta; com `--embeddings openai`
+os embeddings vêm da API (e do cache em disco).
+
+Uso (a partir da pasta Work-Dash):
+    python -m benchmarks.recuperacao --sinteticos 5000 --consultas 200
+"""
+import argparse
+import random
+import time
+import numpy as np
+import configs
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_core.documents import Document
+from configs import RETRIEVAL_HIBRIDO_KWARGS, RETRIEVAL_KWARGS
+from recuperacao import IndiceBM25, RecuperadorHibrido
+from ingestao import divide_pdf
+from utils import PASTA_ARQUIVOS, cria_embeddings
+
+def corpus(sinteticos, semente=0):
+    """Trechos dos PDFs mais `sinteticos` trechos de contratos, com vocabulário dos PDFs."""
+    documentos = [
+        documento for arquivo in sorted(PASTA_ARQUIVOS.glob('*.pdf'))
+        for documento in divide_pdf(arquivo, configs.CHUNK_SIZE, configs.CHUNK_OVERLAP)
+    ]
+    palavras = [palavra for documento in documentos for palavra in documento.page_content.split()]
+    palavras = palavras or ['contrato', 'valor', 'prazo', 'reajuste', 'empresa', 'sistema', 'serviço']
+    rng = random.Random(semente)
+    for i in range(sinteticos):
+        numero = f'{1000 + i}/{rng.randint(2015, 2024)}'
+        texto = ' '.join(rng.choices(palavras, k=120))
+        documentos.append(Document(
+            page_content=f'Contrato nº {numero}. {texto}',
+            metadata={'source': 'sintetico', 'doc_id': len(documentos), 'contrato': numero}
+        ))
+    return documentos
+
+def consultas(documentos, quantidade, palavras, semente=1):
+    """Pares (tipo, consulta, índice do trecho de origem)."""
+    rng = random.Random(semente)
+    resultado = []
+    contratos = [i for i, documento in enumerate(documentos) if 'contrato' in documento.metadata]
+    for _ in range(quantidade):
+        alvo = rng.randrange(len(documentos))
+        termos = documentos[alvo].page_content.split()
+        inicio = rng.randrange(max(1, len(termos) - palavras))
+        resultado.append(('trecho', ' '.join(termos[inicio:inicio + palavras]), alvo))
+        if contratos:
+            alvo = rng.choice(contratos)
+            resultado.append(('contrato', f"Qual é o valor do contrato {documentos[alvo].metadata['contrato']}?", alvo))
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sinteticos', type=int, default=2000)
+    parser.add_argument('--consultas', type=int, default=100)
+    parser.add_argument('--palavras', type=int, default=8)
+    parser.add_argument('--embeddings', choices=['fake', 'openai'], default='fake')
+    args = parser.parse_args()
+
+    configs.EMBEDDING_BACKEND = args.embeddings
+    documentos = corpus(args.sinteticos)
+    ids = [str(i) for i in range(len(documentos))]
+    inicio = time.perf_counter()
+    vector_store = FAISS.from_documents(documentos, cria_embeddings(), ids=ids)
+    t_denso = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    indice = IndiceBM25(k1=RETRIEVAL_HIBRIDO_KWARGS['k1'], b=RETRIEVAL_HIBRIDO_KWARGS['b'])
+    indice.sincroniza(vector_store.docstore, ids)
+    t_bm25 = time.perf_counter() - inicio
+    print(f'{len(documentos)} trechos; índice denso em {t_denso:.1f} s, BM25 em {t_bm25:.1f} s')
+
+    k, fetch_k = RETRIEVAL_KWARGS.get('k', 5), RETRIEVAL_KWARGS.get('fetch_k', 20)
+    hibrido = RecuperadorHibrido(vector_store=vector_store, indice_bm25=indice, k=k, fetch_k=fetch_k,
+                                 rrf_c=RETRIEVAL_HIBRIDO_KWARGS['rrf_c'])
+    buscas = {
+        'similarity': lambda consulta: [d.metadata['doc_id'] for d in vector_store.similarity_search(consulta, k=k)],
+        'mmr': lambda consulta: [d.metadata['doc_id'] for d in vector_store.max_marginal_relevance_search(
+            consulta, k=k, fetch_k=fetch_k)],
+        'bm25': lambda consulta: [int(id_) for id_, _ in indice.busca(consulta, k)],
+        'hybrid': lambda consulta: [d.metadata['doc_id'] for d in hibrido.invoke(consulta)]
+    }
+    pares = consultas(documentos, args.consultas, args.palavras)
+    print(f"{'busca':<12}{'tipo':<10}{'consultas':>10}{'acerto@' + str(k):>10}{'ms (mediana)':>14}{'ms (p95)':>10}")
+    for nome, busca in buscas.items():
+        for tipo in ('trecho', 'contrato'):
+            selecionados = [(consulta, alvo) for t, consulta, alvo in pares if t == tipo]
+            if not selecionados:
+                continue
+            acertos, tempos = 0, []
+            for consulta, alvo in selecionados:
+                inicio = time.perf_counter()
+                encontrados = busca(consulta)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+                acertos += alvo in encontrados
+            print(f'{nome:<12}{tipo:<10}{len(selecionados):>10}{acertos / len(selecionados):>10.2f}'
+                  f'{np.median(tempos):>14.2f}{np.percentile(tempos, 95):>10.2f}')
+
+if __name__ == '__main__':
+    main()
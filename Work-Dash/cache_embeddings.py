@@ -0,0 +1,163 @@
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from instrumentacao import instrumenta
+
+class EmbeddingsEmCache(Embeddings):
+    """Embeddings com cache em disco, endereçado pelo conteúdo.
+
+    Cada vetor é guardado em um SQLite sob a chave sha256(modelo, texto);
+    trechos já vistos, em qualquer execução, não voltam ao modelo. Os
+    textos ausentes são enviados em lotes de `tamanho_lote`, com no máximo
+    `concorrencia` lotes ao mesmo tempo e novas tentativas com espera
+    exponencial em caso de erro (também nas consultas).
+
+    Os vetores são guardados em float32 e devolvidos sempre com esses
+    valores, venham do cache ou do modelo: o mesmo texto dá o mesmo vetor
+    na primeira chamada e nas seguintes.
+    """
+
+    def __init__(self, modelo: Embeddings, identificador: str, arquivo: Path,
+                 tamanho_lote: int = 128, concorrencia: int = 4, tentativas: int = 5,
+                 espera_inicial: float = 1.0):
+        """
+        Args:
+            modelo (Embeddings): Modelo que gera os embeddings ausentes do cache.
+            identificador (str): Nome do modelo; faz parte da chave do cache.
+            arquivo (Path): Banco SQLite do cache.
+            tamanho_lote (int): Textos por chamada ao modelo.
+            concorrencia (int): Máximo de lotes simultâneos.
+            tentativas (int): Tentativas por lote antes de desistir.
+            espera_inicial (float): Espera, em segundos, antes da segunda tentativa; dobra a cada falha.
+        """
+        self.modelo = modelo
+        self.identificador = identificador
+        self.tamanho_lote = max(1, int(tamanho_lote))
+        self.concorrencia = max(1, int(concorrencia))
+        self.tentativas = max(1, int(tentativas))
+        self.espera_inicial = espera_inicial
+
+        Path(arquivo).parent.mkdir(parents=True, exist_ok=True)
+        self._conexao = sqlite3.connect(str(arquivo), check_same_thread=False)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('CREATE TABLE IF NOT EXISTS embeddings (chave TEXT PRIMARY KEY, vetor BLOB)')
+        self._conexao.commit()
+        self._trava = threading.Lock()
+        self._estatisticas = {
+            'acertos': 0, 'falhas': 0, 'lotes': 0, 'retentativas': 0,
+            'textos_embedados': 0, 'segundos_embedando': 0.0
+        }
+
+    def _chave(self, texto: str, tipo: str) -> str:
+        conteudo = f'{self.identificador}\0{tipo}\0{texto}'.encode('utf-8')
+        return hashlib.sha256(conteudo).hexdigest()
+
+    def _consulta(self, chaves: list) -> dict:
+        """Vetores já em cache, por chave."""
+        encontrados = {}
+        with self._trava:
+            # Consulta em blocos, abaixo do limite de parâmetros do SQLite
+            for inicio in range(0, len(chaves), 500):
+                bloco = chaves[inicio:inicio + 500]
+                marcadores = ','.join('?' * len(bloco))
+                for chave, vetor in self._conexao.execute(
+                        f'SELECT chave, vetor FROM embeddings WHERE chave IN ({marcadores})', bloco):
+                    encontrados[chave] = np.frombuffer(vetor, dtype=np.float32).tolist()
+        return encontrados
+
+    @staticmethod
+    def _float32(vetores: list) -> list:
+        """Vetores com os valores que terão no cache (float32)."""
+        return np.asarray(vetores, dtype=np.float32).tolist()
+
+    def _armazena(self, chaves: list, vetores: list) -> None:
+        with self._trava:
+            self._conexao.executemany(
+                'INSERT OR REPLACE INTO embeddings (chave, vetor) VALUES (?, ?)',
+                [(chave, np.asarray(vetor, dtype=np.float32).tobytes()) for chave, vetor in zip(chaves, vetores)]
+            )
+            self._conexao.commit()
+
+    def _com_tentativas(self, funcao, *args):
+        """Chama o modelo, com novas tentativas e espera exponencial."""
+        for tentativa in range(self.tentativas):
+            try:
+                return funcao(*args)
+            except Exception:
+                if tentativa == self.tentativas - 1:
+                    raise
+                with self._trava:
+                    self._estatisticas['retentativas'] += 1
+                # Espera com variação aleatória, para os lotes não tentarem juntos
+                time.sleep(self.espera_inicial * 2 ** tentativa * (0.5 + random.random()))
+
+    def _embeda(self, textos: list, tipo: str) -> list:
+        chaves = [self._chave(texto, tipo) for texto in textos]
+        vetores = self._consulta(list(set(chaves)))
+
+        # Textos repetidos são enviados uma única vez
+        ausentes = {}
+        for chave, texto in zip(chaves, textos):
+            if chave not in vetores:
+                ausentes.setdefault(chave, texto)
+        with self._trava:
+            self._estatisticas['acertos'] += len(textos) - len(ausentes)
+            self._estatisticas['falhas'] += len(ausentes)
+
+        if ausentes:
+            chaves_ausentes = list(ausentes)
+            lotes = [
+                chaves_ausentes[inicio:inicio + self.tamanho_lote]
+                for inicio in range(0, len(chaves_ausentes), self.tamanho_lote)
+            ]
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=min(self.concorrencia, len(lotes))) as pool:
+                futuros = [
+                    (lote, pool.submit(self._com_tentativas, self.modelo.embed_documents,
+                                       [ausentes[chave] for chave in lote]))
+                    for lote in lotes
+                ]
+                for lote, futuro in futuros:
+                    novos = self._float32(futuro.result())
+                    # Cada lote é gravado assim que chega; uma falha não perde os anteriores
+                    self._armazena(lote, novos)
+                    vetores.update(zip(lote, novos))
+            with self._trava:
+                self._estatisticas['lotes'] += len(lotes)
+                self._estatisticas['textos_embedados'] += len(ausentes)
+                self._estatisticas['segundos_embedando'] += time.perf_counter() - inicio
+
+        return [list(vetores[chave]) for chave in chaves]
+
+    @instrumenta('chatpdf.embeddings')
+    def embed_documents(self, texts: list) -> list:
+        return self._embeda(texts, 'documento')
+
+    @instrumenta('chatpdf.embeddings_consulta', linhas=())
+    def embed_query(self, text: str) -> list:
+        chave = self._chave(text, 'consulta')
+        vetor = self._consulta([chave]).get(chave)
+        with self._trava:
+            self._estatisticas['acertos' if vetor is not None else 'falhas'] += 1
+        if vetor is None:
+            vetor = self._float32(self._com_tentativas(self.modelo.embed_query, text))
+            self._armazena([chave], [vetor])
+        return list(vetor)
+
+    def estatisticas(self) -> dict:
+        """Retorna acertos, falhas, taxa de acerto e vazão (textos por segundo) do modelo."""
+        with self._trava:
+            estatisticas = dict(self._estatisticas)
+        consultas = estatisticas['acertos'] + estatisticas['falhas']
+        estatisticas['taxa_acerto'] = estatisticas['acertos'] / consultas if consultas else 0.0
+        estatisticas['textos_por_segundo'] = (
+            estatisticas['textos_embedados'] / estatisticas['segundos_embedando']
+            if estatisticas['segundos_embedando'] else 0.0
+        )
+        return estatisticas
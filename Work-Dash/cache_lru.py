@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+    """Cache em memória, compartilhado entre sessões, com descarte LRU.
+
+    Args:
+        tamanho_maximo (int): Número máximo de entradas mantidas.
+    """
+
+    def __init__(self, tamanho_maximo=32):
+        self.tamanho_maximo = tamanho_maximo
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+        self._estatisticas = {'hits': 0, 'misses': 0, 'descartes': 0}
+
+    def obtem(self, chave, calcula):
+        """Retorna o valor da chave, calculando-o com `calcula()` se necessário."""
+        with self._trava:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self._estatisticas['hits'] += 1
+                return self._entradas[chave]
+            self._estatisticas['misses'] += 1
+
+        valor = calcula()
+
+        with self._trava:
+            self._entradas[chave] = valor
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self._estatisticas['descartes'] += 1
+        return valor
+
+    def itens(self):
+        """Retorna uma cópia dos pares (chave, valor) em cache."""
+        with self._trava:
+            return list(self._entradas.items())
+
+    def troca_chave(self, antiga, nova):
+        """Move o valor de `antiga` para `nova`, se `antiga` ainda estiver em cache."""
+        with self._trava:
+            if antiga in self._entradas:
+                self._entradas[nova] = self._entradas.pop(antiga)
+
+    def descarta(self, chave):
+        """Remove a entrada da chave, se existir."""
+        with self._trava:
+            self._entradas.pop(chave, None)
+
+    def limpa(self):
+        """Descarta todas as entradas."""
+        with self._trava:
+            self._entradas.clear()
+
+    def estatisticas(self):
+        """Retorna acertos, falhas, descartes e o tamanho atual do cache."""
+        with self._trava:
+            return dict(self._estatisticas, entradas=len(self._entradas))
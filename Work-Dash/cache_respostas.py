@@ -0,0 +1,101 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+def normaliza_pergunta(texto: str) -> str:
+    """Normaliza a pergunta para comparação: sem acentos, minúsculas e espaços simples."""
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    return texto.rstrip(' ?!.')
+
+class CacheRespostas:
+    """Respostas já geradas pelo ChatPDF, por corpus de documentos.
+
+    A chave é (impressão do corpus, pergunta autônoma normalizada). Se
+    `limiar_similaridade` for informado, uma pergunta sem entrada exata
+    também pode reaproveitar a resposta da pergunta mais parecida do mesmo
+    corpus, pela similaridade de cosseno dos embeddings. As entradas
+    expiram após `ttl_segundos`; acima de `tamanho_maximo`, as menos usadas
+    são descartadas.
+    """
+
+    def __init__(self, tamanho_maximo: int = 256, ttl_segundos: float = None, limiar_similaridade: float = None):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self.limiar_similaridade = limiar_similaridade
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+        self._estatisticas = {'acertos': 0, 'acertos_similares': 0, 'falhas': 0, 'expiradas': 0, 'descartes': 0}
+
+    def _expirada(self, entrada) -> bool:
+        return self.ttl_segundos is not None and time.time() - entrada['criada'] > self.ttl_segundos
+
+    def _mais_similar(self, impressao, vetor):
+        """Chave da entrada do corpus mais parecida com `vetor`, se passar do limiar (chamar com a trava)."""
+        candidatos = [
+            (chave, entrada['vetor']) for chave, entrada in self._entradas.items()
+            if chave[0] == impressao and entrada['vetor'] is not None and not self._expirada(entrada)
+        ]
+        if not candidatos:
+            return None
+        matriz = np.asarray([candidato for _, candidato in candidatos], dtype=np.float32)
+        consulta = np.asarray(vetor, dtype=np.float32)
+        normas = np.linalg.norm(matriz, axis=1) * np.linalg.norm(consulta)
+        similaridades = matriz @ consulta / np.where(normas == 0, 1, normas)
+        melhor = int(np.argmax(similaridades))
+        return candidatos[melhor][0] if similaridades[melhor] >= self.limiar_similaridade else None
+
+    def obtem(self, impressao, pergunta: str, vetor=None):
+        """Retorna a entrada da pergunta ({'answer', 'source_documents', ...}) ou None.
+
+        Args:
+            impressao (str): Identifica o corpus (ver utils.impressao_corpus).
+            pergunta (str): Pergunta autônoma, já normalizada.
+            vetor (list): Embedding da pergunta, para a busca por similaridade.
+        """
+        with self._trava:
+            chave = (impressao, pergunta)
+            entrada = self._entradas.get(chave)
+            if entrada is not None and self._expirada(entrada):
+                del self._entradas[chave]
+                self._estatisticas['expiradas'] += 1
+                entrada = None
+            if entrada is None and self.limiar_similaridade is not None and vetor is not None:
+                chave = self._mais_similar(impressao, vetor)
+                entrada = self._entradas.get(chave) if chave is not None else None
+                if entrada is not None:
+                    self._estatisticas['acertos_similares'] += 1
+            elif entrada is not None:
+                self._estatisticas['acertos'] += 1
+            if entrada is None:
+                self._estatisticas['falhas'] += 1
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada
+
+    def armazena(self, impressao, pergunta: str, resposta: str, fontes: list, vetor=None) -> None:
+        """Guarda a resposta e as fontes da pergunta autônoma normalizada."""
+        with self._trava:
+            self._entradas[(impressao, pergunta)] = {
+                'answer': resposta,
+                'source_documents': list(fontes),
+                'vetor': vetor,
+                'criada': time.time()
+            }
+            self._entradas.move_to_end((impressao, pergunta))
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self._estatisticas['descartes'] += 1
+
+    def limpa(self) -> None:
+        with self._trava:
+            self._entradas.clear()
+
+    def estatisticas(self) -> dict:
+        """Retorna acertos (exatos e por similaridade), falhas, expiradas, descartes e entradas."""
+        with self._trava:
+            return dict(self._estatisticas, entradas=len(self._entradas))
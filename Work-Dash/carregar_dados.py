@@ -1,36 +1,533 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, contextmanager
+from datetime import date
 from pathlib import Path
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from esquema import ESQUEMAS, aplica_esquema, concatena, esquema_da_aba
+from instrumentacao import instrumenta
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Define o caminho para a pasta 'planilhas'
+PASTA_DATASETS = Path(__file__).resolve().parent / 'planilhas'
+ARQUIVO_PADRAO = PASTA_DATASETS / '2024.xlsx'
+
+# Cache compartilhado por todo o processo: (caminho, aba) -> (assinatura, DataFrame)
+_CACHE_ABAS = {}
+_ESTATISTICAS_CACHE = {'hits': 0, 'misses': 0, 'invalidacoes': 0, 'falhas_observadores': 0}
+_TRAVA_CACHE = threading.Lock()
+_TRAVAS_CARGA = {}
+# Serializa as gravações nas planilhas feitas por este processo
+_TRAVA_GRAVACAO = threading.RLock()
+_TRAVAS_MANTIDAS = threading.local()
+# Caminho -> (assinatura, nomes das abas); cada planilha guarda apenas a assinatura atual
+_ABAS_POR_PLANILHA = {}
+# Pool de processos de carrega_contratos (ver _pool_carga)
+_POOL_CARGA = None
+# Funções notificadas após cada gravação bem-sucedida (ver registra_observador_gravacao)
+_OBSERVADORES_GRAVACAO = []
+# Versão da normalização gravada nos sidecars; ao mudar _normaliza_tipos, os antigos são refeitos
+VERSAO_SIDECAR = b'2'
+
+def assinatura_arquivo(caminho):
+    """Retorna a assinatura (mtime, tamanho) usada para invalidar o cache."""
+    info = Path(caminho).stat()
+    return (info.st_mtime_ns, info.st_size)
+
+def caminho_sidecar(caminho, aba):
+    """Retorna o caminho do arquivo colunar (Feather) ao lado da planilha."""
+    caminho = Path(caminho)
+    return caminho.with_name(f'{caminho.name}.{aba}.feather')
+
+def _normaliza_tipos(df, aba=None):
+    """Converte colunas com tipos mistos para um tipo único.
+
+    Colunas como 'INÍCIO' misturam datas e textos; elas são convertidas para
+    datetime quando possível e para texto nos demais casos, de forma que a
+    leitura pelo Excel e pelo sidecar produzam o mesmo DataFrame.
+
+    Só as colunas declaradas como data no esquema da aba, ou cujos valores
+    não textuais são todos datas, são tentadas como datetime: em uma coluna
+    com números e textos, o número viraria um instante contado desde 1970.
+    """
+    nome = esquema_da_aba(aba, df.columns)
+    colunas_data = {col for col, tipo in ESQUEMAS[nome]['colunas'].items() if tipo == 'data'} if nome else set()
+    for col in df.columns[df.dtypes == object]:
+        valores = df[col].dropna()
+        if valores.map(type).nunique() <= 1:
+            continue
+        nao_textos = valores[~valores.map(lambda valor: isinstance(valor, str))]
+        if col in colunas_data or nao_textos.map(lambda valor: isinstance(valor, date)).all():
+            try:
+                df[col] = pd.to_datetime(df[col], format='mixed')
+                continue
+            except (ValueError, TypeError):
+                pass
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+def _abre_sidecar(caminho, aba, assinatura):
+    """Abre o sidecar via memory-map, se existir e corresponder à planilha atual."""
+    arquivo = caminho_sidecar(caminho, aba)
+    if not arquivo.exists():
+        return None
+    try:
+        tabela = feather.read_table(str(arquivo), memory_map=True)
+    except (OSError, pa.ArrowException):
+        return None
+    metadados = tabela.schema.metadata or {}
+    if metadados.get(b'assinatura_origem') != json.dumps(assinatura).encode():
+        return None
+    if metadados.get(b'versao') != VERSAO_SIDECAR:
+        return None
+    return tabela
+
+def _grava_sidecar(df, caminho, aba, assinatura):
+    """Grava o sidecar de forma atômica; falhas apenas desativam o atalho."""
+    arquivo = caminho_sidecar(caminho, aba)
+    temporario = arquivo.with_name(arquivo.name + '.tmp')
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        metadados = dict(tabela.schema.metadata or {})
+        metadados[b'assinatura_origem'] = json.dumps(assinatura).encode()
+        metadados[b'versao'] = VERSAO_SIDECAR
+        # Sem compressão para que a leitura possa mapear o arquivo em memória
+        feather.write_feather(tabela.replace_schema_metadata(metadados), str(temporario),
+                              compression='uncompressed')
+        os.replace(temporario, arquivo)
+    except (OSError, pa.ArrowException):
+        temporario.unlink(missing_ok=True)
+
+def _carrega_abas(caminho, abas, assinatura):
+    """Carrega as abas pelos sidecars colunares ou, se necessário, pelo Excel.
+
+    As abas sem sidecar válido são lidas em uma única abertura da planilha.
+
+    Returns:
+        dict: Nome da aba -> DataFrame.
+    """
+    resultado = {}
+    faltantes = []
+    for aba in abas:
+        tabela = _abre_sidecar(caminho, aba, assinatura)
+        if tabela is not None:
+            resultado[aba] = tabela.to_pandas()
+        else:
+            faltantes.append(aba)
+    if faltantes:
+        with pd.ExcelFile(caminho) as planilha:
+            for aba in faltantes:
+                df = _normaliza_tipos(planilha.parse(aba), aba)
+                _grava_sidecar(df, caminho, aba, assinatura)
+                resultado[aba] = df
+    return resultado
+
+def _carrega_aba(caminho, aba, assinatura):
+    """Carrega a aba pelo sidecar colunar ou, se necessário, pelo Excel."""
+    return _carrega_abas(caminho, [aba], assinatura)[aba]
+
+def _consulta_cache(chave, assinatura):
+    """Retorna a aba em cache se ela ainda corresponde ao arquivo, ou None."""
+    with _TRAVA_CACHE:
+        entrada = _CACHE_ABAS.get(chave)
+        if entrada is not None and entrada[0] == assinatura:
+            _ESTATISTICAS_CACHE['hits'] += 1
+            return entrada[1].copy(deep=False)
+    return None
+
+def _armazena_cache(chave, assinatura, df):
+    """Guarda uma aba recém-carregada no cache compartilhado."""
+    with _TRAVA_CACHE:
+        if chave in _CACHE_ABAS:
+            _ESTATISTICAS_CACHE['invalidacoes'] += 1
+        _ESTATISTICAS_CACHE['misses'] += 1
+        _CACHE_ABAS[chave] = (assinatura, df)
+
+@contextmanager
+def _travas_carga(chaves):
+    """Trava a carga das abas (caminho, aba) informadas; cargas de outras abas seguem em paralelo.
+
+    As travas são sempre tomadas na mesma ordem, para que sessões que
+    carregam conjuntos diferentes de abas não se bloqueiem mutuamente.
+    """
+    with _TRAVA_CACHE:
+        travas = [_TRAVAS_CARGA.setdefault(chave, threading.Lock())
+                  for chave in sorted(set(chaves), key=lambda chave: (str(chave[0]), chave[1]))]
+    with ExitStack() as pilha:
+        for trava in travas:
+            pilha.enter_context(trava)
+        yield
+
+def _armazena_lida(caminho, aba, assinatura, df):
+    """Aplica o esquema à aba lida, guarda-a no cache e devolve uma cópia rasa."""
+    df = aplica_esquema(df, aba, caminho.name)
+    _armazena_cache((caminho, aba), assinatura, df)
+    return df.copy(deep=False)
+
+def ler_abas(caminho, abas):
+    """Lê várias abas do Excel usando o cache compartilhado do processo.
+
+    Cada aba é lida do disco apenas uma vez enquanto o arquivo não mudar
+    (mtime e tamanho); as que faltam no cache são lidas juntas, em uma
+    única abertura da planilha. Cada chamada recebe cópias rasas dos
+    DataFrames em cache, que podem ser modificadas sem afetar as demais
+    sessões.
+
+    As abas com esquema declarado (ver esquema.ESQUEMAS) são validadas e
+    convertidas antes de entrar no cache; o sidecar guarda a aba como lida.
+
+    Returns:
+        dict: Nome da aba -> DataFrame, na ordem pedida.
+    """
+    caminho = Path(caminho).resolve()
+    assinatura = assinatura_arquivo(caminho)
+    resultado = {aba: _consulta_cache((caminho, aba), assinatura) for aba in abas}
+    faltantes = [aba for aba, df in resultado.items() if df is None]
+    if faltantes:
+        # Uma carga por aba de cada vez
+        with _travas_carga((caminho, aba) for aba in faltantes):
+            # Outra sessão pode ter carregado a aba enquanto esperávamos a trava
+            for aba in faltantes:
+                resultado[aba] = _consulta_cache((caminho, aba), assinatura)
+            faltantes = [aba for aba in faltantes if resultado[aba] is None]
+            for aba, df in _carrega_abas(caminho, faltantes, assinatura).items():
+                resultado[aba] = _armazena_lida(caminho, aba, assinatura, df)
+    return resultado
+
+def ler_aba(caminho, aba):
+    """Lê uma aba do Excel usando o cache compartilhado do processo (ver ler_abas)."""
+    return ler_abas(caminho, [aba])[aba]
+
+def ler_abas_originais(caminho, abas):
+    """Lê as abas como estão gravadas no Excel, sem o cache, a normalização e o esquema.
+
+    É a base das gravações (ver persistencia.grava_pendencias): as linhas que
+    uma gravação não altera voltam à planilha com os mesmos valores e tipos
+    de célula, inclusive os que o esquema não consegue converter.
+
+    Returns:
+        dict: Nome da aba -> DataFrame.
+    """
+    import openpyxl
+
+    # Lido célula a célula: o pd.read_excel converteria textos como '500' em números
+    planilha = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        resultado = {}
+        for aba in abas:
+            linhas = [list(linha) for linha in planilha[aba].iter_rows(values_only=True)]
+            while linhas and all(valor is None for valor in linhas[-1]):
+                linhas.pop()
+            cabecalho = linhas[0] if linhas else []
+            resultado[aba] = pd.DataFrame(linhas[1:], columns=cabecalho, dtype=object)
+        return resultado
+    finally:
+        planilha.close()
+
+def anos_disponiveis(pasta=PASTA_DATASETS):
+    """Mapeia cada ano para a sua planilha anual (por exemplo, 2023.xlsx).
+
+    Returns:
+        dict: Ano -> caminho da planilha, em ordem crescente de ano.
+    """
+    return {
+        int(caminho.stem): caminho.resolve()
+        for caminho in sorted(Path(pasta).glob('*.xlsx'))
+        if caminho.stem.isdigit() and len(caminho.stem) == 4
+    }
+
+def _aba_contratos(caminho):
+    """Retorna a aba de contratos: 'Contratos' ou, nas planilhas antigas, a primeira."""
+    # Evita abrir o Excel quando a aba 'Contratos' já está em cache ou tem um sidecar válido
+    with _TRAVA_CACHE:
+        em_cache = (Path(caminho).resolve(), 'Contratos') in _CACHE_ABAS
+    if em_cache or _abre_sidecar(caminho, 'Contratos', assinatura_arquivo(caminho)) is not None:
+        return 'Contratos'
+    abas = abas_da_planilha(caminho)
+    return 'Contratos' if 'Contratos' in abas else abas[0]
+
+def _pool_carga():
+    """Pool de processos das cargas em paralelo, criado na primeira vez e reaproveitado."""
+    global _POOL_CARGA
+    with _TRAVA_CACHE:
+        if _POOL_CARGA is None:
+            _POOL_CARGA = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _POOL_CARGA
+
+def _descarta_pool_carga(pool):
+    """Descarta o pool informado, se ainda for o do módulo."""
+    global _POOL_CARGA
+    with _TRAVA_CACHE:
+        if _POOL_CARGA is pool:
+            _POOL_CARGA = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@instrumenta(linhas=())
+def particoes_contratos(anos, pasta=PASTA_DATASETS):
+    """Carrega os contratos dos anos pedidos, uma partição por planilha anual.
+
+    Apenas os anos solicitados são lidos. Partições que não estão em cache
+    são carregadas em paralelo pelo pool de processos do módulo, já que a
+    leitura do Excel é limitada pela CPU. As travas de carga das abas são
+    tomadas antes de submeter as leituras: sessões que pedem os mesmos anos
+    ao mesmo tempo esperam a primeira carga em vez de repeti-la.
+
+    Args:
+        anos (list): Anos a carregar.
+        pasta (Path): Pasta com as planilhas anuais.
+
+    Returns:
+        dict: Ano -> (assinatura da planilha lida, contratos com os tipos de
+        esquema.ESQUEMAS['Contratos']).
+    """
+    planilhas = anos_disponiveis(pasta)
+    partes = {}
+    pendentes = []
+    for ano in sorted(set(anos)):
+        caminho = planilhas[ano]
+        aba = _aba_contratos(caminho)
+        assinatura = assinatura_arquivo(caminho)
+        df = _consulta_cache((caminho, aba), assinatura)
+        if df is None:
+            pendentes.append((ano, caminho, aba, assinatura))
+        else:
+            partes[ano] = (assinatura, df)
+
+    if pendentes:
+        with _travas_carga((caminho, aba) for _, caminho, aba, _ in pendentes):
+            # Outra sessão pode ter carregado a partição enquanto esperávamos a trava
+            restantes = []
+            for ano, caminho, aba, assinatura in pendentes:
+                df = _consulta_cache((caminho, aba), assinatura)
+                if df is None:
+                    restantes.append((ano, caminho, aba, assinatura))
+                else:
+                    partes[ano] = (assinatura, df)
+            if len(restantes) == 1:
+                ano, caminho, aba, assinatura = restantes[0]
+                partes[ano] = (assinatura, _armazena_lida(caminho, aba, assinatura,
+                                                          _carrega_aba(caminho, aba, assinatura)))
+            elif restantes:
+                pool = _pool_carga()
+                try:
+                    futuros = {
+                        ano: (caminho, aba, assinatura, pool.submit(_carrega_aba, caminho, aba, assinatura))
+                        for ano, caminho, aba, assinatura in restantes
+                    }
+                    for ano, (caminho, aba, assinatura, futuro) in futuros.items():
+                        partes[ano] = (assinatura, _armazena_lida(caminho, aba, assinatura, futuro.result()))
+                except BrokenProcessPool:
+                    # Um processo do pool morreu: a próxima carga cria outro pool
+                    _descarta_pool_carga(pool)
+                    raise
+
+    return partes
+
+def versao_contratos(particoes):
+    """Identifica a versão das partições carregadas (ano e assinatura de cada planilha lida).
+
+    Serve de chave para caches derivados dos contratos. Vem das partições,
+    e não do disco: uma planilha gravada depois da leitura não faz os dados
+    antigos entrarem no cache com a chave nova, nem o contrário.
+    """
+    return tuple((ano, assinatura) for ano, (assinatura, _) in sorted(particoes.items()))
+
+def concatena_particoes(particoes):
+    """Junta as partições em um DataFrame, com a coluna 'ANO'."""
+    if not particoes:
+        return pd.DataFrame()
+    return concatena(
+        [df.assign(ANO=ano) for ano, (_, df) in sorted(particoes.items())],
+        ignore_index=True
+    )
+
+@instrumenta(linhas=('saida',))
+def carrega_contratos(anos, pasta=PASTA_DATASETS):
+    """Carrega os contratos dos anos pedidos (ver particoes_contratos).
+
+    Returns:
+        pd.DataFrame: Contratos dos anos pedidos, com a coluna 'ANO' e os
+        tipos de esquema.ESQUEMAS['Contratos'].
+    """
+    return concatena_particoes(particoes_contratos(anos, pasta))
+
+def estatisticas_cache():
+    """Retorna os contadores de acertos, falhas e invalidações do cache."""
+    with _TRAVA_CACHE:
+        return dict(_ESTATISTICAS_CACHE, entradas=len(_CACHE_ABAS))
+
+def limpar_cache():
+    """Descarta todas as abas em cache."""
+    with _TRAVA_CACHE:
+        _CACHE_ABAS.clear()
+        _ABAS_POR_PLANILHA.clear()
+
+@instrumenta()
 def leitura_de_dados():
     """Carrega os dados do Excel e armazena no session_state."""
-    if 'dados' not in st.session_state:
-        # Define o caminho para a pasta 'planilhas'
-        pasta_datasets = Path(__file__).resolve().parent / 'planilhas'  # Ajuste aqui
-        
-        # Verifica se o arquivo existe
-        if not (pasta_datasets / '2024.xlsx').exists():
-            st.error("Arquivo '2024.xlsx' não encontrado na pasta 'planilhas'.")
-            return
-        
+    # Verifica se o arquivo existe
+    if not ARQUIVO_PADRAO.exists():
+        st.error("Arquivo '2024.xlsx' não encontrado na pasta 'planilhas'.")
+        return
+
+    # Recarrega apenas se o arquivo mudou desde a última leitura desta sessão
+    assinatura = assinatura_arquivo(ARQUIVO_PADRAO)
+    if 'dados' in st.session_state and st.session_state.get('assinatura_dados') == assinatura:
+        return
+
+    try:
+        # Carrega os DataFrames a partir do cache compartilhado
+        abas = ler_abas(ARQUIVO_PADRAO, ['Contratos', 'Históricos'])
+    except Exception as e:
+        st.error(f"Erro ao carregar os dados: {e}")
+        return
+
+    # Armazena os dados no session_state
+    dados = {
+        'df_contratos': abas['Contratos'],
+        'df_historico': abas['Históricos']
+    }
+
+    st.session_state['caminho_datasets'] = PASTA_DATASETS
+    st.session_state['assinatura_dados'] = assinatura
+    st.session_state['dados'] = dados
+
+@contextmanager
+def trava_exclusiva(arquivo_trava):
+    """Trava exclusiva entre processos sobre o arquivo informado (criado se não existir)."""
+    with open(arquivo_trava, 'a+b') as arquivo:
+        if fcntl is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+        else:
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
         try:
-            # Carrega os DataFrames
-            df_contratos = pd.read_excel(pasta_datasets / '2024.xlsx', sheet_name='Contratos')
-            df_historico = pd.read_excel(pasta_datasets / '2024.xlsx', sheet_name='Históricos')
-        except Exception as e:
-            st.error(f"Erro ao carregar os dados: {e}")
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+            else:
+                arquivo.seek(0)
+                msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def trava_arquivo(file_path):
+    """Trava exclusiva sobre a planilha, válida entre threads e entre processos.
+
+    A trava é reentrante na mesma thread, de modo que funções que já a
+    detêm podem chamar outras que também a pedem.
+    """
+    file_path = Path(file_path)
+    with _TRAVA_GRAVACAO:
+        if getattr(_TRAVAS_MANTIDAS, 'profundidade', 0):
+            _TRAVAS_MANTIDAS.profundidade += 1
+            try:
+                yield
+            finally:
+                _TRAVAS_MANTIDAS.profundidade -= 1
             return
-        
-        # Armazena os dados no session_state
-        dados = {
-            'df_contratos': df_contratos,
-            'df_historico': df_historico
-        }
-        
-        st.session_state['caminho_datasets'] = pasta_datasets
-        st.session_state['dados'] = dados
+
+        with trava_exclusiva(file_path.with_name(f'{file_path.name}.lock')):
+            _TRAVAS_MANTIDAS.profundidade = 1
+            try:
+                yield
+            finally:
+                _TRAVAS_MANTIDAS.profundidade = 0
+
+def registra_observador_gravacao(observador):
+    """Registra uma função chamada após cada gravação feita por grava_abas.
+
+    A função recebe (file_path, assinatura_anterior, assinatura_nova, abas,
+    alteracoes) e é chamada com a trava da planilha ainda ativa. Como a
+    planilha já foi publicada, exceções do observador não chegam a quem
+    gravou (apenas são contadas em estatisticas_cache): em caso de falha,
+    o próprio observador deve descartar o estado que deriva da planilha.
+    """
+    if observador not in _OBSERVADORES_GRAVACAO:
+        _OBSERVADORES_GRAVACAO.append(observador)
+
+def grava_abas(file_path, abas, alteracoes=None):
+    """Substitui várias abas da planilha com uma única abertura do arquivo.
+
+    As abas são gravadas em uma cópia temporária, publicada com uma troca
+    atômica (os.replace); leitores nunca veem um arquivo pela metade.
+
+    Args:
+        file_path (Path): Planilha a ser atualizada.
+        abas (dict): Nome da aba -> DataFrame.
+        alteracoes (list): Operações que originaram a gravação, repassadas aos observadores.
+    """
+    file_path = Path(file_path).resolve()
+    temporario = file_path.with_name(f'.{file_path.stem}.gravando{file_path.suffix}')
+    with trava_arquivo(file_path):
+        assinatura_anterior = assinatura_arquivo(file_path)
+        try:
+            shutil.copy2(file_path, temporario)
+            with pd.ExcelWriter(temporario, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+                for aba, df in abas.items():
+                    df.to_excel(writer, index=False, sheet_name=aba)
+            os.replace(temporario, file_path)
+        finally:
+            temporario.unlink(missing_ok=True)
+
+        # Daqui em diante a gravação está feita: uma exceção faria o chamador gravar de novo
+        assinatura_nova = assinatura_arquivo(file_path)
+        for observador in list(_OBSERVADORES_GRAVACAO):
+            try:
+                observador(file_path, assinatura_anterior, assinatura_nova, abas, alteracoes)
+            except Exception:
+                with _TRAVA_CACHE:
+                    _ESTATISTICAS_CACHE['falhas_observadores'] += 1
 
 def save_to_excel(df, file_path, sheet_name='Contratos'):
     """Salva o DataFrame no arquivo Excel."""
-    with pd.ExcelWriter(file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    grava_abas(file_path, {sheet_name: df})
+
+def abas_da_planilha(caminho):
+    """Lista os nomes das abas de uma planilha (memorizado enquanto ela não mudar)."""
+    caminho = Path(caminho).resolve()
+    assinatura = assinatura_arquivo(caminho)
+    with _TRAVA_CACHE:
+        entrada = _ABAS_POR_PLANILHA.get(caminho)
+    if entrada is not None and entrada[0] == assinatura:
+        return list(entrada[1])
+    with pd.ExcelFile(caminho) as planilha:
+        nomes = planilha.sheet_names
+    with _TRAVA_CACHE:
+        # Substitui a entrada da assinatura anterior
+        _ABAS_POR_PLANILHA[caminho] = (assinatura, nomes)
+    return list(nomes)
+
+def aquecer_sidecars(pasta=PASTA_DATASETS):
+    """Gera (ou atualiza) o sidecar de todas as abas das planilhas da pasta.
+
+    Returns:
+        list: Pares (arquivo, aba) cujo sidecar foi reconstruído.
+    """
+    reconstruidos = []
+    for caminho in sorted(Path(pasta).glob('*.xlsx')):
+        assinatura = assinatura_arquivo(caminho)
+        faltantes = [aba for aba in abas_da_planilha(caminho) if _abre_sidecar(caminho, aba, assinatura) is None]
+        _carrega_abas(caminho, faltantes, assinatura)
+        reconstruidos.extend((caminho.name, aba) for aba in faltantes)
+    return reconstruidos
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pré-aquece os sidecars colunares das planilhas.')
+    parser.add_argument('--pasta', type=Path, default=PASTA_DATASETS)
+    args = parser.parse_args()
+    for nome, aba in aquecer_sidecars(args.pasta):
+        print(f'{nome} [{aba}] -> {caminho_sidecar(args.pasta / nome, aba).name}')
@@ -2,8 +2,12 @@ import streamlit as st
 
 # Configurações do modelo e parâmetros de recuperação
 MODEL_NAME = 'gpt-3.5-turbo-0125'
+# 'mmr' ou 'similarity' usam só os embeddings; 'hybrid' funde a busca densa e o BM25
+# dos trechos por reciprocal rank fusion (ver recuperacao.py)
 RETRIEVAL_SEARCH_TYPE = 'mmr'
 RETRIEVAL_KWARGS = {"k": 5, "fetch_k": 20}
+# Busca 'hybrid': constante da fusão (rrf_c) e parâmetros do BM25 (k1, b)
+RETRIEVAL_HIBRIDO_KWARGS = {"rrf_c": 60, "k1": 1.5, "b": 0.75}
 PROMPT = '''Você é um Chatbot amigável que auxilia na interpretação 
 de documentos que lhe são fornecidos. 
 No contexto fornecido estão as informações dos documentos do usuário. 
@@ -19,6 +23,65 @@ Conversa atual:
 Human: {question}
 AI: '''
 
+# 'openai' usa o ChatOpenAI; 'fake' responde localmente, sem rede, com streaming (testes)
+LLM_BACKEND = 'openai'
+LLM_FAKE_RESPOSTA = 'Esta é uma resposta de teste gerada localmente a partir dos documentos.'
+# Espera, em segundos, entre os tokens do backend 'fake'
+LLM_FAKE_ATRASO = 0.01
+
+# Cache de respostas do ChatPDF: entradas, validade em segundos (None não expira) e
+# similaridade mínima (cosseno) para reaproveitar a resposta de uma pergunta parecida (None desliga)
+RESPOSTAS_CACHE_TAMANHO = 256
+RESPOSTAS_CACHE_TTL_SEGUNDOS = 24 * 60 * 60
+RESPOSTAS_CACHE_SIMILARIDADE = None
+
+# Memória da conversa: 'buffer' guarda tudo; 'resumo' guarda as mensagens recentes até
+# MEMORY_MAX_TOKENS tokens e um resumo das anteriores
+MEMORY_MODE = 'resumo'
+MEMORY_MAX_TOKENS = 1000
+
+# Configurações da divisão dos documentos e dos embeddings do ChatPDF
+CHUNK_SIZE = 2500
+CHUNK_OVERLAP = 250
+# 'openai' usa a API da OpenAI; 'fake' gera embeddings determinísticos, sem rede (testes)
+EMBEDDING_BACKEND = 'openai'
+EMBEDDING_MODEL = 'text-embedding-ada-002'
+# Dimensão dos embeddings do backend 'fake'
+EMBEDDING_FAKE_DIMENSAO = 256
+# Trechos ausentes do cache de embeddings: textos por chamada, chamadas simultâneas e tentativas
+EMBEDDING_LOTE = 128
+EMBEDDING_CONCORRENCIA = 4
+EMBEDDING_TENTATIVAS = 5
+
+# Índice vetorial do ChatPDF: 'flat' (busca exata), 'ivf_flat', 'hnsw' ou 'ivf_pq'.
+# Os aproximados só são usados a partir de 'minimo_vetores' trechos; o IVF é treinado em
+# até 'amostra_treino' vetores. Na busca, 'nprobe' (IVF) e 'ef_search' (HNSW) trocam
+# latência por recall (ver benchmarks/indices_faiss.py)
+FAISS_INDICE_TIPO = 'flat'
+FAISS_INDICE_KWARGS = {
+    "nlist": None, "nprobe": 16, "hnsw_m": 32, "ef_construction": 200, "ef_search": 64,
+    "pq_m": 64, "pq_bits": 8, "amostra_treino": 50000, "minimo_vetores": 10000
+}
+
+# Leitura dos PDFs: processos em paralelo (None usa todas as CPUs) e trechos por lote enviado aos embeddings
+INGESTAO_PROCESSOS = None
+INGESTAO_LOTE = 256
+
+# Configurações de persistência da página de Dados
+# Janela (em segundos) em que as alterações são agrupadas em uma única gravação
+PERSISTENCIA_JANELA_SEGUNDOS = 2.0
+
+# Configurações dos gráficos do Dashboard
+# Acima deste número de pontos, o gráfico de regressão usa WebGL (Scattergl)
+REGRESSAO_LIMITE_WEBGL = 5000
+# Máximo de pontos exibidos no modo WebGL (None exibe todos)
+REGRESSAO_MAXIMO_PONTOS = 50000
+
+# Instrumentação das etapas (ver instrumentacao.py): tempo, linhas e memória de cada rerun,
+# exibidos em um painel da barra lateral. O arquivo (JSON-lines) recebe as medidas; None não grava
+INSTRUMENTACAO = False
+INSTRUMENTACAO_ARQUIVO = None
+
 def get_config(config_name: str):
     """Obtém a configuração especificada.
 
@@ -36,5 +99,57 @@ def get_config(config_name: str):
         return RETRIEVAL_SEARCH_TYPE
     elif config_name.lower() == 'retrieval_kwargs':
         return RETRIEVAL_KWARGS
+    elif config_name.lower() == 'retrieval_hibrido_kwargs':
+        return RETRIEVAL_HIBRIDO_KWARGS
     elif config_name.lower() == 'prompt':
         return PROMPT
+    elif config_name.lower() == 'llm_backend':
+        return LLM_BACKEND
+    elif config_name.lower() == 'llm_fake_resposta':
+        return LLM_FAKE_RESPOSTA
+    elif config_name.lower() == 'llm_fake_atraso':
+        return LLM_FAKE_ATRASO
+    elif config_name.lower() == 'respostas_cache_tamanho':
+        return RESPOSTAS_CACHE_TAMANHO
+    elif config_name.lower() == 'respostas_cache_ttl_segundos':
+        return RESPOSTAS_CACHE_TTL_SEGUNDOS
+    elif config_name.lower() == 'respostas_cache_similaridade':
+        return RESPOSTAS_CACHE_SIMILARIDADE
+    elif config_name.lower() == 'memory_mode':
+        return MEMORY_MODE
+    elif config_name.lower() == 'memory_max_tokens':
+        return MEMORY_MAX_TOKENS
+    elif config_name.lower() == 'chunk_size':
+        return CHUNK_SIZE
+    elif config_name.lower() == 'chunk_overlap':
+        return CHUNK_OVERLAP
+    elif config_name.lower() == 'embedding_backend':
+        return EMBEDDING_BACKEND
+    elif config_name.lower() == 'embedding_model':
+        return EMBEDDING_MODEL
+    elif config_name.lower() == 'embedding_fake_dimensao':
+        return EMBEDDING_FAKE_DIMENSAO
+    elif config_name.lower() == 'embedding_lote':
+        return EMBEDDING_LOTE
+    elif config_name.lower() == 'embedding_concorrencia':
+        return EMBEDDING_CONCORRENCIA
+    elif config_name.lower() == 'embedding_tentativas':
+        return EMBEDDING_TENTATIVAS
+    elif config_name.lower() == 'faiss_indice_tipo':
+        return FAISS_INDICE_TIPO
+    elif config_name.lower() == 'faiss_indice_kwargs':
+        return FAISS_INDICE_KWARGS
+    elif config_name.lower() == 'ingestao_processos':
+        return INGESTAO_PROCESSOS
+    elif config_name.lower() == 'ingestao_lote':
+        return INGESTAO_LOTE
+    elif config_name.lower() == 'persistencia_janela_segundos':
+        return PERSISTENCIA_JANELA_SEGUNDOS
+    elif config_name.lower() == 'regressao_limite_webgl':
+        return REGRESSAO_LIMITE_WEBGL
+    elif config_name.lower() == 'regressao_maximo_pontos':
+        return REGRESSAO_MAXIMO_PONTOS
+    elif config_name.lower() == 'instrumentacao':
+        return INSTRUMENTACAO
+    elif config_name.lower() == 'instrumentacao_arquivo':
+        return INSTRUMENTACAO_ARQUIVO
@@ -0,0 +1,204 @@
+import threading
+import pandas as pd
+from pandas.api.types import CategoricalDtype, union_categoricals
+from processamento import MESES
+
+# Tipos declarados das colunas das planilhas, aplicados na carga (ver carregar_dados.ler_aba):
+# - 'categoria': texto de baixa cardinalidade, guardado uma vez por valor distinto;
+# - 'mes': categoria ordenada pelo calendário (meses fora da lista vêm depois de dezembro);
+# - 'data': datetime64 (datas ambíguas são lidas como dia/mês, o formato das planilhas);
+# - 'valor': float64. Os valores em reais continuam em ponto flutuante, e não em
+#   centavos inteiros, para que somas e métricas sejam as mesmas de antes;
+# - 'texto': mantido como object (identificadores, como o número do contrato).
+# Valores que não podem ser convertidos (por exemplo, '-' em VALOR PAGO) ficam vazios nos
+# dados carregados e são registrados nas estatísticas (ver avisos_esquema); só faltar uma
+# coluna obrigatória é erro. As gravações partem da aba como está no Excel
+# (ver carregar_dados.ler_abas_originais), de modo que esses valores não se perdem.
+ESQUEMAS = {
+    'Contratos': {
+        'obrigatorias': ('CONTRATO Nº', 'EMPRESA', 'SISTEMA', 'MÊS', 'ÍNDICE', 'VALOR PAGO',
+                         'VALOR REAJUSTADO', 'STATUS / AÇÃO', 'DIFERENÇA DE VALOR DE CONTRATO'),
+        'colunas': {
+            'CONTRATO Nº': 'texto',
+            'EMPRESA': 'categoria',
+            'SISTEMA': 'categoria',
+            'INÍCIO': 'data',
+            'TÉRMINO': 'data',
+            'MÊS': 'mes',
+            'VIGÊNCIA': 'categoria',
+            'ÍNDICE': 'categoria',
+            'PERÍODO DE FATURAMENTO': 'categoria',
+            'VALOR PAGO': 'valor',
+            'VALOR PAGO\n(POR 12 MESES)': 'valor',
+            'ÍNDICE PUBLICADO': 'valor',
+            'ÍNDICE APLICADO': 'valor',
+            'VALOR REAJUSTADO': 'valor',
+            'VALOR REAJUSTADO\n(POR 12 MESES)': 'valor',
+            'PEDIDO/ORDEM DE COMPRAS': 'categoria',
+            'STATUS / AÇÃO': 'categoria',
+            'DATA DA AÇÃO': 'data',
+            'DIFERENÇA DE VALOR DE CONTRATO': 'valor'
+        }
+    },
+    'Históricos': {
+        'obrigatorias': ('CONTRATO Nº', 'AÇÃO', 'DATA'),
+        'colunas': {
+            'CONTRATO Nº': 'texto',
+            'AÇÃO': 'categoria',
+            'DATA': 'data',
+            'EVENTO': 'texto'
+        }
+    }
+}
+
+# Memória de cada aba antes e depois do esquema e valores inválidos: (arquivo, aba) -> dict
+_ESTATISTICAS_ESQUEMA = {}
+_TRAVA_ESTATISTICAS = threading.Lock()
+
+def esquema_da_aba(aba, colunas):
+    """Retorna o nome do esquema da aba, ou None se ela não tiver um.
+
+    As abas 'Contratos' e 'Históricos' usam o esquema do mesmo nome. Nas
+    planilhas antigas a aba de contratos não tem nome próprio ('Sheet1');
+    ela é reconhecida pelas colunas obrigatórias.
+    """
+    if aba in ESQUEMAS:
+        return aba
+    for nome, esquema in ESQUEMAS.items():
+        if set(esquema['obrigatorias']) <= set(colunas):
+            return nome
+    return None
+
+def tipo_mes(valores):
+    """Categoria ordenada dos meses: o calendário seguido dos valores extras em ordem alfabética."""
+    extras = sorted(set(pd.Series(valores).dropna().astype(str)) - set(MESES))
+    return CategoricalDtype(MESES + extras, ordered=True)
+
+def _valores_invalidos(original, convertido):
+    """Quantidade e até 5 exemplos dos valores preenchidos na origem que a conversão tornou nulos."""
+    invalidos = original[original.notna() & convertido.isna()]
+    if invalidos.empty:
+        return None
+    return {'quantidade': len(invalidos), 'exemplos': invalidos.astype(str).unique()[:5].tolist()}
+
+def _converte(serie, tipo):
+    """Converte a coluna para o tipo declarado.
+
+    Returns:
+        tuple: (coluna convertida, valores inválidos ou None; ver _valores_invalidos).
+    """
+    if tipo == 'categoria':
+        return (serie if isinstance(serie.dtype, CategoricalDtype) else serie.astype('category')), None
+    if tipo == 'mes':
+        if isinstance(serie.dtype, CategoricalDtype) and serie.cat.ordered:
+            return serie, None
+        return serie.astype(object).astype(tipo_mes(serie)), None
+    if tipo == 'data':
+        convertido = pd.to_datetime(serie, errors='coerce', format='mixed', dayfirst=True)
+    elif tipo == 'valor':
+        convertido = pd.to_numeric(serie, errors='coerce').astype('float64')
+    else:
+        return serie, None
+    return convertido, _valores_invalidos(serie, convertido)
+
+def memoria_mb(df):
+    """Memória ocupada pelo DataFrame, incluindo o conteúdo dos textos, em MB."""
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+def aplica_esquema(df, aba, origem=None):
+    """Valida a aba e converte as suas colunas para os tipos declarados.
+
+    Colunas fora do esquema são mantidas como estão. Aplicar o esquema a
+    um DataFrame que já o segue não altera nada. Valores que não podem ser
+    convertidos ficam vazios (NaN/NaT) e são registrados em
+    'valores_invalidos' nas estatísticas (ver avisos_esquema).
+
+    Args:
+        df (pd.DataFrame): Aba como lida do Excel ou do sidecar.
+        aba (str): Nome da aba (ver esquema_da_aba).
+        origem (str): Arquivo de origem, usado apenas nas estatísticas.
+
+    Returns:
+        pd.DataFrame: Novo DataFrame com os tipos do esquema.
+
+    Raises:
+        ValueError: Se faltarem colunas obrigatórias.
+    """
+    nome = esquema_da_aba(aba, df.columns)
+    if nome is None:
+        return df
+    esquema = ESQUEMAS[nome]
+    faltantes = [col for col in esquema['obrigatorias'] if col not in df.columns]
+    if faltantes:
+        raise ValueError(f"Aba '{aba}' sem as colunas obrigatórias: {', '.join(faltantes)}")
+
+    antes = memoria_mb(df)
+    convertidas, invalidos = {}, {}
+    for col, tipo in esquema['colunas'].items():
+        if col in df.columns:
+            convertidas[col], invalidos_coluna = _converte(df[col], tipo)
+            if invalidos_coluna:
+                invalidos[col] = invalidos_coluna
+    df = df.assign(**convertidas)
+    with _TRAVA_ESTATISTICAS:
+        _ESTATISTICAS_ESQUEMA[(origem, aba)] = {
+            'esquema': nome,
+            'linhas': len(df),
+            'memoria_antes_mb': round(antes, 3),
+            'memoria_depois_mb': round(memoria_mb(df), 3),
+            'valores_invalidos': invalidos
+        }
+    return df
+
+def concatena(partes, **kwargs):
+    """pd.concat que preserva as colunas categóricas.
+
+    Com categorias diferentes em cada parte, o pd.concat devolveria texto
+    (object); aqui as categorias são unificadas antes. 'MÊS' continua
+    ordenado pelo calendário.
+    """
+    partes = list(partes)
+    if len(partes) > 1:
+        comuns = set.intersection(*(set(parte.columns) for parte in partes))
+        for col in sorted(comuns):
+            if not all(isinstance(parte[col].dtype, CategoricalDtype) for parte in partes):
+                continue
+            if col == 'MÊS':
+                tipo = tipo_mes(pd.concat([parte[col].cat.categories.to_series() for parte in partes]))
+            else:
+                tipo = CategoricalDtype(union_categoricals(
+                    [parte[col] for parte in partes], sort_categories=True, ignore_order=True
+                ).categories)
+            partes = [parte.assign(**{col: parte[col].astype(tipo)}) for parte in partes]
+    return pd.concat(partes, **kwargs)
+
+def estatisticas_esquema():
+    """Retorna, por aba carregada, as linhas, a memória antes e depois do esquema e os valores inválidos."""
+    with _TRAVA_ESTATISTICAS:
+        return {
+            f'{aba} ({origem})' if origem else aba: dict(estatisticas)
+            for (origem, aba), estatisticas in _ESTATISTICAS_ESQUEMA.items()
+        }
+
+def avisos_esquema(origens=None):
+    """Mensagens sobre os valores inválidos das abas carregadas (de `origens`, se informadas).
+
+    Args:
+        origens (list): Nomes dos arquivos (por exemplo, '2024.xlsx'); padrão: todos.
+
+    Returns:
+        list: Uma mensagem por coluna com valores que ficaram vazios na conversão.
+    """
+    with _TRAVA_ESTATISTICAS:
+        itens = list(_ESTATISTICAS_ESQUEMA.items())
+    avisos = []
+    for (origem, aba), estatisticas in itens:
+        if origens is not None and origem not in origens:
+            continue
+        for col, invalidos in estatisticas.get('valores_invalidos', {}).items():
+            local = f"{origem}, aba '{aba}'" if origem else f"aba '{aba}'"
+            avisos.append(
+                f"{local}: {invalidos['quantidade']} valor(es) inválido(s) na coluna '{col}' "
+                f"aparecem vazios no painel ({', '.join(invalidos['exemplos'])}); a planilha não é alterada."
+            )
+    return avisos
@@ -0,0 +1,157 @@
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from processamento import MESES
+
+# Maior planilha que o Excel abre (linhas mais o cabeçalho)
+LIMITE_EXCEL = 1_048_575
+FORMATOS = ('parquet', 'feather', 'xlsx')
+
+# Vocabulário e proporções aproximadas da planilha de exemplo (planilhas/2024.xlsx)
+SISTEMAS = [f'SISTEMA {i:02d}' for i in range(1, 11)]
+INDICES = {'IPCA': 0.56, 'IGP-M': 0.43, 'IPC-FIPE': 0.005, 'INPC': 0.005}
+STATUS = {'RENOVADO': 0.87, 'EM PROCESSO': 0.068, 'CANCELADO': 0.05, 'SUSPENSO / BLOQUEADO': 0.01,
+          'EM ANDAMENTO': 0.002}
+PESOS_MESES = [122, 126, 150, 295, 237, 49, 40, 54, 71, 94, 217, 32]
+PEDIDOS = {'NÃO ': 0.72, 'SIM': 0.28}
+ACOES = ['Adicionado', 'Modificado', 'Excluído']
+# Itens (linhas) por contrato, em média, e empresas por linha
+LINHAS_POR_CONTRATO = 10
+LINHAS_POR_EMPRESA = 4
+
+def _escolhe(rng, opcoes, quantidade, pesos=None):
+    """Sorteia `quantidade` valores de `opcoes` (dict valor -> peso, ou lista com `pesos`)."""
+    if isinstance(opcoes, dict):
+        opcoes, pesos = list(opcoes), list(opcoes.values())
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=float) / np.sum(pesos)
+    return np.asarray(opcoes, dtype=object)[rng.choice(len(opcoes), size=quantidade, p=pesos)]
+
+def gera_contratos(linhas, ano=2024, semente=0):
+    """Gera a aba 'Contratos' com `linhas` itens, nas colunas e tipos da planilha anual.
+
+    Como na planilha de exemplo, cada contrato tem vários itens (em média
+    LINHAS_POR_CONTRATO, com alguns contratos bem maiores) que compartilham
+    mês, vigência, índice e status; empresa, sistema, valor e pedido variam
+    por item.
+
+    Args:
+        linhas (int): Número de linhas.
+        ano (int): Ano de início dos contratos.
+        semente (int): Semente do gerador; a mesma semente gera os mesmos dados.
+
+    Returns:
+        pd.DataFrame: Contratos sintéticos.
+    """
+    rng = np.random.default_rng(semente)
+    total_contratos = max(1, linhas // LINHAS_POR_CONTRATO)
+
+    # Atributos de cada contrato
+    anos_contrato = rng.integers(2010, ano + 1, size=total_contratos)
+    numeros = np.array([f'{i}/{ano_contrato}' for i, ano_contrato in enumerate(anos_contrato, start=1)], dtype=object)
+    meses = rng.choice(12, size=total_contratos, p=np.asarray(PESOS_MESES) / sum(PESOS_MESES))
+    inicio = pd.to_datetime({'year': np.full(total_contratos, ano), 'month': meses + 1, 'day': 1})
+    indice = _escolhe(rng, INDICES, total_contratos)
+    # Metade dos contratos não tem reajuste; os demais, entre -2% e 8%
+    percentual = np.where(rng.random(total_contratos) < 0.5, 0.0, rng.uniform(-0.02, 0.08, total_contratos).round(4))
+    status = _escolhe(rng, STATUS, total_contratos)
+
+    # Contrato de cada linha: tamanhos desiguais, como na planilha de exemplo
+    tamanhos = rng.lognormal(0, 1.2, total_contratos)
+    contrato = rng.choice(total_contratos, size=linhas, p=tamanhos / tamanhos.sum())
+    contrato.sort(kind='stable')
+
+    empresas = np.array([f'EMPRESA {i}' for i in range(1, max(2, linhas // LINHAS_POR_EMPRESA) + 1)], dtype=object)
+    valor_pago = rng.integers(150, 1000, size=linhas)
+    valor_reajustado = valor_pago * (1 + percentual[contrato])
+    return pd.DataFrame({
+        'CONTRATO Nº': numeros[contrato],
+        'EMPRESA': empresas[rng.integers(0, len(empresas), size=linhas)],
+        'SISTEMA': _escolhe(rng, SISTEMAS, linhas),
+        'INÍCIO': inicio.to_numpy()[contrato],
+        'TÉRMINO': (inicio + pd.DateOffset(years=1)).to_numpy()[contrato],
+        'MÊS': np.asarray(MESES, dtype=object)[meses[contrato]],
+        'ÍNDICE': indice[contrato],
+        'VALOR PAGO': valor_pago,
+        'ÍNDICE PUBLICADO': percentual[contrato],
+        'ÍNDICE APLICADO': percentual[contrato],
+        'VALOR REAJUSTADO': valor_reajustado,
+        'PEDIDO/ORDEM DE COMPRAS': _escolhe(rng, PEDIDOS, linhas),
+        'STATUS / AÇÃO': status[contrato],
+        'DIFERENÇA DE VALOR DE CONTRATO': valor_reajustado - valor_pago
+    })
+
+def gera_historicos(linhas, contratos, ano=2024, semente=0):
+    """Gera a aba 'Históricos': ações sobre os contratos informados, em ordem de data.
+
+    Args:
+        linhas (int): Número de eventos.
+        contratos (array-like): Números de contrato sorteados para os eventos.
+        ano (int): Ano dos eventos.
+        semente (int): Semente do gerador.
+
+    Returns:
+        pd.DataFrame: Colunas 'CONTRATO Nº', 'AÇÃO' e 'DATA'.
+    """
+    rng = np.random.default_rng(semente + 1)
+    contratos = pd.unique(np.asarray(contratos, dtype=object))
+    inicio = pd.Timestamp(year=ano, month=1, day=1)
+    segundos = np.sort(rng.integers(0, 365 * 24 * 3600, size=linhas))
+    return pd.DataFrame({
+        'CONTRATO Nº': contratos[rng.integers(0, len(contratos), size=linhas)],
+        'AÇÃO': _escolhe(rng, ACOES, linhas),
+        'DATA': inicio + pd.to_timedelta(segundos, unit='s')
+    })
+
+def grava(abas, pasta, nome, formato):
+    """Grava as abas geradas na pasta.
+
+    Em 'xlsx', um único arquivo com as abas (como as planilhas anuais); em
+    'parquet' e 'feather', um arquivo por aba (`<nome>.<aba>.<formato>`),
+    para tamanhos acima do limite do Excel.
+
+    Returns:
+        list: Arquivos gravados.
+    """
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    if formato == 'xlsx':
+        maior = max(len(df) for df in abas.values())
+        if maior > LIMITE_EXCEL:
+            raise ValueError(f'{maior} linhas não cabem em uma planilha do Excel; use parquet ou feather')
+        arquivo = pasta / f'{nome}.xlsx'
+        with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
+            for aba, df in abas.items():
+                df.to_excel(writer, index=False, sheet_name=aba)
+        return [arquivo]
+    arquivos = []
+    for aba, df in abas.items():
+        arquivo = pasta / f'{nome}.{aba}.{formato}'
+        if formato == 'parquet':
+            df.to_parquet(arquivo, index=False)
+        else:
+            df.to_feather(arquivo)
+        arquivos.append(arquivo)
+    return arquivos
+
+def carrega(pasta, nome, aba, formato='parquet'):
+    """Lê uma aba gravada por `grava` em parquet ou feather."""
+    arquivo = Path(pasta) / f'{nome}.{aba}.{formato}'
+    return pd.read_parquet(arquivo) if formato == 'parquet' else pd.read_feather(arquivo)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera planilhas sintéticas de contratos e históricos.')
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000], help='Linhas de contratos (uma base por valor)')
+    parser.add_argument('--historicos', type=float, default=0.1, help='Eventos de histórico por linha de contrato')
+    parser.add_argument('--formato', choices=FORMATOS, default='parquet')
+    parser.add_argument('--pasta', type=Path, default=Path(__file__).resolve().parent / 'planilhas_sinteticas')
+    parser.add_argument('--ano', type=int, default=2024)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+    for linhas in args.linhas:
+        contratos = gera_contratos(linhas, args.ano, args.semente)
+        historicos = gera_historicos(max(1, int(linhas * args.historicos)), contratos['CONTRATO Nº'], args.ano, args.semente)
+        for arquivo in grava({'Contratos': contratos, 'Históricos': historicos}, args.pasta,
+                             f'sintetico_{linhas}', args.formato):
+            print(arquivo)
@@ -0,0 +1,259 @@
+import pandas as pd
+from cache_lru import CacheLRU
+from instrumentacao import instrumenta
+from processamento import MESES
+from regressao import EstatisticasOLS
+from configs import REGRESSAO_LIMITE_WEBGL, REGRESSAO_MAXIMO_PONTOS
+
+# As funções de plotagem recebem os contratos já com as colunas derivadas
+# (ver processamento.adiciona_colunas_derivadas) e não alteram o DataFrame.
+# O plotly é importado dentro delas: com as figuras em cache, ele só é carregado
+# quando uma figura precisa ser montada.
+
+# Figuras prontas, compartilhadas entre sessões
+_CACHE_FIGURAS = CacheLRU(tamanho_maximo=64)
+
+def figura_em_cache(funcao, df, chave, **kwargs):
+    """Retorna a figura de `funcao(df, **kwargs)`, montando-a apenas uma vez por chave.
+
+    Args:
+        funcao (callable): Uma das funções plot_*.
+        df (pd.DataFrame): Dados do gráfico.
+        chave (tuple): Identifica o conteúdo de `df` (ver processamento.chave_selecao).
+
+    Returns:
+        go.Figure: Figura em cache; não deve ser alterada por quem a recebe.
+    """
+    chave_figura = (funcao.__name__, chave, tuple(sorted(kwargs.items())))
+    return _CACHE_FIGURAS.obtem(chave_figura, lambda: funcao(df, **kwargs))
+
+def estatisticas_figuras():
+    """Retorna acertos, falhas, descartes e o tamanho do cache de figuras."""
+    return _CACHE_FIGURAS.estatisticas()
+
+# Função para formatar valores no formato brasileiro
+def format_currency(value):
+    return f"R${value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+# Funções de plotagem
+@instrumenta()
+def plot_value_acrescentado(df):
+    import plotly.graph_objects as go
+
+    month_order = MESES
+    monthly_acrescimento = (
+        df.groupby('MÊS', observed=False)['DIFERENÇA'].sum()
+        .reindex(month_order, fill_value=0)
+        .rename_axis('MÊS')
+        .reset_index(name='ACRESCIMO_REAJUSTE')
+    )
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=monthly_acrescimento['MÊS'],
+        y=monthly_acrescimento['ACRESCIMO_REAJUSTE'],
+        mode='lines+markers+text',
+        line=dict(color='darkblue', width=2, shape='spline'),
+        text=monthly_acrescimento['ACRESCIMO_REAJUSTE'],
+        texttemplate='%{text:.2s}',
+        textposition='top center',
+        marker=dict(symbol='circle', size=8, color='royalblue')
+    ))
+
+    total_acrescimo = monthly_acrescimento['ACRESCIMO_REAJUSTE'].sum()
+    fig.add_annotation(
+        text=f"Total Acréscimo: {format_currency(total_acrescimo)}",
+        xref="paper", yref="paper",
+        x=0.5, y=1.1, showarrow=False,
+        font=dict(size=18, color="white")
+    )
+
+    fig.update_layout(
+        title="Acréscimo no Reajuste por Mês",
+        xaxis_title='Mês',
+        yaxis_title='Valor Acrescentado (R$)',
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            showline=False, showgrid=False, zeroline=False,
+            categoryorder='array', categoryarray=month_order
+        ),
+        yaxis=dict(showline=False, showgrid=False, zeroline=False)
+    )
+
+    return fig
+
+@instrumenta()
+def plot_index_analysis(df):
+    import plotly.graph_objects as go
+
+    index_summary = df.groupby('ÍNDICE', observed=True).agg({
+        'VALOR PAGO': 'mean',
+        'VALOR REAJUSTADO': 'mean'
+    }).reset_index()
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=index_summary['ÍNDICE'],
+        y=index_summary['VALOR PAGO'],
+        name='Valor Pago',
+        marker_color='lightcyan'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=index_summary['ÍNDICE'],
+        y=index_summary['VALOR REAJUSTADO'],
+        name='Valor Reajustado',
+        mode='lines+markers',
+        line=dict(color='darkblue', width=2),
+    ))
+
+    fig.update_layout(
+        title="Percentual de Indice de Reajuste",
+        xaxis=dict(showline=False, showgrid=False, zeroline=False),
+        yaxis=dict(showline=False, showgrid=False, zeroline=False),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        showlegend=False
+    )
+    
+    return fig
+
+@instrumenta()
+def plot_contracts_per_month(df):
+    import plotly.express as px
+
+    contracts_per_month = (
+        df.groupby('MÊS', observed=False).size()
+        .reindex(MESES, fill_value=0)
+        .rename_axis('MÊS')
+        .reset_index(name='TOTAL DE CONTRATOS')
+    )
+
+    fig = px.bar(contracts_per_month, x='MÊS', y='TOTAL DE CONTRATOS',
+                 labels={'TOTAL DE CONTRATOS': 'Total de Contratos', 'MÊS': 'Mês'},
+                 color='TOTAL DE CONTRATOS',
+                 color_discrete_sequence=['royalblue'])
+
+    fig.update_traces(texttemplate='%{y}', textposition='outside')
+
+    fig.update_layout(
+        title="Total de Contratos por Mês",
+        xaxis=dict(showline=False, showgrid=False, zeroline=False),
+        yaxis=dict(showline=False, showgrid=False, zeroline=False),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        showlegend=False
+    )
+
+    return fig
+
+@instrumenta()
+def plot_pie_chart(df):
+    import plotly.graph_objects as go
+
+    # Status presentes, em ordem decrescente; empates na ordem de aparição (como no texto)
+    status = df['STATUS / AÇÃO']
+    status_counts = (
+        status.value_counts(sort=False).reindex(status.dropna().unique())
+        .sort_values(ascending=False, kind='stable').reset_index()
+    )
+    status_counts.columns = ['STATUS / AÇÃO', 'COUNT']
+
+    fig = go.Figure(go.Pie(
+        labels=status_counts['STATUS / AÇÃO'],
+        values=status_counts['COUNT'],
+        hole=0.5,
+        marker=dict(colors=['royalblue', 'darkblue', 'lightcyan']),
+        textinfo='none'
+    ))
+
+    fig.update_layout(
+        title="Distribuição por Status",
+        annotations=[dict(text=f'Total: {status_counts["COUNT"].sum()}', x=0.5, y=0.5, font_size=18, showarrow=False)]
+    )
+
+    return fig
+
+@instrumenta()
+def plot_regression_chart(df, limite_webgl=REGRESSAO_LIMITE_WEBGL, maximo_pontos=REGRESSAO_MAXIMO_PONTOS,
+                          coeficientes=None):
+    """Gráfico de dispersão da diferença de valor com a reta de regressão.
+
+    Acima de `limite_webgl` pontos, o gráfico passa a usar WebGL (Scattergl),
+    a reta é desenhada apenas pelos extremos e, se `maximo_pontos` for
+    informado, exibe-se uma amostra dos pontos. A regressão sempre usa
+    todos os pontos: `coeficientes` (inclinação, intercepto) vem do modelo
+    incremental (ver regressao.ModeloRegressao) ou, se omitido, é calculado
+    a partir de `df`.
+    """
+    import plotly.graph_objects as go
+
+    X = df[['VALOR PAGO']]
+
+    if coeficientes is None:
+        estatisticas = EstatisticasOLS()
+        if len(df):
+            x = df['VALOR PAGO'].astype(float)
+            y = df['DIFERENÇA'].astype(float)
+            dx = x - x.mean()
+            estatisticas = EstatisticasOLS(
+                len(df), x.mean(), y.mean(), (dx * dx).sum(), (dx * (y - y.mean())).sum()
+            )
+        coeficientes = estatisticas.coeficientes()
+    inclinacao, intercepto = coeficientes
+
+    total_pontos = len(df)
+    modo_grande = bool(limite_webgl) and total_pontos > limite_webgl
+    Scatter = go.Scattergl if modo_grande else go.Scatter
+
+    pontos = df
+    if modo_grande and maximo_pontos and total_pontos > maximo_pontos:
+        pontos = df.sample(n=maximo_pontos, random_state=0)
+
+    if modo_grande:
+        # Reta definida pelos extremos; evita enviar uma linha com N pontos
+        X_reta = pd.DataFrame({'VALOR PAGO': [X['VALOR PAGO'].min(), X['VALOR PAGO'].max()]})
+    else:
+        X_reta = X
+    predicted_diferenca = inclinacao * X_reta['VALOR PAGO'].astype(float) + intercepto
+
+    fig = go.Figure()
+
+    fig.add_trace(Scatter(
+        x=pontos['VALOR PAGO'],
+        y=pontos['DIFERENÇA'],
+        mode='markers',
+        name='Diferença Observada',
+        marker=dict(color='royalblue', size=10, opacity=0.6),
+        text=('Contrato: ' + pontos['CONTRATO Nº'].astype(str) + ', Empresa: ' + pontos['EMPRESA'].astype(str)).tolist()
+    ))
+
+    fig.add_trace(Scatter(
+        x=X_reta['VALOR PAGO'],
+        y=predicted_diferenca,
+        mode='lines',
+        name='Diferença Estimada',
+        line=dict(color='darkblue', width=2)
+    ))
+
+    if modo_grande:
+        exibidos = f" (exibindo {len(pontos):,})" if len(pontos) < total_pontos else ""
+        fig.add_annotation(
+            text=f"Total de pontos: {total_pontos:,}{exibidos}".replace(",", "."),
+            xref="paper", yref="paper",
+            x=1, y=1.05, showarrow=False, xanchor='right'
+        )
+
+    fig.update_layout(
+        title="Diferença de Valor em Relação ao Valor Pago",
+        xaxis_title="Valor Pago",
+        yaxis_title="Diferença de Valor",
+        xaxis=dict(showline=True, showgrid=False, zeroline=False),
+        yaxis=dict(showline=True, showgrid=False, zeroline=False),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+
+    return fig
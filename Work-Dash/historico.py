@@ -0,0 +1,180 @@
+import json
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from carregar_dados import (ARQUIVO_PADRAO, grava_abas, ler_aba, ler_abas_originais,
+                            trava_arquivo, trava_exclusiva)
+
+ABA_HISTORICO = 'Históricos'
+# Identificador único de cada evento, gravado junto com ele na aba 'Históricos'
+COLUNA_EVENTO = 'EVENTO'
+# Tamanho do journal a partir do qual a compactação roda em segundo plano
+LIMITE_COMPACTACAO_BYTES = 64 * 1024
+
+_TRAVA_JOURNAL = threading.Lock()
+_COMPACTACOES_EM_ANDAMENTO = set()
+
+def caminho_journal(file_path=ARQUIVO_PADRAO):
+    """Retorna o caminho do journal (JSON-lines) de eventos da planilha."""
+    file_path = Path(file_path)
+    return file_path.with_name(f'{file_path.name}.historico.jsonl')
+
+def _caminho_pendente(file_path):
+    """Journal separado para compactação; novos eventos seguem no journal principal."""
+    journal = caminho_journal(file_path)
+    return journal.with_name(journal.name + '.compactando')
+
+@contextmanager
+def _trava_journal(file_path):
+    """Trava os journals da planilha entre threads e entre processos."""
+    journal = caminho_journal(file_path)
+    with _TRAVA_JOURNAL, trava_exclusiva(journal.with_name(journal.name + '.lock')):
+        yield
+
+def registra_evento(contract_num, action, file_path=ARQUIVO_PADRAO):
+    """Acrescenta um evento de auditoria ao journal em O(1).
+
+    Args:
+        contract_num (str): Número do contrato alterado.
+        action (str): Ação realizada (por exemplo, 'Adicionado').
+        file_path (Path): Planilha à qual o histórico pertence.
+    """
+    evento = {
+        'CONTRATO Nº': str(contract_num),
+        'AÇÃO': action,
+        'DATA': datetime.now().isoformat(),
+        COLUNA_EVENTO: uuid.uuid4().hex
+    }
+    journal = caminho_journal(file_path)
+    with _trava_journal(file_path):
+        with open(journal, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(evento, ensure_ascii=False) + '\n')
+        tamanho = journal.stat().st_size
+
+    if tamanho > LIMITE_COMPACTACAO_BYTES:
+        compacta_em_segundo_plano(file_path)
+
+def _le_eventos(arquivo):
+    """Lê os eventos de um journal; linhas incompletas (escrita interrompida) são ignoradas."""
+    if not arquivo.exists():
+        return []
+    eventos = []
+    with open(arquivo, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                eventos.append(json.loads(linha))
+            except json.JSONDecodeError:
+                continue
+    return eventos
+
+def _eventos_para_df(eventos):
+    df = pd.DataFrame(eventos, columns=['CONTRATO Nº', 'AÇÃO', 'DATA', COLUNA_EVENTO])
+    df['DATA'] = pd.to_datetime(df['DATA'])
+    return df
+
+def _eventos_novos(df_historico, eventos):
+    """Eventos que ainda não estão na aba (journals antigos não têm identificador)."""
+    if COLUNA_EVENTO not in df_historico.columns:
+        return eventos
+    gravados = set(df_historico[COLUNA_EVENTO].dropna())
+    return [evento for evento in eventos if evento.get(COLUNA_EVENTO) not in gravados]
+
+def le_historico(file_path=ARQUIVO_PADRAO):
+    """Retorna o histórico completo: a aba do Excel seguida dos eventos do journal.
+
+    Returns:
+        pd.DataFrame: Histórico de alterações.
+    """
+    file_path = Path(file_path)
+    df_historico = ler_aba(file_path, ABA_HISTORICO)
+    eventos = _le_eventos(_caminho_pendente(file_path)) + _le_eventos(caminho_journal(file_path))
+    # Eventos de uma compactação interrompida depois de gravar a aba já estão nela
+    eventos = _eventos_novos(df_historico, eventos)
+    if not eventos:
+        return df_historico
+    return pd.concat([df_historico, _eventos_para_df(eventos)], ignore_index=True)
+
+def separa_eventos_pendentes(file_path=ARQUIVO_PADRAO):
+    """Separa os eventos do journal para compactação.
+
+    Novos eventos passam a ir para um journal novo. Os eventos separados
+    continuam visíveis em le_historico até descarta_eventos_compactados.
+
+    Returns:
+        list: Eventos a compactar.
+    """
+    file_path = Path(file_path)
+    journal = caminho_journal(file_path)
+    pendente = _caminho_pendente(file_path)
+    with _trava_journal(file_path):
+        if journal.exists():
+            if pendente.exists():
+                with open(pendente, 'a', encoding='utf-8') as f:
+                    f.write(journal.read_text(encoding='utf-8'))
+                journal.unlink()
+            else:
+                journal.replace(pendente)
+    return _le_eventos(pendente)
+
+def descarta_eventos_compactados(file_path=ARQUIVO_PADRAO):
+    """Remove os eventos já gravados na aba 'Históricos'."""
+    with _trava_journal(file_path):
+        _caminho_pendente(Path(file_path)).unlink(missing_ok=True)
+
+def historico_com_eventos(file_path, eventos, df_historico=None):
+    """Retorna a aba 'Históricos' acrescida dos eventos informados que ainda não estão nela.
+
+    A aba é a gravada no Excel (ver carregar_dados.ler_abas_originais), não
+    a tipada pelo esquema: ao ser regravada, as linhas existentes mantêm os
+    seus valores, mesmo os que o esquema não consegue converter.
+
+    Args:
+        file_path (Path): Planilha.
+        eventos (list): Eventos do journal.
+        df_historico (pd.DataFrame): Aba já lida com ler_abas_originais (padrão: lida aqui).
+    """
+    if df_historico is None:
+        df_historico = ler_abas_originais(file_path, [ABA_HISTORICO])[ABA_HISTORICO]
+    return pd.concat([df_historico, _eventos_para_df(_eventos_novos(df_historico, eventos))], ignore_index=True)
+
+def compacta_historico(file_path=ARQUIVO_PADRAO):
+    """Incorpora os eventos do journal à aba 'Históricos' da planilha.
+
+    A trava da planilha serializa as compactações (manuais, em segundo plano
+    ou de outros processos) e as gravações da página de Dados. Cada evento
+    é gravado com o seu identificador (COLUNA_EVENTO): se o processo
+    terminar depois de gravar a aba e antes de descartar o journal
+    separado, a próxima compactação não repete os eventos.
+
+    Returns:
+        int: Quantidade de eventos compactados.
+    """
+    file_path = Path(file_path)
+    with trava_arquivo(file_path):
+        df_historico = ler_abas_originais(file_path, [ABA_HISTORICO])[ABA_HISTORICO]
+        eventos = _eventos_novos(df_historico, separa_eventos_pendentes(file_path))
+        if eventos:
+            # Se a gravação falhar, os eventos pendentes continuam sendo lidos normalmente
+            grava_abas(file_path, {ABA_HISTORICO: historico_com_eventos(file_path, eventos, df_historico)})
+        descarta_eventos_compactados(file_path)
+    return len(eventos)
+
+def compacta_em_segundo_plano(file_path=ARQUIVO_PADRAO):
+    """Dispara a compactação em uma thread, se ainda não houver uma em andamento."""
+    file_path = Path(file_path).resolve()
+    with _TRAVA_JOURNAL:
+        if file_path in _COMPACTACOES_EM_ANDAMENTO:
+            return
+        _COMPACTACOES_EM_ANDAMENTO.add(file_path)
+
+    def _executa():
+        try:
+            compacta_historico(file_path)
+        finally:
+            with _TRAVA_JOURNAL:
+                _COMPACTACOES_EM_ANDAMENTO.discard(file_path)
+
+    threading.Thread(target=_executa, daemon=True).start()
@@ -0,0 +1,135 @@
+import streamlit as st
+
+TAMANHO_NGRAMA = 3
+
+def _ngramas(texto):
+    """Trigramas distintos do texto."""
+    return {texto[i:i + TAMANHO_NGRAMA] for i in range(len(texto) - TAMANHO_NGRAMA + 1)}
+
+class IndiceContratos:
+    """Índice em memória dos contratos da página de Dados.
+
+    - Índice hash (CONTRATO Nº, SISTEMA) -> rótulos das linhas, para
+      exclusões e buscas exatas;
+    - índice de trigramas sobre o número do contrato (como texto), para a
+      busca por trecho do número.
+
+    Os dois são atualizados linha a linha em adiciona e remove; as buscas
+    não percorrem a tabela.
+    """
+
+    def __init__(self, df):
+        """Indexa as linhas do DataFrame de contratos.
+
+        Args:
+            df (pd.DataFrame): Contratos, com rótulos de linha únicos.
+        """
+        self._por_chave = {}
+        self._linhas = {}
+        self._rotulos_por_texto = {}
+        self._textos_por_ngrama = {}
+        # Rótulo da próxima inclusão (ver persistencia._aplica_operacoes)
+        self.inicio_inclusoes = int(df.index.max()) + 1 if len(df) else 0
+        self.operacoes_aplicadas = 0
+        for rotulo, contrato, sistema in zip(df.index, df['CONTRATO Nº'], df['SISTEMA']):
+            self.adiciona(rotulo, contrato, sistema)
+
+    def __len__(self):
+        return len(self._linhas)
+
+    def adiciona(self, rotulo, contrato, sistema):
+        """Indexa uma linha."""
+        texto = str(contrato)
+        self._linhas[rotulo] = (contrato, sistema, texto)
+        self._por_chave.setdefault((contrato, sistema), set()).add(rotulo)
+        rotulos = self._rotulos_por_texto.setdefault(texto, set())
+        if not rotulos:
+            for ngrama in _ngramas(texto):
+                self._textos_por_ngrama.setdefault(ngrama, set()).add(texto)
+        rotulos.add(rotulo)
+
+    def remove(self, rotulo):
+        """Retira uma linha do índice, se existir."""
+        linha = self._linhas.pop(rotulo, None)
+        if linha is None:
+            return
+        contrato, sistema, texto = linha
+        rotulos = self._por_chave[(contrato, sistema)]
+        rotulos.discard(rotulo)
+        if not rotulos:
+            del self._por_chave[(contrato, sistema)]
+        rotulos = self._rotulos_por_texto[texto]
+        rotulos.discard(rotulo)
+        if not rotulos:
+            del self._rotulos_por_texto[texto]
+            for ngrama in _ngramas(texto):
+                textos = self._textos_por_ngrama[ngrama]
+                textos.discard(texto)
+                if not textos:
+                    del self._textos_por_ngrama[ngrama]
+
+    def rotulos(self, contrato, sistema):
+        """Rótulos das linhas com o contrato e o sistema informados, em ordem."""
+        return sorted(self._por_chave.get((contrato, sistema), ()))
+
+    def busca(self, trecho):
+        """Rótulos das linhas cujo número do contrato contém `trecho`, em ordem.
+
+        A comparação é literal (sem expressões regulares) e diferencia
+        maiúsculas de minúsculas.
+        """
+        if len(trecho) < TAMANHO_NGRAMA:
+            # Trechos curtos: percorre os números distintos, não as linhas
+            textos = [texto for texto in self._rotulos_por_texto if trecho in texto]
+        else:
+            postagens = sorted(
+                (self._textos_por_ngrama.get(ngrama, set()) for ngrama in _ngramas(trecho)),
+                key=len
+            )
+            candidatos = set.intersection(*postagens) if postagens[0] else set()
+            textos = [texto for texto in candidatos if trecho in texto]
+        return sorted(rotulo for texto in textos for rotulo in self._rotulos_por_texto[texto])
+
+    def aplica_operacoes(self, operacoes):
+        """Aplica as operações ainda não indexadas, como em persistencia._aplica_operacoes.
+
+        Args:
+            operacoes (list): Todas as operações pendentes; as primeiras
+                `operacoes_aplicadas` já estão no índice.
+        """
+        for posicao in range(self.operacoes_aplicadas, len(operacoes)):
+            tipo, dados = operacoes[posicao]
+            if tipo == 'inclusao':
+                self.adiciona(self.inicio_inclusoes + posicao, dados.get('CONTRATO Nº'), dados.get('SISTEMA'))
+            else:
+                for rotulo in self.rotulos(*dados):
+                    self.remove(rotulo)
+        self.operacoes_aplicadas = len(operacoes)
+
+def indice_da_sessao(df_base, versao, operacoes):
+    """Retorna o índice da sessão, atualizado com as operações pendentes.
+
+    O índice é remontado apenas quando os dados carregados mudam (`versao`)
+    ou quando as operações deixam de ser continuação das já aplicadas, por
+    exemplo depois de uma gravação.
+
+    Args:
+        df_base (pd.DataFrame): Contratos carregados da planilha.
+        versao: Identifica `df_base` (por exemplo, a assinatura do arquivo).
+        operacoes (list): Operações pendentes (ver persistencia.operacoes_pendentes).
+
+    Returns:
+        IndiceContratos: Índice de `df_base` com `operacoes` aplicadas.
+    """
+    estado = st.session_state.get('indice_contratos')
+    if estado is not None:
+        versao_indice, aplicadas, indice = estado
+        if versao_indice == versao and operacoes[:len(aplicadas)] == aplicadas:
+            indice.aplica_operacoes(operacoes)
+            st.session_state['indice_contratos'] = (versao, list(operacoes), indice)
+            return indice
+
+    indice = IndiceContratos(df_base)
+    indice.aplica_operacoes(operacoes)
+    st.session_state['indice_contratos'] = (versao, list(operacoes), indice)
+    return indice
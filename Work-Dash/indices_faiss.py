@@ -0,0 +1,211 @@
+import copy
+import math
+import faiss
+import numpy as np
+
+TIPOS_INDICE = ('flat', 'ivf_flat', 'hnsw', 'ivf_pq')
+
+# Valores usados quando a configuração não informa o parâmetro (ver configs.FAISS_INDICE_KWARGS)
+PARAMETROS_PADRAO = {
+    'nlist': None,
+    'nprobe': 16,
+    'hnsw_m': 32,
+    'ef_construction': 200,
+    'ef_search': 64,
+    'pq_m': 64,
+    'pq_bits': 8,
+    'amostra_treino': 50000,
+    'minimo_vetores': 10000
+}
+
+def _parametros(parametros):
+    return dict(PARAMETROS_PADRAO, **(parametros or {}))
+
+def numero_listas(total: int, nlist: int = None) -> int:
+    """Número de listas do IVF: o configurado ou cerca de 4·√n.
+
+    O k-means do treino pede uns 39 vetores por lista; o valor é limitado
+    para que o corpus atual seja suficiente.
+    """
+    if nlist is None:
+        nlist = int(4 * math.sqrt(total))
+    return max(1, min(int(nlist), total // 39))
+
+def descricao_indice(tipo: str, dimensao: int, total: int, parametros: dict = None) -> str:
+    """Descrição do índice no formato do faiss.index_factory.
+
+    Args:
+        tipo (str): Um de TIPOS_INDICE.
+        dimensao (int): Dimensão dos vetores.
+        total (int): Número de vetores (define o número de listas do IVF).
+        parametros (dict): Parâmetros do índice (ver PARAMETROS_PADRAO).
+    """
+    parametros = _parametros(parametros)
+    if tipo == 'flat':
+        return 'Flat'
+    if tipo == 'hnsw':
+        return f"HNSW{parametros['hnsw_m']}"
+    nlist = numero_listas(total, parametros['nlist'])
+    if tipo == 'ivf_flat':
+        return f'IVF{nlist},Flat'
+    if tipo == 'ivf_pq':
+        if dimensao % parametros['pq_m']:
+            raise ValueError(
+                f"pq_m ({parametros['pq_m']}) precisa dividir a dimensão dos embeddings ({dimensao})"
+            )
+        return f"IVF{nlist},PQ{parametros['pq_m']}x{parametros['pq_bits']}"
+    raise ValueError(f'Tipo de índice desconhecido: {tipo} (use um de {TIPOS_INDICE})')
+
+def tipo_do_indice(indice) -> str:
+    """Tipo (de TIPOS_INDICE) de um índice FAISS."""
+    indice = faiss.downcast_index(indice)
+    if isinstance(indice, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(indice, faiss.IndexIVFPQ):
+        return 'ivf_pq'
+    if isinstance(indice, faiss.IndexIVF):
+        return 'ivf_flat'
+    return 'flat'
+
+def ajusta_busca(indice, parametros: dict = None) -> None:
+    """Aplica os parâmetros de busca: nprobe no IVF e efSearch no HNSW."""
+    parametros = _parametros(parametros)
+    indice = faiss.downcast_index(indice)
+    ivf = faiss.try_extract_index_ivf(indice)
+    if ivf is not None:
+        ivf.nprobe = min(int(parametros['nprobe']), ivf.nlist)
+    if isinstance(indice, faiss.IndexHNSW):
+        indice.hnsw.efSearch = int(parametros['ef_search'])
+
+def cria_indice(tipo: str, vetores, parametros: dict = None, semente: int = 0):
+    """Cria um índice do tipo informado com os vetores, treinando-o em uma amostra.
+
+    O IVF mantém o mapa direto dos ids, necessário ao `reconstruct` usado
+    pela busca MMR do LangChain.
+
+    Args:
+        tipo (str): Um de TIPOS_INDICE.
+        vetores (np.ndarray): Matriz float32 (n, dimensão), na ordem dos ids.
+        parametros (dict): Parâmetros do índice (ver PARAMETROS_PADRAO).
+        semente (int): Semente da amostra de treino.
+
+    Returns:
+        faiss.Index: Índice com os vetores incluídos e a busca ajustada.
+    """
+    parametros = _parametros(parametros)
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    total, dimensao = vetores.shape
+    indice = faiss.index_factory(dimensao, descricao_indice(tipo, dimensao, total, parametros), faiss.METRIC_L2)
+    if tipo == 'hnsw':
+        indice.hnsw.efConstruction = int(parametros['ef_construction'])
+    if not indice.is_trained:
+        amostra = vetores
+        if total > parametros['amostra_treino']:
+            posicoes = np.random.default_rng(semente).choice(total, parametros['amostra_treino'], replace=False)
+            amostra = vetores[np.sort(posicoes)]
+        indice.train(amostra)
+    ivf = faiss.try_extract_index_ivf(indice)
+    if ivf is not None:
+        ivf.make_direct_map()
+    indice.add(vetores)
+    ajusta_busca(indice, parametros)
+    return indice
+
+def vetores_do_indice(vector_store, posicoes: list = None) -> np.ndarray:
+    """Vetores exatos do vector store, na ordem dos ids (ou das `posicoes` informadas).
+
+    O plano, o IVF-Flat e o HNSW guardam os vetores originais, lidos com
+    `reconstruct`. O IVF-PQ guarda apenas uma aproximação: nele os vetores
+    são pedidos de novo ao modelo de embeddings, a partir do texto de cada
+    trecho no docstore. Com o EmbeddingsEmCache do app, todos vêm do cache
+    em disco, sem chamadas ao modelo.
+    """
+    indice = vector_store.index
+    if posicoes is None:
+        posicoes = range(indice.ntotal)
+    posicoes = np.asarray(posicoes, dtype=np.int64)
+    if len(posicoes) == 0:
+        return np.empty((0, indice.d), dtype=np.float32)
+    if tipo_do_indice(indice) != 'ivf_pq':
+        return indice.reconstruct_batch(posicoes)
+    textos = [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[int(posicao)]).page_content
+        for posicao in posicoes
+    ]
+    return np.asarray(vector_store.embedding_function.embed_documents(textos), dtype=np.float32)
+
+def _tipo_alvo(indice, tipo: str, parametros: dict) -> str:
+    """Tipo que o índice deve ter: o configurado ou, com poucos vetores, o plano."""
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f'Tipo de índice desconhecido: {tipo} (use um de {TIPOS_INDICE})')
+    return 'flat' if indice.ntotal < parametros['minimo_vetores'] else tipo
+
+def precisa_converter(indice, tipo: str, parametros: dict = None) -> bool:
+    """Indica se converte_vector_store trocaria o índice."""
+    return _tipo_alvo(indice, tipo, _parametros(parametros)) != tipo_do_indice(indice)
+
+def converte_vector_store(vector_store, tipo: str, parametros: dict = None) -> bool:
+    """Troca o índice do vector store pelo tipo configurado, se necessário.
+
+    Abaixo de `minimo_vetores` o índice plano é usado: a busca exata ainda
+    é rápida e não há vetores suficientes para treinar o IVF. Os ids
+    e o docstore não mudam; apenas os vetores são remontados.
+
+    Args:
+        vector_store (FAISS): Vector store do LangChain.
+        tipo (str): Tipo desejado (um de TIPOS_INDICE).
+        parametros (dict): Parâmetros do índice (ver PARAMETROS_PADRAO).
+
+    Returns:
+        bool: True se o índice foi trocado.
+    """
+    parametros = _parametros(parametros)
+    tipo = _tipo_alvo(vector_store.index, tipo, parametros)
+    if tipo == tipo_do_indice(vector_store.index):
+        ajusta_busca(vector_store.index, parametros)
+        return False
+    vector_store.index = cria_indice(tipo, vetores_do_indice(vector_store), parametros)
+    return True
+
+def clona_vector_store(vector_store):
+    """Cópia do vector store que pode ser alterada sem afetar o original.
+
+    O índice, o docstore e o mapeamento de ids são copiados; os documentos e
+    o modelo de embeddings são compartilhados, pois nenhum dos dois é alterado.
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    copia = copy.copy(vector_store)
+    copia.index = faiss.clone_index(vector_store.index)
+    copia.docstore = InMemoryDocstore(dict(vector_store.docstore._dict))
+    copia.index_to_docstore_id = dict(vector_store.index_to_docstore_id)
+    return copia
+
+def remove_documentos(vector_store, ids: list) -> None:
+    """Remove documentos do vector store, em qualquer tipo de índice.
+
+    O FAISS.delete do LangChain supõe que os ids restantes são renumerados,
+    como no índice plano; no IVF eles são mantidos e o HNSW não remove
+    vetores. Nesses índices os vetores restantes (os exatos, ver
+    vetores_do_indice) são reincluídos no mesmo índice já treinado, na nova
+    numeração; sincroniza_vector_store faz uma única remoção por atualização.
+    """
+    if tipo_do_indice(vector_store.index) == 'flat':
+        vector_store.delete(ids)
+        return
+
+    posicao_por_id = {id_: posicao for posicao, id_ in vector_store.index_to_docstore_id.items()}
+    ausentes = set(ids).difference(posicao_por_id)
+    if ausentes:
+        raise ValueError(f'Ids inexistentes no índice: {ausentes}')
+    removidas = {posicao_por_id[id_] for id_ in ids}
+    mantidas = [posicao for posicao in sorted(vector_store.index_to_docstore_id) if posicao not in removidas]
+
+    vetores = vetores_do_indice(vector_store, mantidas)
+    indice = faiss.downcast_index(vector_store.index)
+    indice.reset()
+    indice.add(vetores)
+    vector_store.docstore.delete(ids)
+    vector_store.index_to_docstore_id = {
+        nova: vector_store.index_to_docstore_id[antiga] for nova, antiga in enumerate(mantidas)
+    }
@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from langchain_community.document_loaders.pdf import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from instrumentacao import instrumenta, medir
+
+@instrumenta('chatpdf.leitura_divisao')
+def divide_pdf(caminho, chunk_size: int, chunk_overlap: int) -> list:
+    """Lê um PDF página a página e divide cada página assim que ela é lida.
+
+    Cada página é dividida separadamente, sem manter todas as páginas em
+    memória; os trechos são numerados ('doc_id') na ordem do arquivo.
+
+    Args:
+        caminho (Path): PDF a ser lido.
+        chunk_size (int): Tamanho máximo de cada trecho.
+        chunk_overlap (int): Sobreposição entre trechos.
+
+    Returns:
+        list: Trechos do PDF, com 'source' (nome do arquivo) e 'doc_id'.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ".", " ", ""]
+    )
+    trechos = []
+    for pagina in PyPDFLoader(str(caminho)).lazy_load():
+        for trecho in splitter.split_documents([pagina]):
+            trecho.metadata['source'] = trecho.metadata['source'].split('/')[-1]
+            trecho.metadata['doc_id'] = len(trechos)
+            trechos.append(trecho)
+    return trechos
+
+def ingere_pdfs(arquivos: list, chunk_size: int, chunk_overlap: int, max_processos: int = None):
+    """Lê e divide os PDFs em um pool de processos, entregando cada um assim que fica pronto.
+
+    No máximo dois PDFs por processo ficam em andamento ou aguardando
+    consumo; assim a memória depende do tamanho dos maiores PDFs, não do
+    total do acervo.
+
+    Args:
+        arquivos (list): PDFs a processar.
+        chunk_size (int): Tamanho máximo de cada trecho.
+        chunk_overlap (int): Sobreposição entre trechos.
+        max_processos (int): Tamanho do pool (padrão: número de CPUs).
+
+    Yields:
+        tuple: (caminho do PDF, lista de trechos), na ordem em que terminam.
+    """
+    arquivos = [Path(arquivo) for arquivo in arquivos]
+    processos = min(len(arquivos), max_processos or os.cpu_count() or 1)
+    if processos <= 1:
+        # Um único PDF (ou processo): não compensa abrir o pool
+        for arquivo in arquivos:
+            yield arquivo, divide_pdf(arquivo, chunk_size, chunk_overlap)
+        return
+
+    fila = iter(arquivos)
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        em_andamento = {}
+
+        def submete_proximo():
+            arquivo = next(fila, None)
+            if arquivo is not None:
+                em_andamento[pool.submit(divide_pdf, arquivo, chunk_size, chunk_overlap)] = arquivo
+
+        for _ in range(2 * processos):
+            submete_proximo()
+        while em_andamento:
+            # Nos processos a leitura não é medida; mede-se a espera pelo próximo PDF
+            with medir('chatpdf.leitura_divisao'):
+                prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                arquivo = em_andamento.pop(futuro)
+                submete_proximo()
+                yield arquivo, futuro.result()
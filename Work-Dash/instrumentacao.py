@@ -0,0 +1,206 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+# Medidas das etapas da execução atual (um rerun do Streamlit ou um bloco `coleta`).
+# None desativa a instrumentação: medir e instrumenta apenas consultam esta variável.
+_MEDIDAS = ContextVar('medidas', default=None)
+_NIVEL = ContextVar('nivel_medida', default=0)
+_TRAVA_ARQUIVO = threading.Lock()
+# Reruns guardados por sessão para o painel e a exportação
+RERUNS_POR_SESSAO = 50
+
+try:
+    _TAMANHO_PAGINA = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):  # Windows
+    _TAMANHO_PAGINA = None
+
+def memoria_processo_mb():
+    """Memória residente (RSS) do processo em MB, ou None se não disponível."""
+    if _TAMANHO_PAGINA is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _TAMANHO_PAGINA / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _linhas(objeto):
+    """Número de linhas de DataFrames, Series e listas; None para os demais objetos."""
+    if hasattr(objeto, 'shape') or isinstance(objeto, (list, tuple)):
+        return len(objeto)
+    return None
+
+def medidas_atuais():
+    """Lista de medidas da execução atual, ou None com a instrumentação desligada."""
+    return _MEDIDAS.get()
+
+def nivel_atual():
+    """Profundidade da etapa em andamento (0 fora de qualquer `medir`)."""
+    return _NIVEL.get()
+
+def registra(medidas, etapa, segundos, nivel=0, **extras):
+    """Acrescenta uma medida feita fora de `medir` (por exemplo, em callbacks do LangChain).
+
+    Args:
+        medidas (list): Lista de destino (ver medidas_atuais); None não registra nada.
+        etapa (str): Nome da etapa.
+        segundos (float): Duração medida.
+        nivel (int): Profundidade da etapa.
+        **extras: Outros campos da medida ('linhas_saida', por exemplo).
+    """
+    if medidas is not None:
+        medidas.append(dict(etapa=etapa, nivel=nivel, ms=round(segundos * 1000, 3), **extras))
+
+@contextmanager
+def medir(etapa, linhas=None):
+    """Mede tempo, memória e linhas de um trecho de código.
+
+    A medida recebida no `with` é um dict: o trecho pode preencher
+    'linhas_entrada' e 'linhas_saida'. Com a instrumentação desativada,
+    nada é medido.
+
+    Args:
+        etapa (str): Nome da etapa (por exemplo, 'processamento.process_data').
+        linhas (int): Linhas de entrada, se já conhecidas.
+    """
+    medidas = _MEDIDAS.get()
+    if medidas is None:
+        yield {}
+        return
+    medida = {'etapa': etapa, 'nivel': _NIVEL.get(), 'linhas_entrada': linhas, 'linhas_saida': None}
+    # A medida entra na lista ao começar: etapas internas aparecem depois da etapa que as contém
+    medidas.append(medida)
+    token = _NIVEL.set(medida['nivel'] + 1)
+    memoria = memoria_processo_mb()
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        medida['ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+        final = memoria_processo_mb()
+        medida['memoria_mb'] = None if memoria is None or final is None else round(final - memoria, 3)
+        _NIVEL.reset(token)
+
+def instrumenta(etapa=None, linhas=('entrada', 'saida')):
+    """Decorador que mede cada chamada da função com `medir`.
+
+    As linhas de entrada são as do primeiro argumento posicional que for um
+    DataFrame, Series ou lista (em métodos, o `self` é ignorado); as de
+    saída, as do retorno. `linhas` indica quais das duas contar (por
+    exemplo, sem a entrada quando o argumento é uma lista de anos).
+    """
+    def decorador(funcao):
+        nome = etapa or f'{funcao.__module__}.{funcao.__qualname__}'
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if _MEDIDAS.get() is None:
+                return funcao(*args, **kwargs)
+            entrada = next((n for n in map(_linhas, args) if n is not None), None) if 'entrada' in linhas else None
+            with medir(nome, entrada) as registro:
+                resultado = funcao(*args, **kwargs)
+                if 'saida' in linhas:
+                    registro['linhas_saida'] = _linhas(resultado)
+            return resultado
+        return medida
+    return decorador
+
+@contextmanager
+def coleta():
+    """Ativa a instrumentação no bloco e devolve a lista de medidas (uso fora do Streamlit)."""
+    medidas = []
+    token = _MEDIDAS.set(medidas)
+    try:
+        yield medidas
+    finally:
+        _MEDIDAS.reset(token)
+
+def ativa():
+    """Indica se a instrumentação está ligada (INSTRUMENTACAO, ou 'instrumentacao' no session_state)."""
+    from configs import get_config
+    return bool(get_config('instrumentacao'))
+
+def inicia_rerun(pagina):
+    """Começa a coleta das medidas de um rerun da página, se a instrumentação estiver ligada.
+
+    Deve ser chamada no início do script da página. As medidas do rerun
+    anterior da sessão são gravadas no arquivo INSTRUMENTACAO_ARQUIVO
+    (JSON-lines), se configurado, e ficam disponíveis no painel.
+    """
+    import streamlit as st
+    from configs import get_config
+
+    reruns = st.session_state.setdefault('instrumentacao_reruns', deque(maxlen=RERUNS_POR_SESSAO))
+    if reruns and not reruns[-1].get('exportado'):
+        arquivo = get_config('instrumentacao_arquivo')
+        if arquivo:
+            exporta_jsonl([reruns[-1]], arquivo)
+        reruns[-1]['exportado'] = True
+    if not ativa():
+        _MEDIDAS.set(None)
+        return
+    rerun = {
+        'pagina': pagina,
+        'rerun': st.session_state.get('instrumentacao_contador', 0) + 1,
+        'inicio': datetime.now().isoformat(timespec='milliseconds'),
+        'medidas': []
+    }
+    st.session_state['instrumentacao_contador'] = rerun['rerun']
+    reruns.append(rerun)
+    _MEDIDAS.set(rerun['medidas'])
+
+def linhas_jsonl(reruns):
+    """Uma linha JSON por medida, com a página e o número do rerun."""
+    for rerun in reruns:
+        for medida in rerun['medidas']:
+            yield json.dumps(
+                {'pagina': rerun['pagina'], 'rerun': rerun['rerun'], 'inicio_rerun': rerun['inicio'], **medida},
+                ensure_ascii=False, default=str
+            )
+
+def exporta_jsonl(reruns, arquivo):
+    """Acrescenta as medidas dos reruns ao arquivo JSON-lines."""
+    with _TRAVA_ARQUIVO:
+        with open(Path(arquivo), 'a', encoding='utf-8') as f:
+            for linha in linhas_jsonl(reruns):
+                f.write(linha + '\n')
+
+def painel_instrumentacao():
+    """Painel de depuração na barra lateral com as medidas do rerun atual.
+
+    Não exibe nada com a instrumentação desligada. Deve ser chamado no
+    final do script, para incluir as etapas do rerun inteiro.
+    """
+    import streamlit as st
+
+    reruns = st.session_state.get('instrumentacao_reruns')
+    if not ativa() or not reruns:
+        return
+    rerun = reruns[-1]
+    medidas = [dict(medida) for medida in rerun['medidas']]
+    for medida in medidas:
+        medida['etapa'] = '  ' * medida['nivel'] + medida['etapa']
+    with st.sidebar.expander('Instrumentação', expanded=False):
+        total = sum(medida.get('ms') or 0 for medida in rerun['medidas'] if medida['nivel'] == 0)
+        st.caption(f"Rerun {rerun['rerun']} de {rerun['pagina']}: {total:.1f} ms em {len(medidas)} etapa(s)")
+        if medidas:
+            st.dataframe(
+                medidas,
+                column_order=['etapa', 'ms', 'linhas_entrada', 'linhas_saida', 'memoria_mb'],
+                hide_index=True, use_container_width=True
+            )
+        st.download_button(
+            'Exportar (JSON-lines)',
+            data='\n'.join(linhas_jsonl(reruns)) + '\n',
+            file_name='instrumentacao.jsonl',
+            mime='application/jsonl',
+            use_container_width=True
+        )
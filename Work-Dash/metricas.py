@@ -0,0 +1,80 @@
+from cache_lru import CacheLRU
+from instrumentacao import instrumenta
+
+COLUNA_STATUS = 'STATUS / AÇÃO'
+COLUNA_MES = 'MÊS'
+
+# Células pré-agregadas por versão dos dados
+_CACHE_CELULAS = CacheLRU(tamanho_maximo=8)
+
+@instrumenta()
+def calcula_celulas(df):
+    """Agrega, em uma única passada, os valores de cada célula (status, mês).
+
+    Args:
+        df (pd.DataFrame): Contratos agrupados (saída de process_data).
+
+    Returns:
+        pd.DataFrame: Uma linha por (status, mês) com as somas de
+        'VALOR REAJUSTADO', 'VALOR PAGO', 'DIFERENÇA' e a contagem de contratos.
+    """
+    return df.assign(
+        DIFERENÇA=df['VALOR REAJUSTADO'] - df['VALOR PAGO'],
+        CONTRATOS=1
+    ).groupby([COLUNA_STATUS, COLUNA_MES], dropna=False, observed=True).agg({
+        'VALOR REAJUSTADO': 'sum',
+        'VALOR PAGO': 'sum',
+        'DIFERENÇA': 'sum',
+        'CONTRATOS': 'sum'
+    }).reset_index()
+
+def celulas_em_cache(versao, df):
+    """Retorna as células da versão informada, calculando-as apenas na primeira vez."""
+    return _CACHE_CELULAS.obtem(versao, lambda: calcula_celulas(df))
+
+@instrumenta()
+def metricas_da_selecao(celulas, status=None, meses=None):
+    """Calcula as métricas somando as células dos status e meses selecionados.
+
+    Args:
+        celulas (pd.DataFrame): Saída de calcula_celulas.
+        status (list): Status selecionados (None seleciona todos).
+        meses (list): Meses selecionados (None seleciona todos).
+
+    Returns:
+        dict: As mesmas métricas de calculate_metrics sobre os contratos
+        filtrados. As somas partem das células, em outra ordem: podem
+        diferir do cálculo linha a linha no último dígito do ponto flutuante
+        (ver tests/test_metricas.py).
+    """
+    selecao = celulas
+    if status is not None:
+        selecao = selecao[selecao[COLUNA_STATUS].isin(status)]
+    if meses is not None:
+        selecao = selecao[selecao[COLUNA_MES].isin(meses)]
+
+    por_status = selecao.groupby(COLUNA_STATUS, observed=True).sum(numeric_only=True)
+
+    def soma(status_acao, coluna):
+        return por_status[coluna].get(status_acao, 0.0)
+
+    # Calcular o percentual de renovação
+    total_contratos = selecao['CONTRATOS'].sum()
+    total_renovados = soma('RENOVADO', 'CONTRATOS')
+    percentual_renovacao = (total_renovados / total_contratos) * 100 if total_contratos > 0 else 0
+
+    return {
+        "valor_previsto": selecao['VALOR REAJUSTADO'].sum(),
+        "valor_renovado": soma('RENOVADO', 'VALOR REAJUSTADO'),
+        "valor_em_processo": soma('EM PROCESSO', 'VALOR REAJUSTADO'),
+        "valor_cancelado": soma('CANCELADO', 'VALOR REAJUSTADO'),
+        "diferenca_cancelado": soma('CANCELADO', 'DIFERENÇA'),
+        "diferenca_renovado": soma('RENOVADO', 'DIFERENÇA'),
+        "diferenca_em_processo": soma('EM PROCESSO', 'DIFERENÇA'),
+        "percentual_renovacao": percentual_renovacao
+    }
+
+@instrumenta()
+def calculate_metrics(df):
+    """Calcula as métricas a partir do DataFrame filtrado."""
+    return metricas_da_selecao(calcula_celulas(df))
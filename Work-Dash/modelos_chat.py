@@ -0,0 +1,90 @@
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from instrumentacao import registra
+
+# Marca o modelo que gera a resposta; só os seus tokens são exibidos
+TAG_RESPOSTA = 'resposta'
+
+class ChatFalso(FakeListChatModel):
+    """Modelo de chat local para testes: repete as respostas configuradas, caractere a caractere."""
+
+    streaming: bool = False
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if not self.streaming:
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        # Como o ChatOpenAI com streaming: cada trecho é repassado aos callbacks ao chegar
+        trechos = []
+        for trecho in self._stream(messages, stop=stop, **kwargs):
+            if run_manager:
+                run_manager.on_llm_new_token(trecho.text, chunk=trecho)
+            trechos.append(trecho)
+        return generate_from_stream(iter(trechos))
+
+    def get_num_tokens(self, text: str) -> int:
+        # Aproximação sem tokenizador (evita baixar o do GPT-2 nos testes)
+        return len(text.split())
+
+class ExibeTokens(BaseCallbackHandler):
+    """Escreve a resposta em um elemento do Streamlit à medida que os tokens chegam.
+
+    Mede também o tempo até o primeiro token, a partir da criação do handler.
+    """
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.texto = ''
+        self.inicio = time.perf_counter()
+        self.tempo_primeiro_token = None
+
+    def on_llm_new_token(self, token: str, *, tags=None, **kwargs) -> None:
+        # Ignora os tokens da reformulação da pergunta
+        if TAG_RESPOSTA not in (tags or []):
+            return
+        if self.tempo_primeiro_token is None:
+            self.tempo_primeiro_token = time.perf_counter() - self.inicio
+        self.texto += token
+        self.saida.markdown(self.texto + '▌')
+
+class ContaTokensPrompt(BaseCallbackHandler):
+    """Conta os tokens do prompt montado para o modelo da resposta."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.tokens = None
+
+    def on_chat_model_start(self, serialized, messages, *, tags=None, **kwargs) -> None:
+        if TAG_RESPOSTA in (tags or []):
+            self.tokens = self.llm.get_num_tokens_from_messages(messages[0])
+
+class MedeEtapas(BaseCallbackHandler):
+    """Registra na instrumentação (ver instrumentacao.py) a recuperação e cada chamada aos modelos.
+
+    As medidas vão para a lista recebida na criação: os callbacks podem
+    rodar fora do contexto em que a pergunta foi feita.
+    """
+
+    def __init__(self, medidas, nivel=0):
+        self.medidas = medidas
+        self.nivel = nivel
+        self._inicios = {}
+
+    def _termina(self, run_id, **extras):
+        if run_id in self._inicios:
+            etapa, inicio = self._inicios.pop(run_id)
+            registra(self.medidas, etapa, time.perf_counter() - inicio, self.nivel, **extras)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs) -> None:
+        self._inicios[run_id] = ('chatpdf.recuperacao', time.perf_counter())
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs) -> None:
+        self._termina(run_id, linhas_saida=len(documents))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, **kwargs) -> None:
+        etapa = 'chatpdf.llm' if TAG_RESPOSTA in (tags or []) else 'chatpdf.llm_auxiliar'
+        self._inicios[run_id] = (etapa, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        self._termina(run_id)
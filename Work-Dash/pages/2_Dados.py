@@ -1,20 +1,21 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 from pathlib import Path
 from carregar_dados import leitura_de_dados
+from esquema import avisos_esquema
+from historico import compacta_historico, le_historico, registra_evento
+from indice_contratos import indice_da_sessao
+from instrumentacao import inicia_rerun, painel_instrumentacao
+from persistencia import (agenda_exclusao, agenda_inclusao, aplica_pendencias,
+                          operacoes_pendentes, ultimo_erro)
 
 # Configurar o layout da página para wide
 st.set_page_config(layout="wide")
+inicia_rerun('Dados')
 
 # Carrega os dados
 leitura_de_dados()
 
-# Acesso aos dados carregados
-dados = st.session_state.get('dados', {})
-df_contratos = dados.get('df_contratos', pd.DataFrame())
-df_historico = dados.get('df_historico', pd.DataFrame())
-
 # Define o caminho do arquivo
 pasta_datasets = Path(__file__).resolve().parent.parent / 'planilhas'
 file_path = pasta_datasets / '2024.xlsx'
@@ -23,28 +24,35 @@ file_path = pasta_datasets / '2024.xlsx'
 if not pasta_datasets.exists():
     pasta_datasets.mkdir(parents=True, exist_ok=True)
 
-# Função para salvar o DataFrame no Excel
-def save_to_excel(df, file_path, sheet_name='Contratos'):
-    """Salva o DataFrame no arquivo Excel."""
-    try:
-        with pd.ExcelWriter(file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            df.to_excel(writer, index=False, sheet_name=sheet_name)
-    except Exception as e:
-        st.error(f"Erro ao salvar os dados: {e}")
+# Acesso aos dados carregados, com as alterações ainda não gravadas
+dados = st.session_state.get('dados', {})
+df_contratos = dados.get('df_contratos', pd.DataFrame())
+indice = None
+if not df_contratos.empty:
+    # Só as operações que faltam na versão da planilha lida por esta sessão
+    assinatura_dados = st.session_state.get('assinatura_dados')
+    operacoes = operacoes_pendentes(file_path, assinatura_dados)
+    # Índice dos contratos (hash e trigramas), atualizado só com as operações novas
+    indice = indice_da_sessao(df_contratos, assinatura_dados, operacoes)
+    df_contratos = aplica_pendencias(df_contratos, file_path, operacoes)
+
+# As alterações são gravadas em segundo plano; mostra a última falha, se houver
+erro_gravacao = ultimo_erro(file_path)
+if erro_gravacao:
+    st.error(f"Erro ao salvar os dados: {erro_gravacao}")
+
+# Valores da planilha que não puderam ser convertidos (ficam vazios na tabela)
+for aviso in avisos_esquema([file_path.name]):
+    st.warning(aviso)
 
 # Função para registrar histórico
 def log_change(contract_num, action):
     """Registra uma mudança no histórico."""
-    new_log = pd.DataFrame({
-        'CONTRATO Nº': [contract_num],
-        'AÇÃO': [action],
-        'DATA': [datetime.now()]
-    })
-    # Atualiza o DataFrame do histórico no session_state
-    st.session_state['dados']['df_historico'] = pd.concat(
-        [st.session_state['dados']['df_historico'], new_log], ignore_index=True
-    )
-    save_to_excel(st.session_state['dados']['df_historico'], file_path, sheet_name='Históricos')
+    # Acrescenta o evento ao journal; a aba 'Históricos' é atualizada na compactação
+    try:
+        registra_evento(contract_num, action, file_path)
+    except OSError as e:
+        st.error(f"Erro ao registrar o histórico: {e}")
 
 # Exibir a tabela de contratos
 st.title('Gerenciamento de Contratos')
@@ -52,7 +60,7 @@ st.title('Gerenciamento de Contratos')
 # Filtros inteligentes
 st.sidebar.header('Filtros')
 filter_contract_num = st.sidebar.text_input('Filtrar por Número do Contrato')
-filtered_df = df_contratos[df_contratos['CONTRATO Nº'].astype(str).str.contains(filter_contract_num)] if filter_contract_num else df_contratos
+filtered_df = df_contratos.loc[indice.busca(filter_contract_num)] if filter_contract_num and indice is not None else df_contratos
 st.dataframe(filtered_df)
 
 # Barra lateral para ações
@@ -78,12 +86,13 @@ if st.sidebar.button('Adicionar Novo Contrato'):
         st.sidebar.error(f'Por favor, preencha os seguintes campos: {", ".join(missing_fields)}.')
     else:
         # Adiciona a nova linha sem verificar se o contrato já existe
-        new_row = pd.DataFrame([new_row_data])  # Cria um DataFrame a partir da nova linha
-        df_contratos = pd.concat([df_contratos, new_row], ignore_index=True)
-        st.session_state['dados']['df_contratos'] = df_contratos  # Atualiza o DataFrame no session_state
-        log_change(new_row_data['CONTRATO Nº'], 'Adicionado')  # Atualiza o histórico
-        save_to_excel(df_contratos, file_path)  # Salva o DataFrame atualizado
-        st.success('Novo contrato adicionado com sucesso!')
+        try:
+            agenda_inclusao(new_row_data, file_path)  # Agenda a gravação da nova linha
+        except ValueError as e:
+            st.sidebar.error(f'{e}. Use números como 1.234,50 e datas como 31/12/2024.')
+        else:
+            log_change(new_row_data['CONTRATO Nº'], 'Adicionado')  # Atualiza o histórico
+            st.success('Novo contrato adicionado com sucesso!')
 
 # Campos para excluir uma linha
 st.sidebar.subheader('Excluir Contrato')
@@ -92,13 +101,10 @@ sistema_excluir = st.sidebar.text_input('Sistema do Contrato para Excluir')
 
 if st.sidebar.button('Excluir Contrato'):
     if contrato_excluir and sistema_excluir:
-        # Filtra o DataFrame para encontrar a linha correspondente
-        mask = (df_contratos['CONTRATO Nº'] == contrato_excluir) & (df_contratos['SISTEMA'] == sistema_excluir)
-        if mask.any():
-            df_contratos = df_contratos[~mask]  # Remove a linha correspondente
-            st.session_state['dados']['df_contratos'] = df_contratos  # Atualiza o DataFrame no session_state
+        # Procura a linha correspondente no índice
+        if indice is not None and indice.rotulos(contrato_excluir, sistema_excluir):
+            agenda_exclusao(contrato_excluir, sistema_excluir, file_path)  # Agenda a remoção da linha
             log_change(contrato_excluir, 'Excluído')  # Atualiza o histórico
-            save_to_excel(df_contratos, file_path)  # Salva o DataFrame atualizado
             st.success('Contrato excluído com sucesso!')
         else:
             st.sidebar.error('Contrato ou sistema não encontrado!')
@@ -108,4 +114,13 @@ if st.sidebar.button('Excluir Contrato'):
 # Opção para exibir histórico
 if st.sidebar.checkbox('Mostrar Histórico de Alterações'):
     st.subheader('Histórico de Alterações')
-    st.dataframe(st.session_state['dados']['df_historico'])
+    st.dataframe(le_historico(file_path))
+    if st.sidebar.button('Compactar Histórico'):
+        try:
+            total = compacta_historico(file_path)
+            st.sidebar.success(f'{total} evento(s) gravado(s) na aba Históricos.')
+        except Exception as e:
+            st.sidebar.error(f"Erro ao compactar o histórico: {e}")
+
+# Painel de depuração (só com a instrumentação ligada)
+painel_instrumentacao()
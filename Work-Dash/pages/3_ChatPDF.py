@@ -1,7 +1,10 @@
 import os
+import time
 import streamlit as st
 from pathlib import Path
-from utils import cria_chain_conversa, PASTA_ARQUIVOS
+from instrumentacao import inicia_rerun, painel_instrumentacao
+from utils import (cache_respostas, cria_chain_conversa, estatisticas_embeddings,
+                   responde_pergunta, PASTA_ARQUIVOS)
 
 # Certifique-se de que o diretório PASTA_ARQUIVOS existe
 PASTA_ARQUIVOS.mkdir(parents=True, exist_ok=True)  # Cria o diretório se não existir
@@ -14,13 +17,27 @@ def sidebar():
         accept_multiple_files=True
     )
     
-    # Limpa arquivos antigos e salva novos PDFs
+    # Salva os PDFs novos ou alterados; os demais continuam na pasta (a indexação é incremental)
+    removidos = st.session_state.setdefault('pdfs_removidos', set())
     if uploaded_pdfs:
-        for arquivo in PASTA_ARQUIVOS.glob('*.pdf'):
-            arquivo.unlink()  # Remove arquivos antigos
         for pdf in uploaded_pdfs:
-            with open(PASTA_ARQUIVOS / pdf.name, 'wb') as f:
-                f.write(pdf.read())
+            if (pdf.name, pdf.size) in removidos:
+                continue  # Removido pelo usuário, mas ainda listado no upload
+            destino = PASTA_ARQUIVOS / pdf.name
+            conteudo = pdf.getvalue()
+            if not destino.exists() or destino.stat().st_size != len(conteudo) or destino.read_bytes() != conteudo:
+                with open(destino, 'wb') as f:
+                    f.write(conteudo)
+
+    # Remoção de PDFs; os vetores correspondentes saem do índice na próxima atualização
+    pdfs_salvos = sorted(arquivo.name for arquivo in PASTA_ARQUIVOS.glob('*.pdf'))
+    pdfs_remover = st.multiselect('PDFs indexados', pdfs_salvos, placeholder='Selecione PDFs para remover')
+    if pdfs_remover and st.button('Remover PDFs selecionados', use_container_width=True):
+        for nome in pdfs_remover:
+            arquivo = PASTA_ARQUIVOS / nome
+            removidos.add((nome, arquivo.stat().st_size))
+            arquivo.unlink(missing_ok=True)
+        st.rerun()
     
     # Botão para inicializar ou atualizar o ChatBot
     label_botao = 'Inicializar AmbiChats' if 'chain' not in st.session_state else 'Atualizar AmbiChats'
@@ -29,9 +46,30 @@ def sidebar():
             st.error('Adicione arquivos .pdf para inicializar o chatbot')
         else:
             st.success('Inicializando o AmbiChats...')
-            cria_chain_conversa()
+            barra = st.progress(0.0, text='Verificando os PDFs...')
+
+            def progresso(feitos, total, nome):
+                barra.progress(feitos / total, text=f'Indexado {nome} ({feitos}/{total})')
+
+            cria_chain_conversa(progresso)
             st.rerun()
 
+    # Situação dos caches de embeddings e de respostas
+    with st.expander('Desempenho dos caches'):
+        st.caption('Embeddings')
+        st.json(estatisticas_embeddings(), expanded=False)
+        st.caption('Respostas')
+        st.json(cache_respostas().estatisticas(), expanded=False)
+
+def exibe_fontes(chat, fontes):
+    """Exibe, em um expansor do balão, os trechos usados na resposta."""
+    if fontes:
+        with chat.expander('Fontes'):
+            for documento in fontes:
+                pagina = documento.metadata.get('page')
+                st.caption(f"{documento.metadata.get('source')}" + (f", página {pagina + 1}" if pagina is not None else ''))
+                st.text(documento.page_content[:300])
+
 def chat_window():
     """Função para a janela de chat onde os usuários interagem com o ChatBot."""
     st.header('🤖 Bem-vindo a AmbiChats', divider=True)
@@ -39,18 +77,18 @@ def chat_window():
     if 'chain' not in st.session_state:
         st.error('Faça o upload de PDFs para começar!')
         st.stop()
+    # Com a cadeia criada, o LangChain já foi carregado (ver utils)
+    from modelos_chat import ExibeTokens
     
-    chain = st.session_state['chain']
-    memory = chain.memory
-
-    # Carrega mensagens anteriores
-    mensagens = memory.load_memory_variables({})['chat_history']
+    # Mensagens exibidas (a memória da cadeia pode ter resumido as mais antigas)
+    mensagens = st.session_state.setdefault('mensagens', [])
     container = st.container()
     
     # Exibe mensagens anteriores
     for mensagem in mensagens:
-        chat = container.chat_message(mensagem.type)
-        chat.markdown(mensagem.content)
+        chat = container.chat_message(mensagem['tipo'])
+        chat.markdown(mensagem['conteudo'])
+        exibe_fontes(chat, mensagem.get('fontes'))
 
     # Entrada para nova mensagem
     nova_mensagem = st.chat_input('Converse com seus documentos...')
@@ -58,17 +96,44 @@ def chat_window():
         chat = container.chat_message('human')
         chat.markdown(nova_mensagem)
         chat = container.chat_message('ai')
-        chat.markdown('Gerando resposta...')
 
-        resposta = chain.invoke({'question': nova_mensagem})
+        # Os tokens aparecem no balão à medida que são gerados
+        saida = chat.empty()
+        saida.markdown('▌')
+        exibe_tokens = ExibeTokens(saida)
+        resposta = responde_pergunta(nova_mensagem, callbacks=[exibe_tokens])
+        saida.markdown(resposta['answer'])
         st.session_state['ultima_resposta'] = resposta
-        st.rerun()
+
+        # Fontes usadas na resposta
+        exibe_fontes(chat, resposta.get('source_documents'))
+        mensagens.append({'tipo': 'human', 'conteudo': nova_mensagem})
+        mensagens.append({'tipo': 'ai', 'conteudo': resposta['answer'], 'fontes': resposta.get('source_documents')})
+
+        # Tempo até o primeiro token, tempo total e tamanho do prompt da resposta
+        tempo_total = time.perf_counter() - exibe_tokens.inicio
+        tempos = {
+            'primeiro_token': exibe_tokens.tempo_primeiro_token,
+            'total': tempo_total,
+            'tokens_prompt': resposta['tokens_prompt']
+        }
+        st.session_state.setdefault('tempos_resposta', []).append(tempos)
+        if resposta['cache']:
+            chat.caption(f"Resposta reaproveitada do cache em {tempo_total:.2f} s")
+        elif exibe_tokens.tempo_primeiro_token is not None:
+            chat.caption(
+                f"Primeiro token em {exibe_tokens.tempo_primeiro_token:.2f} s; resposta completa em {tempo_total:.2f} s; "
+                f"prompt com {resposta['tokens_prompt']} tokens"
+            )
 
 def main():
     """Função principal que executa a aplicação Streamlit."""
+    inicia_rerun('ChatPDF')
     with st.sidebar:
         sidebar()
     chat_window()
+    # Depois da resposta, para incluir a recuperação e as chamadas aos modelos
+    painel_instrumentacao()
 
 if __name__ == '__main__':
     main()
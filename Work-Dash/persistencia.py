@@ -0,0 +1,241 @@
+import atexit
+import math
+import re
+import threading
+from pathlib import Path
+import pandas as pd
+from carregar_dados import (ARQUIVO_PADRAO, assinatura_arquivo, grava_abas, ler_aba,
+                            ler_abas_originais, trava_arquivo)
+from historico import (ABA_HISTORICO, descarta_eventos_compactados,
+                       historico_com_eventos, separa_eventos_pendentes)
+from configs import get_config
+
+ABA_CONTRATOS = 'Contratos'
+
+# Estado compartilhado por todas as sessões do processo, por planilha
+_OPERACOES_PENDENTES = {}
+# Gravação em andamento e última gravação concluída: (assinatura da planilha sobre a
+# qual as operações foram aplicadas, operações)
+_OPERACOES_EM_GRAVACAO = {}
+_ULTIMAS_GRAVACOES = {}
+_TEMPORIZADORES = {}
+# Janela de agrupamento configurada (get_config) na última operação de cada planilha;
+# as novas tentativas rodam no temporizador, fora da sessão, e a reaproveitam
+_JANELAS = {}
+_ULTIMOS_ERROS = {}
+_TRAVA_PENDENCIAS = threading.Lock()
+
+# Número com separador de milhar e sem casas decimais, como '1.234' ou '12.345.678'
+_MILHAR = re.compile(r'-?\d{1,3}(\.\d{3})+')
+_DATA_ISO = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+def _numero(texto):
+    """Converte um número digitado ('1.234,50', '1234,5', '1.234' ou '1234.5') para float.
+
+    Com vírgula, o número segue o formato brasileiro: os pontos são
+    separadores de milhar. Sem vírgula, o ponto só é tratado como milhar
+    quando separa grupos de três dígitos.
+    """
+    texto = texto.strip().removeprefix('R$').strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    elif _MILHAR.fullmatch(texto):
+        texto = texto.replace('.', '')
+    valor = float(texto)
+    if not math.isfinite(valor):
+        raise ValueError(texto)
+    return valor
+
+def _data(texto):
+    """Converte uma data digitada: dia/mês/ano ou ISO (ano-mês-dia)."""
+    texto = texto.strip()
+    if _DATA_ISO.match(texto):
+        return pd.to_datetime(texto, format='ISO8601')
+    return pd.to_datetime(texto, dayfirst=True)
+
+def converte_linha(linha, df):
+    """Converte os valores digitados (texto) para os tipos das colunas numéricas e de data.
+
+    Args:
+        linha (dict): Coluna -> valor digitado.
+        df (pd.DataFrame): Contratos, cujos tipos de coluna são seguidos.
+
+    Returns:
+        dict: A linha com números e datas convertidos.
+
+    Raises:
+        ValueError: Se algum valor não puder ser convertido; a mensagem
+            lista as colunas e os valores recusados.
+    """
+    convertida = dict(linha)
+    invalidos = []
+    for col, valor in linha.items():
+        if col not in df.columns or not isinstance(valor, str):
+            continue
+        try:
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+                convertida[col] = _numero(valor)
+            elif pd.api.types.is_datetime64_any_dtype(df[col]):
+                convertida[col] = _data(valor)
+        except (ValueError, TypeError, OverflowError):
+            invalidos.append(f"{col} ('{valor}')")
+    if invalidos:
+        raise ValueError(f"Valores inválidos: {'; '.join(invalidos)}")
+    return convertida
+
+def _aplica_operacoes(df, operacoes):
+    """Aplica inclusões e exclusões, na ordem em que foram feitas.
+
+    A linha incluída pela operação na posição i recebe o rótulo
+    (maior rótulo de `df`) + 1 + i; assim os rótulos não mudam de uma
+    execução para outra (ver indice_contratos.IndiceContratos).
+
+    Serve tanto para os contratos tipados das sessões quanto para a aba
+    como gravada no Excel; por isso o contrato e o sistema da exclusão são
+    comparados como texto (a planilha pode guardar o número como inteiro).
+    """
+    inicio = int(df.index.max()) + 1 if len(df) else 0
+    for posicao, (tipo, dados) in enumerate(operacoes):
+        if tipo == 'inclusao':
+            nova = pd.DataFrame([dados])
+            nova.index = [inicio + posicao]
+            df = pd.concat([df, nova])
+        else:
+            contrato, sistema = dados
+            mask = (df['CONTRATO Nº'].astype(str) == str(contrato)) & (df['SISTEMA'].astype(str) == str(sistema))
+            df = df[~mask]
+    return df
+
+def _inicia_temporizador(file_path, janela):
+    """Agenda a gravação, se ainda não houver uma agendada (chamar com a trava)."""
+    # Operações que chegam durante a janela entram na mesma gravação
+    if file_path not in _TEMPORIZADORES:
+        temporizador = threading.Timer(janela, grava_pendencias, args=(file_path,))
+        temporizador.daemon = True
+        _TEMPORIZADORES[file_path] = temporizador
+        temporizador.start()
+
+def _agenda(file_path, operacao):
+    """Enfileira a operação e agenda a gravação ao fim da janela de agrupamento."""
+    file_path = Path(file_path).resolve()
+    janela = get_config('persistencia_janela_segundos')
+    with _TRAVA_PENDENCIAS:
+        _OPERACOES_PENDENTES.setdefault(file_path, []).append(operacao)
+        _JANELAS[file_path] = janela
+        _inicia_temporizador(file_path, janela)
+
+def agenda_inclusao(linha, file_path=ARQUIVO_PADRAO):
+    """Agenda a inclusão de um contrato (dicionário coluna -> valor).
+
+    Os valores digitados são convertidos antes de entrar na fila (ver
+    converte_linha); a linha com valores inválidos é recusada com
+    ValueError e nada é agendado.
+    """
+    linha = converte_linha(linha, ler_aba(file_path, ABA_CONTRATOS))
+    _agenda(file_path, ('inclusao', linha))
+
+def agenda_exclusao(contrato, sistema, file_path=ARQUIVO_PADRAO):
+    """Agenda a exclusão das linhas com o contrato e o sistema informados."""
+    _agenda(file_path, ('exclusao', (contrato, sistema)))
+
+def operacoes_pendentes(file_path=ARQUIVO_PADRAO, assinatura=None):
+    """Retorna as operações que faltam na planilha lida, na ordem em que foram feitas.
+
+    As operações de uma gravação (em andamento ou já concluída) só entram
+    quando `assinatura` é a da planilha sobre a qual foram aplicadas: uma
+    leitura feita depois da troca do arquivo já as contém e não deve
+    recebê-las de novo.
+
+    Args:
+        file_path (Path): Planilha.
+        assinatura (tuple): Assinatura (ver carregar_dados.assinatura_arquivo) da
+            leitura que receberá as operações; por padrão, a do arquivo atual.
+    """
+    file_path = Path(file_path).resolve()
+    if assinatura is None:
+        assinatura = assinatura_arquivo(file_path)
+    with _TRAVA_PENDENCIAS:
+        operacoes = []
+        for gravacoes in (_ULTIMAS_GRAVACOES, _OPERACOES_EM_GRAVACAO):
+            base, gravadas = gravacoes.get(file_path, (None, []))
+            if base == assinatura:
+                operacoes += gravadas
+        return operacoes + _OPERACOES_PENDENTES.get(file_path, [])
+
+def aplica_pendencias(df, file_path=ARQUIVO_PADRAO, operacoes=None, assinatura=None):
+    """Retorna o DataFrame com as operações que faltam nele aplicadas (ver operacoes_pendentes)."""
+    if operacoes is None:
+        operacoes = operacoes_pendentes(file_path, assinatura)
+    return _aplica_operacoes(df, operacoes) if operacoes else df
+
+def ultimo_erro(file_path=ARQUIVO_PADRAO):
+    """Retorna a mensagem da última gravação que falhou, ou None."""
+    with _TRAVA_PENDENCIAS:
+        return _ULTIMOS_ERROS.get(Path(file_path).resolve())
+
+def grava_pendencias(file_path=ARQUIVO_PADRAO):
+    """Grava as operações pendentes e o histórico em uma única abertura da planilha.
+
+    As operações são aplicadas sobre o conteúdo atual do arquivo, lido com
+    a trava de gravação, e não sobre a cópia de uma sessão; assim, sessões
+    concorrentes não sobrescrevem as alterações umas das outras. A aba é
+    lida como está gravada (ver carregar_dados.ler_abas_originais), e não
+    com os tipos do esquema: as linhas não alteradas são regravadas com os
+    mesmos valores, e só a linha incluída, já convertida em agenda_inclusao,
+    traz números e datas novos.
+
+    Returns:
+        int: Quantidade de operações gravadas.
+    """
+    file_path = Path(file_path).resolve()
+    operacoes = []
+    try:
+        with trava_arquivo(file_path):
+            with _TRAVA_PENDENCIAS:
+                _TEMPORIZADORES.pop(file_path, None)
+                operacoes = _OPERACOES_PENDENTES.pop(file_path, [])
+                # Com a trava do arquivo, a assinatura é a da planilha que será alterada
+                _OPERACOES_EM_GRAVACAO[file_path] = (assinatura_arquivo(file_path), operacoes)
+
+            eventos = separa_eventos_pendentes(file_path)
+            # As duas abas são lidas como gravadas, em uma única abertura da planilha
+            originais = ler_abas_originais(
+                file_path, [ABA_CONTRATOS] * bool(operacoes) + [ABA_HISTORICO] * bool(eventos)
+            )
+            abas = {}
+            if operacoes:
+                abas[ABA_CONTRATOS] = _aplica_operacoes(originais[ABA_CONTRATOS], operacoes)
+            if eventos:
+                abas[ABA_HISTORICO] = historico_com_eventos(file_path, eventos, originais[ABA_HISTORICO])
+            if abas:
+                grava_abas(file_path, abas, alteracoes=operacoes)
+            descarta_eventos_compactados(file_path)
+    except Exception as e:
+        # Devolve as operações à fila e tenta novamente na próxima janela
+        with _TRAVA_PENDENCIAS:
+            _OPERACOES_EM_GRAVACAO.pop(file_path, None)
+            _OPERACOES_PENDENTES[file_path] = operacoes + _OPERACOES_PENDENTES.get(file_path, [])
+            _ULTIMOS_ERROS[file_path] = str(e)
+            if operacoes:
+                janela = _JANELAS.get(file_path)
+                _inicia_temporizador(file_path, janela if janela is not None else get_config('persistencia_janela_segundos'))
+        return 0
+
+    with _TRAVA_PENDENCIAS:
+        # Mantida até a próxima gravação: leituras anteriores à troca ainda precisam dela
+        gravacao = _OPERACOES_EM_GRAVACAO.pop(file_path)
+        if operacoes:
+            _ULTIMAS_GRAVACOES[file_path] = gravacao
+        _ULTIMOS_ERROS.pop(file_path, None)
+    return len(operacoes)
+
+@atexit.register
+def _grava_tudo_ao_sair():
+    """Grava o que estiver pendente quando o processo termina."""
+    with _TRAVA_PENDENCIAS:
+        # Inclui as gravações em andamento, para aguardar que terminem
+        pendentes = set(_OPERACOES_PENDENTES) | set(_OPERACOES_EM_GRAVACAO)
+        for temporizador in _TEMPORIZADORES.values():
+            temporizador.cancel()
+    for file_path in pendentes:
+        grava_pendencias(file_path)
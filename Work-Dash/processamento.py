@@ -0,0 +1,94 @@
+import pandas as pd
+from cache_lru import CacheLRU
+from instrumentacao import instrumenta
+
+MESES = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO',
+         'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
+
+# Caches compartilhados por todas as sessões do processo
+_CACHE_AGRUPADOS = CacheLRU(tamanho_maximo=8)
+_CACHE_FILTRADOS = CacheLRU(tamanho_maximo=64)
+
+@instrumenta()
+def process_data(df):
+    """Processa os dados agrupando por contrato e somando valores relevantes."""
+    # Com vários anos, o mesmo contrato aparece uma vez por ano
+    grouped_df = df.groupby(['ANO', 'CONTRATO Nº']).agg({
+        'EMPRESA': 'first',
+        'SISTEMA': 'first',
+        'MÊS': 'first',
+        'ÍNDICE': 'first',
+        'VALOR PAGO': 'sum',
+        'VALOR REAJUSTADO': 'sum',
+        'PEDIDO/ORDEM DE COMPRAS': 'first',
+        'STATUS / AÇÃO': 'first',
+        'DIFERENÇA DE VALOR DE CONTRATO': 'sum'
+    }).reset_index()
+
+    value_columns = [
+        'VALOR PAGO',
+        'VALOR REAJUSTADO',
+        'DIFERENÇA DE VALOR DE CONTRATO'
+    ]
+
+    for col in value_columns:
+        grouped_df[col] = grouped_df[col].astype(float)
+
+    return grouped_df
+
+@instrumenta()
+def adiciona_colunas_derivadas(grouped_df):
+    """Calcula, uma única vez, as colunas usadas pelos gráficos.
+
+    - 'DIFERENÇA': valor reajustado menos valor pago;
+    - 'MÊS': categoria ordenada pelo calendário. Valores fora da lista de
+      meses (por exemplo, 'Outubro') são mantidos como categorias extras,
+      depois de dezembro, para não alterar os filtros.
+    """
+    extras = sorted(set(grouped_df['MÊS'].dropna()) - set(MESES))
+    return grouped_df.assign(**{
+        'DIFERENÇA': grouped_df['VALOR REAJUSTADO'] - grouped_df['VALOR PAGO'],
+        'MÊS': pd.Categorical(grouped_df['MÊS'], categories=MESES + extras, ordered=True)
+    })
+
+@instrumenta()
+def filter_data(grouped_df, selected_status, selected_months):
+    """Filtra os contratos agrupados pelos status e meses selecionados."""
+    return grouped_df[
+        (grouped_df['STATUS / AÇÃO'].isin(selected_status)) &
+        (grouped_df['MÊS'].isin(selected_months))
+    ]
+
+def contratos_agrupados(versao, carrega):
+    """Retorna os contratos agrupados (com as colunas derivadas) da versão,
+    reaproveitando o agrupamento em cache.
+
+    Args:
+        versao (tuple): Versão dos dados (ver carregar_dados.versao_contratos).
+        carrega (callable): Carrega os contratos brutos; só é chamada em caso de falha no cache.
+
+    Returns:
+        pd.DataFrame: Cópia rasa do agrupamento em cache.
+    """
+    return _CACHE_AGRUPADOS.obtem(
+        versao, lambda: adiciona_colunas_derivadas(process_data(carrega()))
+    ).copy(deep=False)
+
+def chave_selecao(versao, selected_status, selected_months):
+    """Identifica a visão filtrada: versão dos dados mais status e meses selecionados."""
+    return (versao, frozenset(selected_status), frozenset(selected_months))
+
+def contratos_filtrados(versao, grouped_df, selected_status, selected_months):
+    """Retorna a visão filtrada, reaproveitando o resultado para a mesma seleção."""
+    chave = chave_selecao(versao, selected_status, selected_months)
+    filtrado = _CACHE_FILTRADOS.obtem(
+        chave, lambda: filter_data(grouped_df, selected_status, selected_months)
+    )
+    return filtrado.copy(deep=False)
+
+def estatisticas_cache():
+    """Retorna as estatísticas dos caches de agrupamento e de filtros."""
+    return {
+        'agrupados': _CACHE_AGRUPADOS.estatisticas(),
+        'filtrados': _CACHE_FILTRADOS.estatisticas()
+    }
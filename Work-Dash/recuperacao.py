@@ -0,0 +1,158 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+
+# Números de contrato, leis e siglas ficam inteiros ('14.133/2021', 'ti-04') e também em partes
+_PADRAO_TERMO = re.compile(r'\w+(?:[./-]\w+)*')
+_PADRAO_PARTE = re.compile(r'[^\W_]+')
+# Palavras muito frequentes: não ajudam a ordenar e teriam as maiores listas de postagens
+PALAVRAS_VAZIAS = frozenset(
+    'a ao aos as com como da das de do dos e em na nas no nos o os ou para pela pelas pelo '
+    'pelos por que se sem sua suas seu seus um uma the of and to in'.split()
+)
+
+def tokeniza(texto: str) -> list:
+    """Termos do texto para o BM25: minúsculas, sem acentos e sem palavras vazias."""
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    termos = []
+    for termo in _PADRAO_TERMO.findall(texto):
+        partes = _PADRAO_PARTE.findall(termo)
+        if len(partes) > 1:
+            termos.append(termo)
+        termos.extend(parte for parte in partes if parte not in PALAVRAS_VAZIAS)
+    return termos
+
+class IndiceBM25:
+    """Índice invertido com ordenação BM25 sobre os trechos do ChatPDF.
+
+    Os documentos são identificados pelos mesmos ids do docstore do FAISS
+    e podem ser incluídos e removidos um a um. A busca percorre apenas as
+    listas de postagens dos termos da consulta.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postagens = {}
+        self._termos = {}
+        self._comprimentos = {}
+        self._comprimento_total = 0
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._termos)
+
+    def ids(self) -> set:
+        with self._trava:
+            return set(self._termos)
+
+    def adiciona(self, id_: str, texto: str) -> None:
+        """Indexa um documento (substitui o anterior com o mesmo id)."""
+        self.remove(id_)
+        frequencias = Counter(tokeniza(texto))
+        with self._trava:
+            self._termos[id_] = frequencias
+            self._comprimentos[id_] = sum(frequencias.values())
+            self._comprimento_total += self._comprimentos[id_]
+            for termo, frequencia in frequencias.items():
+                self._postagens.setdefault(termo, {})[id_] = frequencia
+
+    def remove(self, id_: str) -> None:
+        """Retira um documento do índice, se existir."""
+        with self._trava:
+            frequencias = self._termos.pop(id_, None)
+            if frequencias is None:
+                return
+            self._comprimento_total -= self._comprimentos.pop(id_)
+            for termo in frequencias:
+                postagens = self._postagens[termo]
+                del postagens[id_]
+                if not postagens:
+                    del self._postagens[termo]
+
+    def copia(self) -> 'IndiceBM25':
+        """Cópia do índice que pode ser atualizada sem afetar as buscas neste."""
+        copia = IndiceBM25(k1=self.k1, b=self.b)
+        with self._trava:
+            # As frequências de cada documento não mudam depois de indexadas e são compartilhadas
+            copia._postagens = {termo: dict(postagens) for termo, postagens in self._postagens.items()}
+            copia._termos = dict(self._termos)
+            copia._comprimentos = dict(self._comprimentos)
+            copia._comprimento_total = self._comprimento_total
+        return copia
+
+    def sincroniza(self, docstore, ids) -> None:
+        """Deixa no índice exatamente os documentos `ids`, lendo os novos do docstore."""
+        ids = set(ids)
+        atuais = self.ids()
+        for id_ in atuais - ids:
+            self.remove(id_)
+        for id_ in ids - atuais:
+            self.adiciona(id_, docstore.search(id_).page_content)
+
+    def busca(self, consulta: str, k: int) -> list:
+        """Retorna até k pares (id, pontuação) em ordem decrescente de pontuação."""
+        termos = Counter(tokeniza(consulta))
+        with self._trava:
+            total = len(self._termos)
+            if not total or not termos:
+                return []
+            media = self._comprimento_total / total
+            pontuacoes = {}
+            for termo, repeticoes in termos.items():
+                postagens = self._postagens.get(termo)
+                if not postagens:
+                    continue
+                idf = math.log(1 + (total - len(postagens) + 0.5) / (len(postagens) + 0.5))
+                for id_, frequencia in postagens.items():
+                    normalizacao = self.k1 * (1 - self.b + self.b * self._comprimentos[id_] / media)
+                    pontuacoes[id_] = pontuacoes.get(id_, 0.0) + repeticoes * idf * (
+                        frequencia * (self.k1 + 1) / (frequencia + normalizacao)
+                    )
+        return heapq.nlargest(k, pontuacoes.items(), key=lambda item: item[1])
+
+def funde_rrf(rankings: list, c: int = 60) -> list:
+    """Reciprocal rank fusion: ids ordenados pela soma de 1 / (c + posição) em cada ranking."""
+    pontuacoes = {}
+    for ranking in rankings:
+        for posicao, id_ in enumerate(ranking, start=1):
+            pontuacoes[id_] = pontuacoes.get(id_, 0.0) + 1 / (c + posicao)
+    return sorted(pontuacoes, key=pontuacoes.get, reverse=True)
+
+class RecuperadorHibrido(BaseRetriever):
+    """Recuperador que combina a busca densa do FAISS com o BM25.
+
+    Cada busca traz `fetch_k` candidatos por similaridade dos embeddings e
+    `fetch_k` pelo BM25; os dois rankings são fundidos por reciprocal rank
+    fusion e os k primeiros são devolvidos. Termos exatos (números de
+    contrato, leis, siglas) entram pelo BM25 mesmo quando os embeddings não
+    os aproximam da consulta.
+
+    O vector store e o índice BM25 devem ser um par fixo, que ninguém
+    altera durante as buscas (ver utils.indice_bm25): os ids do BM25 são
+    procurados no docstore deste vector store.
+    """
+
+    vector_store: Any
+    indice_bm25: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_c: int = 60
+
+    def busca_densa(self, query: str) -> list:
+        """Ids dos `fetch_k` trechos mais próximos da consulta no índice FAISS."""
+        vetor = np.asarray([self.vector_store.embeddings.embed_query(query)], dtype=np.float32)
+        _, posicoes = self.vector_store.index.search(vetor, self.fetch_k)
+        return [self.vector_store.index_to_docstore_id[posicao] for posicao in posicoes[0] if posicao != -1]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        lexicos = [id_ for id_, _ in self.indice_bm25.busca(query, self.fetch_k)]
+        fundidos = funde_rrf([self.busca_densa(query), lexicos], self.rrf_c)
+        return [self.vector_store.docstore.search(id_) for id_ in fundidos[:self.k]]
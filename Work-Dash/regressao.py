@@ -0,0 +1,239 @@
+import threading
+import pandas as pd
+from cache_lru import CacheLRU
+from carregar_dados import registra_observador_gravacao
+from processamento import process_data
+
+COLUNA_STATUS = 'STATUS / AÇÃO'
+COLUNA_MES = 'MÊS'
+COLUNA_X = 'VALOR PAGO'
+COLUNA_Y = 'DIFERENÇA'
+
+# Modelos por versão dos dados, compartilhados entre sessões
+_CACHE_MODELOS = CacheLRU(tamanho_maximo=8)
+
+class EstatisticasOLS:
+    """Estatísticas suficientes de uma regressão linear simples (y = a * x + b).
+
+    Guarda a contagem, as médias e as somas centradas (Sxx e Sxy). Somas
+    centradas evitam o cancelamento numérico de sum(x²) - sum(x)² / n com
+    valores em reais.
+    """
+
+    def __init__(self, n=0, media_x=0.0, media_y=0.0, sxx=0.0, sxy=0.0):
+        self.n = n
+        self.media_x = media_x
+        self.media_y = media_y
+        self.sxx = sxx
+        self.sxy = sxy
+
+    def combina(self, outra):
+        """Retorna as estatísticas da união das duas partições."""
+        n = self.n + outra.n
+        if n == 0:
+            return EstatisticasOLS()
+        dx = outra.media_x - self.media_x
+        dy = outra.media_y - self.media_y
+        peso = self.n * outra.n / n
+        return EstatisticasOLS(
+            n,
+            self.media_x + dx * outra.n / n,
+            self.media_y + dy * outra.n / n,
+            self.sxx + outra.sxx + dx * dx * peso,
+            self.sxy + outra.sxy + dx * dy * peso
+        )
+
+    def adiciona(self, x, y):
+        """Inclui um ponto em O(1)."""
+        combinada = self.combina(EstatisticasOLS(1, x, y))
+        self.__dict__.update(combinada.__dict__)
+
+    def remove(self, x, y):
+        """Retira um ponto incluído anteriormente, em O(1)."""
+        n = self.n - 1
+        if n <= 0:
+            self.__dict__.update(EstatisticasOLS().__dict__)
+            return
+        media_x = (self.n * self.media_x - x) / n
+        media_y = (self.n * self.media_y - y) / n
+        peso = n / self.n
+        self.sxx -= (x - media_x) ** 2 * peso
+        self.sxy -= (x - media_x) * (y - media_y) * peso
+        self.n, self.media_x, self.media_y = n, media_x, media_y
+
+    def coeficientes(self):
+        """Retorna (inclinação, intercepto) pelos mínimos quadrados.
+
+        Como no LinearRegression, se x não varia a inclinação é zero e o
+        intercepto é a média de y.
+        """
+        if self.n == 0:
+            return 0.0, 0.0
+        if self.sxx <= 1e-12 * max(1.0, self.media_x ** 2) * self.n:
+            return 0.0, self.media_y
+        inclinacao = self.sxy / self.sxx
+        return inclinacao, self.media_y - inclinacao * self.media_x
+
+class ModeloRegressao:
+    """Regressão de 'DIFERENÇA' sobre 'VALOR PAGO' particionada por (status, mês).
+
+    Cada célula guarda as suas estatísticas suficientes; o ajuste de uma
+    seleção de filtros combina apenas as células selecionadas, sem passar
+    pelos contratos. Incluir, alterar ou remover um contrato custa O(1).
+    """
+
+    def __init__(self, grouped_df):
+        """Monta as células em uma única passada vetorizada.
+
+        Args:
+            grouped_df (pd.DataFrame): Contratos agrupados, com 'DIFERENÇA'
+                (ver processamento.adiciona_colunas_derivadas).
+        """
+        self._trava = threading.Lock()
+        self._celulas = {}
+        self._contratos = {}
+
+        df = pd.DataFrame({
+            COLUNA_STATUS: grouped_df[COLUNA_STATUS].astype(object),
+            COLUNA_MES: grouped_df[COLUNA_MES].astype(object),
+            'x': grouped_df[COLUNA_X].astype(float),
+            'y': grouped_df[COLUNA_Y].astype(float)
+        })
+        grupos = df.groupby([COLUNA_STATUS, COLUNA_MES], dropna=False)
+        dx = df['x'] - grupos['x'].transform('mean')
+        dy = df['y'] - grupos['y'].transform('mean')
+        celulas = df.assign(sxx=dx * dx, sxy=dx * dy).groupby(
+            [COLUNA_STATUS, COLUNA_MES], dropna=False
+        ).agg(n=('x', 'size'), media_x=('x', 'mean'), media_y=('y', 'mean'),
+              sxx=('sxx', 'sum'), sxy=('sxy', 'sum'))
+        for celula, linha in celulas.iterrows():
+            self._celulas[celula] = EstatisticasOLS(
+                int(linha['n']), linha['media_x'], linha['media_y'], linha['sxx'], linha['sxy']
+            )
+
+        chaves = zip(grouped_df['ANO'], grouped_df['CONTRATO Nº'])
+        celulas_linha = zip(df[COLUNA_STATUS], df[COLUNA_MES])
+        self._contratos = {
+            chave: (celula, x, y)
+            for chave, celula, x, y in zip(chaves, celulas_linha, df['x'], df['y'])
+        }
+
+    def remove_contrato(self, chave):
+        """Retira o contrato (ANO, CONTRATO Nº) do modelo, se existir."""
+        with self._trava:
+            anterior = self._contratos.pop(chave, None)
+            if anterior is not None:
+                celula, x, y = anterior
+                self._celulas[celula].remove(x, y)
+
+    def atualiza_contrato(self, chave, status, mes, x, y):
+        """Inclui o contrato (ANO, CONTRATO Nº) ou substitui os seus valores."""
+        self.remove_contrato(chave)
+        with self._trava:
+            celula = (status, mes)
+            self._celulas.setdefault(celula, EstatisticasOLS()).adiciona(float(x), float(y))
+            self._contratos[chave] = (celula, float(x), float(y))
+
+    def ajuste(self, selected_status=None, selected_months=None):
+        """Retorna (inclinação, intercepto) dos contratos nos status e meses selecionados.
+
+        A seleção segue a mesma regra de processamento.filter_data (isin).
+        """
+        with self._trava:
+            celulas = list(self._celulas.items())
+        if not celulas:
+            return 0.0, 0.0
+        status = pd.Series([celula[0] for celula, _ in celulas], dtype=object)
+        meses = pd.Series([celula[1] for celula, _ in celulas], dtype=object)
+        selecionadas = pd.Series(True, index=status.index)
+        if selected_status is not None:
+            selecionadas &= status.isin(selected_status)
+        if selected_months is not None:
+            selecionadas &= meses.isin(selected_months)
+
+        total = EstatisticasOLS()
+        for (_, estatisticas), selecionada in zip(celulas, selecionadas):
+            if selecionada:
+                total = total.combina(estatisticas)
+        return total.coeficientes()
+
+def modelo_em_cache(versao, grouped_df):
+    """Retorna o modelo da versão informada, montando-o apenas na primeira vez."""
+    return _CACHE_MODELOS.obtem(versao, lambda: ModeloRegressao(grouped_df))
+
+def estatisticas_modelos():
+    """Retorna acertos, falhas, descartes e o tamanho do cache de modelos."""
+    return _CACHE_MODELOS.estatisticas()
+
+def _contratos_alterados(alteracoes):
+    """Números dos contratos incluídos ou excluídos pelas operações da página de Dados."""
+    contratos = set()
+    # Sem a lista de operações não há como saber o que mudou
+    if alteracoes is None:
+        raise ValueError('Alterações desconhecidas')
+    for tipo, dados in alteracoes:
+        contratos.add(dados['CONTRATO Nº'] if tipo == 'inclusao' else dados[0])
+    return contratos
+
+def _contratos_novos(df_contratos, ano, alteracoes):
+    """Texto do contrato -> (contrato, linha agrupada, ou None se o contrato deixou de existir)."""
+    # Compara como texto: contratos incluídos chegam digitados na página de Dados
+    contratos = {str(contrato): contrato for contrato in _contratos_alterados(alteracoes)}
+    alterados = df_contratos['CONTRATO Nº'].astype(str).isin(contratos)
+    agrupados = process_data(df_contratos[alterados].assign(ANO=ano))
+    novos = {texto: (contrato, None) for texto, contrato in contratos.items()}
+    novos.update({
+        str(linha['CONTRATO Nº']): (linha['CONTRATO Nº'], linha)
+        for _, linha in agrupados.iterrows()
+    })
+    return novos
+
+def _atualiza_modelos(file_path, assinatura_anterior, assinatura_nova, abas, alteracoes):
+    """Observador de gravação: leva os modelos em cache para a nova versão da planilha.
+
+    Apenas os contratos alterados são recalculados; os modelos passam a ser
+    encontrados pela versão com a nova assinatura do arquivo. A planilha já
+    foi gravada quando o observador roda, então nenhuma falha é propagada:
+    o modelo que não puder ser atualizado é descartado e remontado na
+    próxima consulta.
+    """
+    if not file_path.stem.isdigit():
+        return
+    ano = int(file_path.stem)
+    afetados = [
+        (versao, modelo) for versao, modelo in _CACHE_MODELOS.itens()
+        if (ano, assinatura_anterior) in versao
+    ]
+    if not afetados:
+        return
+
+    df_contratos = abas.get('Contratos')
+    novos = {}
+    if df_contratos is not None:
+        try:
+            novos = _contratos_novos(df_contratos, ano, alteracoes)
+        except Exception:
+            # Alterações desconhecidas: não há como atualizar os modelos
+            novos = None
+
+    for versao, modelo in afetados:
+        try:
+            if novos is None:
+                raise ValueError('Alterações desconhecidas')
+            for contrato, linha in novos.values():
+                if linha is None:
+                    modelo.remove_contrato((ano, contrato))
+                else:
+                    modelo.atualiza_contrato(
+                        (ano, contrato), linha[COLUNA_STATUS], linha[COLUNA_MES], linha[COLUNA_X],
+                        linha['VALOR REAJUSTADO'] - linha[COLUNA_X]
+                    )
+            nova_versao = tuple(
+                (a, assinatura_nova if a == ano else assinatura) for a, assinatura in versao
+            )
+            _CACHE_MODELOS.troca_chave(versao, nova_versao)
+        except Exception:
+            # O modelo pode ter ficado atualizado pela metade
+            _CACHE_MODELOS.descarta(versao)
+
+registra_observador_gravacao(_atualiza_modelos)
@@ -0,0 +1,28 @@
+"""Vazão das etapas do Dashboard (ver benchmarks/dashboard.py) com o pytest-benchmark.
+
+Cada etapa roda uma vez para aquecimento e depois três vezes, em bases
+sintéticas de 10 mil a 10 milhões de linhas; a de 10 milhões é marcada
+como lenta. Para comparar com uma execução anterior:
+    python -m pytest tests/test_benchmark_dashboard.py --benchmark-autosave
+    python -m pytest tests/test_benchmark_dashboard.py --benchmark-compare --benchmark-compare-fail=min:50%
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from benchmarks.dashboard import ETAPAS, contratos, etapas
+
+TAMANHOS = [10_000, 100_000, 1_000_000, pytest.param(10_000_000, marks=pytest.mark.slow)]
+
+@pytest.fixture(scope='module', params=TAMANHOS, ids=lambda tamanho: f'{tamanho}_linhas')
+def etapas_da_base(request):
+    """Etapas medidas sobre a base sintética de cada tamanho, gerada uma vez por módulo."""
+    return request.param, etapas(contratos(request.param))
+
+@pytest.mark.parametrize('etapa', ETAPAS)
+def test_etapa(benchmark, etapas_da_base, etapa):
+    tamanho, lista = etapas_da_base
+    funcao, linhas = lista[etapa]
+    benchmark.group = f'{tamanho} linhas'
+    benchmark.extra_info['linhas'] = linhas
+    benchmark.pedantic(funcao, rounds=3, warmup_rounds=1)
@@ -0,0 +1,79 @@
+"""EmbeddingsEmCache com DeterministicFakeEmbedding: acertos, falhas, lotes e novas tentativas."""
+import numpy as np
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from cache_embeddings import EmbeddingsEmCache
+
+class ModeloContado(DeterministicFakeEmbedding):
+    """Modelo falso que registra as chamadas e falha nas `falhas` primeiras."""
+    chamadas: list = []
+    falhas: int = 0
+
+    def _talvez_falha(self):
+        if self.falhas:
+            self.falhas -= 1
+            raise ConnectionError('limite de requisições')
+
+    def embed_documents(self, texts):
+        self.chamadas.append(list(texts))
+        self._talvez_falha()
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.chamadas.append([text])
+        self._talvez_falha()
+        return super().embed_query(text)
+
+@pytest.fixture
+def cria_cache(tmp_path):
+    def cria(falhas=0, **kwargs):
+        modelo = ModeloContado(size=16, chamadas=[], falhas=falhas)
+        kwargs = dict(dict(tamanho_lote=2, concorrencia=2, tentativas=3, espera_inicial=0), **kwargs)
+        return modelo, EmbeddingsEmCache(modelo, 'fake:16', tmp_path / 'embeddings.sqlite3', **kwargs)
+    return cria
+
+def test_falhas_e_acertos(cria_cache):
+    modelo, cache = cria_cache()
+    textos = ['a', 'b', 'a', 'c']
+    primeira = cache.embed_documents(textos)
+    assert sorted(sum(modelo.chamadas, [])) == ['a', 'b', 'c']  # 'a' vai ao modelo uma só vez
+    assert cache.estatisticas()['falhas'] == 3 and cache.estatisticas()['acertos'] == 1
+
+    modelo.chamadas.clear()
+    assert cache.embed_documents(textos) == primeira
+    assert modelo.chamadas == []
+    assert cache.estatisticas()['acertos'] == 5
+
+    # Outra instância, sobre o mesmo arquivo, encontra os vetores gravados
+    modelo_novo, cache_novo = cria_cache()
+    assert cache_novo.embed_documents(['c']) == [primeira[3]]
+    assert modelo_novo.chamadas == []
+
+def test_mesmos_valores_do_cache_e_do_modelo(cria_cache):
+    modelo, cache = cria_cache()
+    esperado = np.asarray(modelo.embed_documents(['x']), dtype=np.float32).tolist()
+    assert cache.embed_documents(['x']) == esperado
+    assert cache.embed_documents(['x']) == esperado
+    consulta = np.asarray(modelo.embed_query('x'), dtype=np.float32).tolist()
+    assert cache.embed_query('x') == consulta
+    assert cache.embed_query('x') == consulta
+
+def test_lotes(cria_cache):
+    modelo, cache = cria_cache(tamanho_lote=3)
+    cache.embed_documents([f'texto {i}' for i in range(7)])
+    assert sorted(len(lote) for lote in modelo.chamadas) == [1, 3, 3]
+    assert cache.estatisticas()['lotes'] == 3
+    assert cache.estatisticas()['textos_embedados'] == 7
+
+def test_novas_tentativas(cria_cache):
+    modelo, cache = cria_cache(falhas=2)
+    assert len(cache.embed_documents(['a'])) == 1
+    assert cache.estatisticas()['retentativas'] == 2
+
+    modelo.falhas = 2
+    assert len(cache.embed_query('pergunta')) == 16
+    assert cache.estatisticas()['retentativas'] == 4
+
+    modelo.falhas = 3
+    with pytest.raises(ConnectionError):
+        cache.embed_query('outra pergunta')
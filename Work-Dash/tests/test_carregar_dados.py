@@ -0,0 +1,46 @@
+"""Leitura das planilhas: colunas com tipos mistos ganham um tipo único, igual no Excel e no sidecar."""
+import os
+import shutil
+from datetime import datetime
+import pandas as pd
+from carregar_dados import (PASTA_DATASETS, _normaliza_tipos, assinatura_arquivo, caminho_sidecar,
+                            carrega_contratos, concatena_particoes, ler_aba, limpar_cache,
+                            particoes_contratos, versao_contratos)
+
+def test_numeros_e_textos_continuam_texto():
+    df = _normaliza_tipos(pd.DataFrame({
+        'CÓDIGO': [500, '12/2024', None],
+        'PRAZO': [datetime(2024, 3, 5), '2024-04-01', None],
+    }))
+    assert df['CÓDIGO'].tolist()[:2] == ['500', '12/2024']
+    assert pd.api.types.is_datetime64_any_dtype(df['PRAZO'])
+    assert df['PRAZO'].tolist()[:2] == [pd.Timestamp('2024-03-05'), pd.Timestamp('2024-04-01')]
+
+def test_coluna_de_data_declarada_no_esquema():
+    df = _normaliza_tipos(pd.DataFrame({'INÍCIO': [45356, '05/03/2024'], 'CONTRATO Nº': [1, '2/2024']}), 'Contratos')
+    assert pd.api.types.is_datetime64_any_dtype(df['INÍCIO'])
+    assert df['CONTRATO Nº'].tolist() == ['1', '2/2024']
+
+def test_excel_e_sidecar_iguais(tmp_path):
+    caminho = tmp_path / 'mista.xlsx'
+    pd.DataFrame({'CÓDIGO': [500, '12/2024', 7]}).to_excel(caminho, index=False, sheet_name='Códigos')
+    limpar_cache()
+    do_excel = ler_aba(caminho, 'Códigos')
+    assert caminho_sidecar(caminho, 'Códigos').exists()
+    limpar_cache()
+    pd.testing.assert_frame_equal(ler_aba(caminho, 'Códigos'), do_excel)
+    assert do_excel['CÓDIGO'].tolist() == ['500', '12/2024', '7']
+
+def test_versao_das_particoes_lidas(tmp_path):
+    caminho = tmp_path / '2024.xlsx'
+    shutil.copy(PASTA_DATASETS / '2024.xlsx', caminho)
+    assinatura = assinatura_arquivo(caminho)
+    particoes = particoes_contratos([2024], tmp_path)
+    versao = versao_contratos(particoes)
+    assert versao == ((2024, assinatura),)
+    assert len(concatena_particoes(particoes)) == len(carrega_contratos([2024], tmp_path))
+
+    # Gravada depois da leitura, a planilha não muda a versão dos dados já lidos
+    os.utime(caminho, ns=(assinatura[0] + 10**9, assinatura[0] + 10**9))
+    assert versao_contratos(particoes) == versao
+    assert versao_contratos(particoes_contratos([2024], tmp_path)) == ((2024, assinatura_arquivo(caminho)),)
@@ -0,0 +1,29 @@
+"""Esquema das abas: só faltar uma coluna obrigatória é erro; valores inválidos viram avisos."""
+import pandas as pd
+import pytest
+from esquema import ESQUEMAS, aplica_esquema, avisos_esquema, estatisticas_esquema
+
+def _contratos(**colunas):
+    tipos = ESQUEMAS['Contratos']['colunas']
+    df = pd.DataFrame({
+        col: [1500.5, 200.0] if tipos[col] == 'valor' else ['x', 'y']
+        for col in ESQUEMAS['Contratos']['obrigatorias']
+    })
+    return df.assign(**colunas)
+
+def test_coluna_obrigatoria_faltando():
+    with pytest.raises(ValueError, match='VALOR PAGO'):
+        aplica_esquema(_contratos().drop(columns='VALOR PAGO'), 'Contratos')
+
+def test_valores_invalidos_viram_avisos():
+    df = aplica_esquema(_contratos(**{'VALOR PAGO': [1500.5, '-']}), 'Contratos', 'teste.xlsx')
+    assert df['VALOR PAGO'].iloc[0] == 1500.5 and pd.isna(df['VALOR PAGO'].iloc[1])
+    invalidos = estatisticas_esquema()['Contratos (teste.xlsx)']['valores_invalidos']
+    assert invalidos == {'VALOR PAGO': {'quantidade': 1, 'exemplos': ['-']}}
+    assert len(avisos_esquema(['teste.xlsx'])) == 1
+    assert avisos_esquema(['outro.xlsx']) == []
+
+def test_datas_dia_primeiro():
+    df = aplica_esquema(_contratos(**{'INÍCIO': ['05/03/2024', '2024-03-05']}), 'Contratos', 'datas.xlsx')
+    assert (df['INÍCIO'] == pd.Timestamp('2024-03-05')).all()
+    assert estatisticas_esquema()['Contratos (datas.xlsx)']['valores_invalidos'] == {}
@@ -0,0 +1,106 @@
+"""Indexação dos PDFs de pdfs/ com o backend de embeddings 'fake', sem acesso à rede."""
+import shutil
+import threading
+import pytest
+import configs
+import utils
+from ingestao import divide_pdf
+
+@pytest.fixture
+def indice_vazio(tmp_path, monkeypatch):
+    """Índices e cache de embeddings em uma pasta temporária, sem nada carregado no processo."""
+    if not any(utils.PASTA_ARQUIVOS.glob('*.pdf')):
+        pytest.skip('Nenhum PDF em pdfs/')
+    monkeypatch.setattr(configs, 'EMBEDDING_BACKEND', 'fake')
+    monkeypatch.setattr(utils, 'PASTA_INDICES', tmp_path / 'indices')
+    monkeypatch.setattr(utils, 'ARQUIVO_CACHE_EMBEDDINGS', tmp_path / 'indices' / 'embeddings.sqlite3')
+    for variavel in ('_VECTOR_STORES', '_TRAVAS_ATUALIZACAO', '_INDICES_BM25', '_EMBEDDINGS'):
+        monkeypatch.setattr(utils, variavel, {})
+    return tmp_path / 'indices'
+
+def test_indexa_pdfs(indice_vazio):
+    trechos = sum(len(divide_pdf(arquivo, configs.CHUNK_SIZE, configs.CHUNK_OVERLAP))
+                  for arquivo in utils.PASTA_ARQUIVOS.glob('*.pdf'))
+    vector_store = utils.carrega_vector_store()
+    assert vector_store.index.ntotal == trechos
+    assert (utils._pasta_versao(indice_vazio / utils.chave_indice()) / 'manifesto.json').exists()
+    assert vector_store.similarity_search('contrato', k=3)
+
+    # Sem PDFs alterados, o índice em memória é devolvido sem novos embeddings
+    estatisticas = utils.estatisticas_embeddings()
+    assert utils.carrega_vector_store() is vector_store
+    assert utils.estatisticas_embeddings() == estatisticas
+
+    # Em outro processo, o índice é lido do disco
+    utils._VECTOR_STORES.clear()
+    assert utils.carrega_vector_store().index.ntotal == trechos
+
+def test_atualizacao_nao_bloqueia_outras_sessoes(indice_vazio):
+    vector_store = utils.carrega_vector_store()
+    resultado = {}
+
+    def outra_sessao():
+        resultado['vector_store'] = utils.carrega_vector_store()
+        resultado['impressao'] = utils.impressao_corpus()
+        resultado['cache'] = utils.cache_respostas()
+
+    # Com uma atualização em andamento, quem já tem o índice atualizado não espera por ela
+    with utils._TRAVAS_ATUALIZACAO[utils.chave_indice()]:
+        sessao = threading.Thread(target=outra_sessao)
+        sessao.start()
+        sessao.join(timeout=30)
+        assert not sessao.is_alive()
+    assert resultado['vector_store'] is vector_store
+
+def test_atualizacao_em_copia(indice_vazio, tmp_path, monkeypatch):
+    pasta_pdfs = tmp_path / 'pdfs'
+    pasta_pdfs.mkdir()
+    pdf = next(utils.PASTA_ARQUIVOS.glob('*.pdf'))
+    shutil.copy(pdf, pasta_pdfs / 'a.pdf')
+    monkeypatch.setattr(utils, 'PASTA_ARQUIVOS', pasta_pdfs)
+    anterior = utils.carrega_vector_store()
+    trechos = anterior.index.ntotal
+    _, manifesto_anterior = utils.indice_publicado()
+    impressao_anterior = utils.impressao_corpus()
+    ids = dict(anterior.index_to_docstore_id)
+
+    # Um PDF novo gera outro índice; o publicado antes, em uso por outras sessões, não muda
+    shutil.copy(pdf, pasta_pdfs / 'b.pdf')
+    atual = utils.carrega_vector_store()
+    assert atual is not anterior
+    assert anterior.index.ntotal == trechos and anterior.index_to_docstore_id == ids
+    assert atual.index.ntotal == 2 * trechos
+    # A impressão do corpus (chave do cache de respostas) acompanha o índice publicado
+    assert utils.impressao_corpus() != impressao_anterior
+    assert utils.impressao_corpus(manifesto_anterior) == impressao_anterior
+
+    # Em disco, o arquivo de versão aponta para a nova, e só ela e a anterior são mantidas
+    pasta_indice = indice_vazio / utils.chave_indice()
+    versoes = sorted(pasta.name for pasta in pasta_indice.glob('v-*'))
+    assert len(versoes) == 2 and utils._pasta_versao(pasta_indice).name == versoes[-1]
+    (pasta_pdfs / 'a.pdf').unlink()
+    utils.carrega_vector_store()
+    assert len(list(pasta_indice.glob('v-*'))) == 2
+    utils._VECTOR_STORES.clear()
+    assert utils.carrega_vector_store().index.ntotal == trechos
+
+def test_recuperador_hibrido_em_copia(indice_vazio, tmp_path, monkeypatch):
+    monkeypatch.setattr(configs, 'RETRIEVAL_SEARCH_TYPE', 'hybrid')
+    pasta_pdfs = tmp_path / 'pdfs'
+    pasta_pdfs.mkdir()
+    pdf = next(utils.PASTA_ARQUIVOS.glob('*.pdf'))
+    shutil.copy(pdf, pasta_pdfs / 'a.pdf')
+    monkeypatch.setattr(utils, 'PASTA_ARQUIVOS', pasta_pdfs)
+    recuperador = utils.cria_recuperador(utils.carrega_vector_store())
+    ids = recuperador.indice_bm25.ids()
+
+    # Um índice novo ganha o seu próprio BM25; o par em uso pelo recuperador anterior não muda
+    shutil.copy(pdf, pasta_pdfs / 'b.pdf')
+    novo = utils.cria_recuperador(utils.carrega_vector_store())
+    assert novo.indice_bm25 is not recuperador.indice_bm25
+    assert recuperador.indice_bm25.ids() == ids
+    assert novo.indice_bm25.ids() == set(novo.vector_store.index_to_docstore_id.values())
+    assert utils.cria_recuperador(novo.vector_store).indice_bm25 is novo.indice_bm25
+
+    documentos = recuperador.invoke('liberalismo conservador')
+    assert documentos and all(documento.metadata['source'] == 'a.pdf' for documento in documentos)
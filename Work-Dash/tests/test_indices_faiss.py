@@ -0,0 +1,37 @@
+"""Conversão e remoção nos índices FAISS preservam os vetores exatos, inclusive no IVF-PQ."""
+import numpy as np
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores.faiss import FAISS
+from cache_embeddings import EmbeddingsEmCache
+from indices_faiss import converte_vector_store, remove_documentos, tipo_do_indice, vetores_do_indice
+
+PARAMETROS = {'minimo_vetores': 100, 'pq_m': 4, 'pq_bits': 4}
+
+@pytest.fixture
+def vector_store(tmp_path):
+    embeddings = EmbeddingsEmCache(DeterministicFakeEmbedding(size=16), 'fake:16', tmp_path / 'embeddings.sqlite3')
+    textos = [f'trecho {i}' for i in range(400)]
+    return FAISS.from_texts(textos, embeddings, ids=[str(i) for i in range(len(textos))])
+
+def _vetores_por_id(vector_store):
+    vetores = vetores_do_indice(vector_store)
+    return {vector_store.index_to_docstore_id[posicao]: vetor for posicao, vetor in enumerate(vetores)}
+
+@pytest.mark.parametrize('tipo', ['ivf_flat', 'hnsw', 'ivf_pq'])
+def test_vetores_exatos(vector_store, tipo):
+    originais = _vetores_por_id(vector_store)
+    assert converte_vector_store(vector_store, tipo, PARAMETROS)
+    assert tipo_do_indice(vector_store.index) == tipo
+
+    remove_documentos(vector_store, [str(i) for i in range(0, 400, 3)])
+    restantes = _vetores_por_id(vector_store)
+    assert vector_store.index.ntotal == len(restantes) == 266
+    for id_, vetor in restantes.items():
+        np.testing.assert_array_equal(vetor, originais[id_])
+
+    # De volta ao plano, os vetores não carregam o erro da quantização
+    converte_vector_store(vector_store, 'flat', PARAMETROS)
+    for id_, vetor in _vetores_por_id(vector_store).items():
+        np.testing.assert_array_equal(vetor, originais[id_])
+    assert vector_store.similarity_search('trecho 1', k=1)[0].page_content == 'trecho 1'
@@ -0,0 +1,27 @@
+"""Orçamentos de inicialização de benchmarks/inicializacao.py: tempos e imports antecipados.
+
+Cada caso roda em um processo novo. Em máquinas lentas, os orçamentos podem
+ser multiplicados pela variável de ambiente INICIALIZACAO_FATOR.
+"""
+import os
+import pytest
+from benchmarks.inicializacao import MODULOS, PAGINAS, _proibidos, mede_import, mede_pagina
+
+FATOR = float(os.getenv('INICIALIZACAO_FATOR', '1'))
+
+pytestmark = pytest.mark.slow
+
+@pytest.mark.parametrize('modulo', MODULOS)
+def test_import(modulo):
+    orcamento, proibidos = MODULOS[modulo]
+    total, pesados, modulos = mede_import(modulo)
+    assert _proibidos(modulos, proibidos) == []
+    assert total <= orcamento * FATOR, f'{modulo}: {total:.0f} ms; mais pesados: {pesados}'
+
+@pytest.mark.parametrize('pagina', PAGINAS)
+def test_primeira_renderizacao(pagina):
+    orcamento, proibidos = PAGINAS[pagina]
+    total, excecoes, modulos = mede_pagina(pagina, timeout=120)
+    assert excecoes == []
+    assert _proibidos(modulos, proibidos) == []
+    assert total <= orcamento * FATOR, f'{pagina}: {total:.0f} ms'
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from carregar_dados import anos_disponiveis, carrega_contratos
+from metricas import calcula_celulas, calculate_metrics, metricas_da_selecao
+from processamento import filter_data, process_data
+
+# As somas das células seguem outra ordem de soma que a do cálculo original;
+# as diferenças ficam no último dígito do ponto flutuante (menos de 1e-15 relativo
+# nas planilhas de exemplo), muito abaixo do centavo exibido.
+TOLERANCIA = dict(rel=1e-12, abs=1e-6)
+
+def calculate_metrics_original(df):
+    """calculate_metrics como era no Dashboard antes das células pré-agregadas."""
+    valor_previsto = df['VALOR REAJUSTADO'].sum()
+    valor_renovado = df[df['STATUS / AÇÃO'] == 'RENOVADO']['VALOR REAJUSTADO'].sum()
+    valor_em_processo = df[df['STATUS / AÇÃO'] == 'EM PROCESSO']['VALOR REAJUSTADO'].sum()
+    valor_cancelado = df[df['STATUS / AÇÃO'] == 'CANCELADO']['VALOR REAJUSTADO'].sum()
+
+    df_cancelado = df[df['STATUS / AÇÃO'] == 'CANCELADO']
+    diferenca_cancelado = (df_cancelado['VALOR REAJUSTADO'] - df_cancelado['VALOR PAGO']).sum()
+
+    df_renovado = df[df['STATUS / AÇÃO'] == 'RENOVADO']
+    diferenca_renovado = (df_renovado['VALOR REAJUSTADO'] - df_renovado['VALOR PAGO']).sum()
+
+    df_em_processo = df[df['STATUS / AÇÃO'] == 'EM PROCESSO']
+    diferenca_em_processo = (df_em_processo['VALOR REAJUSTADO'] - df_em_processo['VALOR PAGO']).sum()
+
+    total_contratos = len(df)
+    total_renovados = len(df_renovado)
+    percentual_renovacao = (total_renovados / total_contratos) * 100 if total_contratos > 0 else 0
+
+    return {
+        "valor_previsto": valor_previsto,
+        "valor_renovado": valor_renovado,
+        "valor_em_processo": valor_em_processo,
+        "valor_cancelado": valor_cancelado,
+        "diferenca_cancelado": diferenca_cancelado,
+        "diferenca_renovado": diferenca_renovado,
+        "diferenca_em_processo": diferenca_em_processo,
+        "percentual_renovacao": percentual_renovacao
+    }
+
+def _confere(esperado, obtido):
+    assert obtido.keys() == esperado.keys()
+    for nome, valor in esperado.items():
+        if nome == 'percentual_renovacao':
+            # Razão entre contagens inteiras: deve ser exatamente a mesma
+            assert obtido[nome] == valor
+        else:
+            assert obtido[nome] == pytest.approx(valor, **TOLERANCIA), nome
+
+@pytest.fixture(scope='module', params=['2024', 'todos os anos'])
+def agrupados(request):
+    anos = list(anos_disponiveis())
+    return process_data(carrega_contratos(anos[-1:] if request.param == '2024' else anos))
+
+def test_selecoes_aleatorias(agrupados):
+    celulas = calcula_celulas(agrupados)
+    status = agrupados['STATUS / AÇÃO'].unique().tolist()
+    meses = sorted(agrupados['MÊS'].unique())
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        selecao_status = [s for s in status if rng.random() < 0.6]
+        selecao_meses = [m for m in meses if rng.random() < 0.6]
+        _confere(
+            calculate_metrics_original(filter_data(agrupados, selecao_status, selecao_meses)),
+            metricas_da_selecao(celulas, selecao_status, selecao_meses)
+        )
+
+def test_selecao_completa_e_vazia(agrupados):
+    celulas = calcula_celulas(agrupados)
+    status = agrupados['STATUS / AÇÃO'].unique().tolist()
+    meses = sorted(agrupados['MÊS'].unique())
+    _confere(calculate_metrics_original(agrupados), metricas_da_selecao(celulas))
+    _confere(calculate_metrics_original(agrupados), metricas_da_selecao(celulas, status, meses))
+    _confere(calculate_metrics_original(filter_data(agrupados, [], meses)), metricas_da_selecao(celulas, [], meses))
+
+def test_calculate_metrics(agrupados):
+    _confere(calculate_metrics_original(agrupados), calculate_metrics(agrupados))
@@ -0,0 +1,114 @@
+"""Gravação em segundo plano das alterações da página de Dados (persistencia.grava_pendencias)."""
+import shutil
+import openpyxl
+import pandas as pd
+import pytest
+import configs
+import persistencia
+import carregar_dados
+from carregar_dados import PASTA_DATASETS, assinatura_arquivo, ler_aba
+from historico import compacta_historico, registra_evento
+
+@pytest.fixture
+def planilha(tmp_path, monkeypatch):
+    """Cópia de 2024.xlsx; a janela de agrupamento é longa, e a gravação é chamada pelo teste."""
+    monkeypatch.setattr(configs, 'PERSISTENCIA_JANELA_SEGUNDOS', 3600)
+    caminho = tmp_path / '2024.xlsx'
+    shutil.copy(PASTA_DATASETS / '2024.xlsx', caminho)
+    yield caminho.resolve()
+    with persistencia._TRAVA_PENDENCIAS:
+        for temporizador in persistencia._TEMPORIZADORES.values():
+            temporizador.cancel()
+        persistencia._TEMPORIZADORES.clear()
+
+def celulas(caminho, aba='Contratos'):
+    """Valores das células da aba, com o tipo de cada um, como o Excel os guarda."""
+    planilha = openpyxl.load_workbook(caminho, read_only=True)
+    try:
+        return [tuple((type(valor).__name__, valor) for valor in linha)
+                for linha in planilha[aba].iter_rows(values_only=True)]
+    finally:
+        planilha.close()
+
+def test_linhas_nao_alteradas_sao_regravadas_iguais(planilha):
+    antes = celulas(planilha)
+    contrato, sistema = antes[1][0][1], antes[1][2][1]
+    removidas = [linha for linha in antes[1:] if (linha[0][1], linha[2][1]) == (contrato, sistema)]
+
+    persistencia.agenda_exclusao(contrato, sistema, planilha)
+    assert persistencia.grava_pendencias(planilha) == 1
+    assert celulas(planilha) == [linha for linha in antes if linha not in removidas]
+
+def test_inclusao_convertida(planilha):
+    df = ler_aba(planilha, 'Contratos')
+    linha = {col: '0' if pd.api.types.is_numeric_dtype(df[col]) else '01/01/2025'
+             if pd.api.types.is_datetime64_any_dtype(df[col]) else 'x' for col in df.columns}
+    linha.update({'CONTRATO Nº': '999/2024', 'SISTEMA': 'SISTEMA 99', 'VALOR PAGO': '1.234,50',
+                  'INÍCIO': '31/12/2024', 'MÊS': 'DEZEMBRO'})
+    antes = celulas(planilha)
+    persistencia.agenda_inclusao(linha, planilha)
+    persistencia.grava_pendencias(planilha)
+
+    depois = celulas(planilha)
+    assert depois[:-1] == antes
+    nova = dict(zip((valor for _, valor in depois[0]), (valor for _, valor in depois[-1])))
+    assert nova['VALOR PAGO'] == 1234.5
+    assert nova['INÍCIO'].strftime('%d/%m/%Y') == '31/12/2024'
+
+def test_valores_invalidos_sobrevivem_as_gravacoes(planilha):
+    # Células que o esquema não converte: ficam vazias no painel, mas não na planilha
+    arquivo = openpyxl.load_workbook(planilha)
+    arquivo['Contratos']['H3'] = '-'
+    arquivo['Contratos']['H4'] = 'a definir'
+    arquivo['Históricos'].append(['1/2020', 'Adicionado', 'sem data'])
+    arquivo.save(planilha)
+    assert pd.isna(ler_aba(planilha, 'Contratos')['VALOR PAGO'].iloc[1])
+    antes, historico = celulas(planilha), celulas(planilha, 'Históricos')
+
+    # Uma exclusão sem relação com essas linhas e uma compactação do histórico
+    contrato, sistema = antes[-1][0][1], antes[-1][2][1]
+    persistencia.agenda_exclusao(contrato, sistema, planilha)
+    registra_evento(contrato, 'Excluído', planilha)
+    persistencia.grava_pendencias(planilha)
+    registra_evento(contrato, 'Consultado', planilha)
+    assert compacta_historico(planilha) == 1
+
+    depois = celulas(planilha)
+    assert depois[2][7] == ('str', '-') and depois[3][7] == ('str', 'a definir')
+    assert depois == [linha for linha in antes if (linha[0][1], linha[2][1]) != (contrato, sistema)]
+    # A aba ganha a coluna EVENTO; as linhas anteriores mantêm os seus valores
+    assert [linha[:3] for linha in celulas(planilha, 'Históricos')[1:len(historico)]] == historico[1:]
+
+def test_nova_tentativa_usa_a_janela_configurada(planilha, monkeypatch):
+    monkeypatch.setattr(configs, 'PERSISTENCIA_JANELA_SEGUNDOS', 1800)
+    persistencia.agenda_exclusao('1/2000', 'SISTEMA 01', planilha)
+    persistencia._TEMPORIZADORES.pop(planilha).cancel()
+
+    def falha(*args, **kwargs):
+        raise OSError('planilha aberta em outro programa')
+    monkeypatch.setattr(persistencia, 'grava_abas', falha)
+    assert persistencia.grava_pendencias(planilha) == 0
+    assert persistencia.ultimo_erro(planilha) == 'planilha aberta em outro programa'
+    assert persistencia._TEMPORIZADORES[planilha].interval == 1800
+    assert persistencia.operacoes_pendentes(planilha) == [('exclusao', ('1/2000', 'SISTEMA 01'))]
+
+def test_operacoes_aplicadas_uma_vez_durante_a_troca(planilha, monkeypatch):
+    df_anterior, assinatura_anterior = ler_aba(planilha, 'Contratos'), assinatura_arquivo(planilha)
+    linha = df_anterior.iloc[0]
+    contrato, sistema = linha['CONTRATO Nº'], linha['SISTEMA']
+    esperado = len(persistencia.aplica_pendencias(df_anterior, planilha, [('exclusao', (contrato, sistema))]))
+    persistencia.agenda_exclusao(contrato, sistema, planilha)
+    vistos = []
+
+    def sessao(file_path, assinatura_anterior, assinatura_nova, abas, alteracoes):
+        # Rerun entre a troca do arquivo e o fim de grava_pendencias
+        df = ler_aba(file_path, 'Contratos')
+        vistos.append(persistencia.operacoes_pendentes(file_path, assinatura_nova))
+        vistos.append(len(persistencia.aplica_pendencias(df, file_path, assinatura=assinatura_nova)))
+    monkeypatch.setattr(carregar_dados, '_OBSERVADORES_GRAVACAO', [sessao])
+
+    assert persistencia.grava_pendencias(planilha) == 1
+    assert vistos == [[], esperado]
+    # Uma leitura anterior à troca continua recebendo as operações que lhe faltam
+    assert len(persistencia.aplica_pendencias(df_anterior, planilha, assinatura=assinatura_anterior)) == esperado
+    assert persistencia.operacoes_pendentes(planilha) == []
@@ -1,67 +1,100 @@
+import hashlib
+import json
 import os
-import streamlit as st
+import shutil
+import tempfile
+import threading
+import time
 from pathlib import Path
-from langchain.chains.conversational_retrieval.base import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from langchain_community.document_loaders.pdf import PyPDFLoader
-from langchain_community.vectorstores.faiss import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai.embeddings import OpenAIEmbeddings
-from langchain_openai.chat_models import ChatOpenAI
+from typing import TYPE_CHECKING
+import streamlit as st
 from dotenv import load_dotenv, find_dotenv
+from cache_respostas import CacheRespostas, normaliza_pergunta
 from configs import *
-import openai
+from instrumentacao import instrumenta, medidas_atuais, nivel_atual
+
+# LangChain, FAISS, pypdf e OpenAI são importados nas funções que os usam: a página
+# do ChatPDF abre sem carregá-los, e eles só são lidos ao inicializar o AmbiChats
+if TYPE_CHECKING:
+    from langchain_community.vectorstores.faiss import FAISS
+    from recuperacao import IndiceBM25
 
 # Carregar variáveis de ambiente
 _ = load_dotenv(find_dotenv())
 
 # Definir o caminho da pasta de arquivos
 PASTA_ARQUIVOS = Path(__file__).parent / 'pdfs'
+# Índices vetoriais salvos em disco, um diretório por chave (ver chave_indice)
+PASTA_INDICES = Path(__file__).parent / 'indices'
+# Arquivo, no diretório de cada índice, com o nome da versão publicada (ver _salva_indice)
+ARQUIVO_VERSAO = 'atual'
 
-def importacao_documentos() -> list:
-    """Importa documentos PDF da pasta especificada.
+# Vector stores já carregados, compartilhados por todas as sessões do processo.
+# A trava protege apenas os dicionários; a atualização de cada índice usa a sua
+# própria trava (ver carrega_vector_store)
+_VECTOR_STORES = {}
+_TRAVA_VECTOR_STORES = threading.Lock()
+_TRAVAS_ATUALIZACAO = {}
+# Hash do conteúdo de cada PDF, por (caminho, mtime, tamanho)
+_HASHES_ARQUIVOS = {}
+# Respostas já geradas, compartilhadas pelas sessões (ver cache_respostas)
+_CACHE_RESPOSTAS = {}
+# Índice BM25 dos trechos de cada índice vetorial (busca 'hybrid'), com o vector store correspondente
+_INDICES_BM25 = {}
 
-    Returns:
-        list: Lista de documentos carregados.
-    """
-    documentos = []
-    for arquivo in PASTA_ARQUIVOS.glob('*.pdf'):
-        loader = PyPDFLoader(str(arquivo))
-        documentos_arquivo = loader.load()
-        if documentos_arquivo:
-            documentos.extend(documentos_arquivo)
-    if not documentos:
-        raise ValueError("Nenhum documento foi carregado.")
-    return documentos
+# Cache de embeddings de cada modelo, compartilhado pelas sessões
+ARQUIVO_CACHE_EMBEDDINGS = PASTA_INDICES / 'embeddings.sqlite3'
+_EMBEDDINGS = {}
+_TRAVA_EMBEDDINGS = threading.Lock()
 
-def split_de_documentos(documentos: list) -> list:
-    """Divide documentos em partes menores.
-
-    Args:
-        documentos (list): Lista de documentos a serem divididos.
+def cria_embeddings():
+    """Cria o modelo de embeddings configurado em EMBEDDING_BACKEND, com cache em disco.
 
     Returns:
-        list: Lista de documentos divididos.
+        EmbeddingsEmCache: OpenAIEmbeddings ou, no backend 'fake', embeddings
+        determinísticos que não acessam a rede, envolvidos pelo cache.
     """
-    recur_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=2500,
-        chunk_overlap=250,
-        separators=["\n\n", "\n", ".", " ", ""]
+    if get_config('embedding_backend') == 'fake':
+        identificador = f"fake:{get_config('embedding_fake_dimensao')}"
+    else:
+        identificador = f"openai:{get_config('embedding_model')}"
+    configuracao = (
+        identificador,
+        get_config('embedding_lote'),
+        get_config('embedding_concorrencia'),
+        get_config('embedding_tentativas')
     )
-    documentos_divididos = recur_splitter.split_documents(documentos)
 
-    # Adiciona metadados a cada documento
-    for i, doc in enumerate(documentos_divididos):
-        doc.metadata['source'] = doc.metadata['source'].split('/')[-1]
-        doc.metadata['doc_id'] = i
+    with _TRAVA_EMBEDDINGS:
+        if configuracao not in _EMBEDDINGS:
+            from cache_embeddings import EmbeddingsEmCache
+            if get_config('embedding_backend') == 'fake':
+                from langchain_community.embeddings import DeterministicFakeEmbedding
+                modelo = DeterministicFakeEmbedding(size=get_config('embedding_fake_dimensao'))
+            else:
+                from langchain_openai.embeddings import OpenAIEmbeddings
+                openai_api_key = os.getenv("OPENAI_API_KEY")
+                if not openai_api_key:
+                    raise ValueError("OPENAI_API_KEY não está definido")
+                modelo = OpenAIEmbeddings(model=get_config('embedding_model'), api_key=openai_api_key)
+            _EMBEDDINGS[configuracao] = EmbeddingsEmCache(
+                modelo,
+                identificador,
+                ARQUIVO_CACHE_EMBEDDINGS,
+                tamanho_lote=get_config('embedding_lote'),
+                concorrencia=get_config('embedding_concorrencia'),
+                tentativas=get_config('embedding_tentativas')
+            )
+        return _EMBEDDINGS[configuracao]
 
-    if not documentos_divididos:
-        raise ValueError("Nenhum documento foi dividido.")
-    return documentos_divididos
+def estatisticas_embeddings() -> dict:
+    """Retorna as estatísticas do cache de cada modelo de embeddings usado no processo."""
+    with _TRAVA_EMBEDDINGS:
+        embeddings = list(_EMBEDDINGS.values())
+    return {embedding.identificador: embedding.estatisticas() for embedding in embeddings}
 
-def cria_vector_store(documentos: list) -> FAISS:
-    """Cria um vetor de armazenamento a partir dos documentos.
+def cria_vector_store(documentos: list) -> 'FAISS':
+    """Cria um vetor de armazenamento a partir dos documentos, no tipo de índice configurado.
 
     Args:
         documentos (list): Lista de documentos.
@@ -69,40 +102,473 @@ def cria_vector_store(documentos: list) -> FAISS:
     Returns:
         FAISS: Armazenamento vetorial criado.
     """
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    if not openai_api_key:
-        raise ValueError("OPENAI_API_KEY não está definido")
+    from langchain_community.vectorstores.faiss import FAISS
+    from indices_faiss import converte_vector_store
 
-    embedding_model = OpenAIEmbeddings(api_key=openai_api_key)
     vector_store = FAISS.from_documents(
         documents=documentos,
-        embedding=embedding_model
+        embedding=cria_embeddings()
     )
     
     # Verificar se embeddings foram gerados
     if vector_store.index.ntotal == 0:
         raise ValueError("Nenhum embedding foi gerado.")
+    converte_vector_store(vector_store, get_config('faiss_indice_tipo'), get_config('faiss_indice_kwargs'))
+    return vector_store
+
+def hash_arquivo(caminho: Path) -> str:
+    """Calcula o SHA-256 do conteúdo do arquivo, reaproveitando o resultado enquanto ele não muda.
+
+    Args:
+        caminho (Path): Arquivo a ser lido.
+
+    Returns:
+        str: Hash hexadecimal do conteúdo.
+    """
+    estado = caminho.stat()
+    chave = (str(caminho.resolve()), estado.st_mtime_ns, estado.st_size)
+    if chave not in _HASHES_ARQUIVOS:
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(bloco)
+        _HASHES_ARQUIVOS[chave] = sha.hexdigest()
+    return _HASHES_ARQUIVOS[chave]
+
+def configuracao_indice() -> dict:
+    """Configurações que alteram o conteúdo do índice (divisão e embeddings)."""
+    configuracao = {
+        'chunk_size': get_config('chunk_size'),
+        'chunk_overlap': get_config('chunk_overlap'),
+        'embedding_backend': get_config('embedding_backend')
+    }
+    if configuracao['embedding_backend'] == 'fake':
+        configuracao['embedding_fake_dimensao'] = get_config('embedding_fake_dimensao')
+    else:
+        configuracao['embedding_model'] = get_config('embedding_model')
+    return configuracao
+
+def chave_indice() -> str:
+    """Identifica o índice pelas configurações de divisão e de embeddings.
+
+    Returns:
+        str: Hash hexadecimal usado como nome do diretório do índice.
+    """
+    conteudo = json.dumps(configuracao_indice(), sort_keys=True)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def _pasta_versao(pasta_indice: Path) -> Path:
+    """Diretório da versão publicada do índice (o próprio diretório, se salvo no formato antigo)."""
+    try:
+        return pasta_indice / (pasta_indice / ARQUIVO_VERSAO).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return pasta_indice
+
+def _carrega_indice(pasta_indice: Path):
+    """Lê o índice publicado e o seu manifesto ({arquivo: {'hash', 'ids'}})."""
+    from langchain_community.vectorstores.faiss import FAISS
+
+    pasta_versao = _pasta_versao(pasta_indice)
+    if not (pasta_versao / 'manifesto.json').exists():
+        return None, {}
+    # O índice foi gerado por esta aplicação; o pickle dos metadados é confiável
+    vector_store = FAISS.load_local(
+        str(pasta_versao), cria_embeddings(), allow_dangerous_deserialization=True
+    )
+    manifesto = json.loads((pasta_versao / 'manifesto.json').read_text(encoding='utf-8'))
+    return vector_store, manifesto
+
+def _salva_indice(pasta_indice: Path, vector_store: 'FAISS', manifesto: dict) -> None:
+    """Salva o índice e o manifesto em uma nova versão e a publica.
+
+    Cada gravação vai para um diretório próprio (v-<instante>-<pid>), e o
+    arquivo ARQUIVO_VERSAO, com o nome da versão publicada, é trocado por
+    os.replace, que é atômico: quem lê o índice encontra sempre uma versão
+    completa, a anterior ou a nova. A versão anterior é mantida para quem
+    ainda a estiver lendo; as mais antigas são apagadas.
+    """
+    pasta_indice.mkdir(parents=True, exist_ok=True)
+    anterior = _pasta_versao(pasta_indice)
+    versao = pasta_indice / f'v-{time.time_ns():020d}-{os.getpid()}'
+    descritor, temporario = tempfile.mkstemp(dir=pasta_indice, prefix=f'.{ARQUIVO_VERSAO}-')
+    with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+        f.write(versao.name)
+    try:
+        vector_store.save_local(str(versao))
+        (versao / 'manifesto.json').write_text(
+            json.dumps(manifesto, ensure_ascii=False, indent=1), encoding='utf-8'
+        )
+        os.replace(temporario, pasta_indice / ARQUIVO_VERSAO)
+    except BaseException:
+        shutil.rmtree(versao, ignore_errors=True)
+        Path(temporario).unlink(missing_ok=True)
+        raise
+
+    if anterior == pasta_indice:
+        # Índice no formato antigo, com os arquivos direto no diretório
+        for nome in ('index.faiss', 'index.pkl', 'manifesto.json'):
+            (pasta_indice / nome).unlink(missing_ok=True)
+    else:
+        for pasta in pasta_indice.glob('v-*'):
+            if pasta.name < anterior.name:
+                shutil.rmtree(pasta, ignore_errors=True)
+
+def diferencas_pdfs(manifesto: dict) -> tuple:
+    """Compara a pasta de PDFs com o manifesto do índice.
+
+    Returns:
+        tuple: (PDFs atuais {nome: (caminho, hash)}, nomes a remover do
+        índice, nomes a incluir).
+    """
+    atuais = {arquivo.name: (arquivo, hash_arquivo(arquivo)) for arquivo in PASTA_ARQUIVOS.glob('*.pdf')}
+    removidos = [
+        nome for nome, entrada in manifesto.items()
+        if nome not in atuais or atuais[nome][1] != entrada['hash']
+    ]
+    novos = [nome for nome, (_, hash_pdf) in atuais.items()
+             if nome not in manifesto or manifesto[nome]['hash'] != hash_pdf]
+    return atuais, removidos, novos
+
+def sincroniza_vector_store(vector_store, manifesto: dict, progresso=None):
+    """Atualiza o índice para os PDFs atuais, documento a documento.
+
+    Remove os vetores dos PDFs apagados ou alterados e inclui apenas os
+    PDFs novos ou alterados; os demais não são lidos nem enviados para os
+    embeddings. Os vetores de cada PDF são identificados pelo nome ('source'),
+    pelo hash do arquivo e pelo 'doc_id' do trecho. Os PDFs são lidos em
+    paralelo (ver ingestao.ingere_pdfs) e indexados à medida que ficam prontos.
+    Ao final, o índice passa para o tipo em FAISS_INDICE_TIPO (ver
+    indices_faiss.converte_vector_store).
+
+    Args:
+        vector_store (FAISS): Índice atual (None se ainda não existe).
+        manifesto (dict): Arquivo -> {'hash', 'ids'} dos PDFs indexados.
+        progresso (callable): Chamada com (PDFs indexados, total, nome do PDF).
+
+    Returns:
+        tuple: (vector_store, manifesto, alterado).
+    """
+    from langchain_community.vectorstores.faiss import FAISS
+    from indices_faiss import converte_vector_store, remove_documentos
+    from ingestao import ingere_pdfs
+
+    atuais, removidos, novos = diferencas_pdfs(manifesto)
+    if not removidos and not novos:
+        # Sem PDFs novos, o índice só muda se o tipo configurado mudou
+        alterado = vector_store is not None and converte_vector_store(
+            vector_store, get_config('faiss_indice_tipo'), get_config('faiss_indice_kwargs')
+        )
+        return vector_store, manifesto, alterado
+
+    manifesto = dict(manifesto)
+    ids_removidos = [id_ for nome in removidos for id_ in manifesto.pop(nome)['ids']]
+    if ids_removidos:
+        remove_documentos(vector_store, ids_removidos)
+
+    lote = get_config('ingestao_lote')
+    pdfs = ingere_pdfs(
+        [atuais[nome][0] for nome in sorted(novos)],
+        get_config('chunk_size'),
+        get_config('chunk_overlap'),
+        max_processos=get_config('ingestao_processos')
+    )
+    for feitos, (arquivo, documentos) in enumerate(pdfs, start=1):
+        nome = arquivo.name
+        hash_pdf = atuais[nome][1]
+        ids = [f"{nome}#{hash_pdf[:16]}#{doc.metadata['doc_id']}" for doc in documentos]
+        # Os trechos seguem para os embeddings em lotes de tamanho limitado
+        for inicio in range(0, len(documentos), lote):
+            if vector_store is None:
+                vector_store = FAISS.from_documents(
+                    documentos[inicio:inicio + lote], cria_embeddings(), ids=ids[inicio:inicio + lote]
+                )
+            else:
+                vector_store.add_documents(documentos[inicio:inicio + lote], ids=ids[inicio:inicio + lote])
+        manifesto[nome] = {'hash': hash_pdf, 'ids': ids}
+        if progresso is not None:
+            progresso(feitos, len(novos), nome)
+    if vector_store is not None:
+        converte_vector_store(vector_store, get_config('faiss_indice_tipo'), get_config('faiss_indice_kwargs'))
+    return vector_store, manifesto, True
+
+def _indice_atualizado(vector_store, manifesto: dict) -> bool:
+    """Indica se o índice corresponde aos PDFs atuais e ao tipo configurado."""
+    from indices_faiss import precisa_converter
+
+    if any(diferencas_pdfs(manifesto)[1:]):
+        return False
+    return vector_store is None or not precisa_converter(
+        vector_store.index, get_config('faiss_indice_tipo'), get_config('faiss_indice_kwargs')
+    )
+
+def _atualiza_indice(chave: str, atual, progresso=None) -> tuple:
+    """Sincroniza uma cópia do índice publicado (ou o salvo em disco), salva-a e a publica.
+
+    Returns:
+        tuple: (vector_store, manifesto) publicados em _VECTOR_STORES.
+    """
+    from indices_faiss import clona_vector_store
+
+    pasta_indice = PASTA_INDICES / chave
+    if atual is None:
+        vector_store, manifesto = _carrega_indice(pasta_indice)
+    else:
+        vector_store, manifesto = atual
+        vector_store = vector_store and clona_vector_store(vector_store)
+
+    vector_store, manifesto, alterado = sincroniza_vector_store(vector_store, manifesto, progresso)
+    if alterado:
+        _salva_indice(pasta_indice, vector_store, manifesto)
+    with _TRAVA_VECTOR_STORES:
+        _VECTOR_STORES[chave] = (vector_store, manifesto)
+    return vector_store, manifesto
+
+@instrumenta('chatpdf.carregamento')
+def carrega_vector_store(progresso=None) -> 'FAISS':
+    """Retorna o vector store dos PDFs atuais, atualizado de forma incremental.
+
+    O índice de cada configuração é compartilhado pelas sessões do
+    processo e salvo em PASTA_INDICES, com o manifesto dos PDFs indexados.
+    Apenas as diferenças entre a pasta de PDFs e o manifesto são aplicadas
+    (ver sincroniza_vector_store).
+
+    Se o índice em memória já corresponde aos PDFs, ele é devolvido sem
+    esperar por nenhuma trava de atualização. Uma atualização (que pode
+    levar minutos, com os embeddings) segura apenas a trava do seu índice:
+    sessões que usam outros índices, que só fazem perguntas ou que
+    consultam os caches não esperam por ela.
+
+    O índice publicado em _VECTOR_STORES nunca é alterado: a atualização é
+    feita em uma cópia (ver indices_faiss.clona_vector_store), que toma o
+    seu lugar ao final. As sessões que ainda buscam no índice anterior
+    continuam a vê-lo inteiro, sem trechos pela metade.
+
+    Args:
+        progresso (callable): Repassada a sincroniza_vector_store.
+
+    Returns:
+        FAISS: Armazenamento vetorial dos PDFs.
+    """
+    chave = chave_indice()
+    with _TRAVA_VECTOR_STORES:
+        atual = _VECTOR_STORES.get(chave)
+        trava = _TRAVAS_ATUALIZACAO.setdefault(chave, threading.Lock())
+
+    if atual is None or not _indice_atualizado(*atual):
+        # Uma atualização por índice de cada vez; quem chega depois encontra o índice já atualizado
+        with trava:
+            with _TRAVA_VECTOR_STORES:
+                atual = _VECTOR_STORES.get(chave)
+            if atual is None or not _indice_atualizado(*atual):
+                atual = _atualiza_indice(chave, atual, progresso)
+
+    vector_store, manifesto = atual
+    if vector_store is None or not manifesto:
+        raise ValueError("Nenhum documento foi carregado.")
     return vector_store
 
-def cria_chain_conversa() -> None:
-    """Cria a cadeia de conversa para o chatbot."""
-    documentos = importacao_documentos()
-    documentos = split_de_documentos(documentos)
-    vector_store = cria_vector_store(documentos)
-
-    # Inicializa o modelo de chat
-    chat = ChatOpenAI(model=get_config('model_name'))
-    memory = ConversationBufferMemory(
-        return_messages=True,
-        memory_key='chat_history',
-        output_key='answer'
+def cria_llms():
+    """Cria os modelos de chat configurados em LLM_BACKEND.
+
+    Returns:
+        tuple: (modelo da resposta, com streaming; modelo que reformula a pergunta
+        e modelo que resume a conversa, sem streaming).
+    """
+    from langchain_core.caches import InMemoryCache
+    from modelos_chat import TAG_RESPOSTA, ChatFalso
+
+    if get_config('llm_backend') == 'fake':
+        resposta = ChatFalso(
+            responses=[get_config('llm_fake_resposta')],
+            sleep=get_config('llm_fake_atraso'),
+            streaming=True,
+            tags=[TAG_RESPOSTA]
+        )
+        reformulacao = ChatFalso(responses=['Pergunta reformulada de teste'], cache=InMemoryCache())
+        return resposta, reformulacao, ChatFalso(responses=['Resumo de teste da conversa.'])
+    from langchain_openai.chat_models import ChatOpenAI
+    resposta = ChatOpenAI(model=get_config('model_name'), streaming=True, tags=[TAG_RESPOSTA])
+    # Com cache: a reformulação feita para consultar o cache de respostas não é paga duas vezes
+    reformulacao = ChatOpenAI(model=get_config('model_name'), cache=InMemoryCache())
+    return resposta, reformulacao, ChatOpenAI(model=get_config('model_name'))
+
+def cria_memoria(llm_resumo):
+    """Cria a memória da conversa configurada em MEMORY_MODE.
+
+    - 'buffer': guarda a conversa inteira;
+    - 'resumo': guarda as últimas mensagens até MEMORY_MAX_TOKENS tokens e
+      um resumo, atualizado por `llm_resumo`, das mais antigas.
+    """
+    from langchain.memory import ConversationBufferMemory, ConversationSummaryBufferMemory
+
+    parametros = dict(return_messages=True, memory_key='chat_history', output_key='answer')
+    if get_config('memory_mode') == 'resumo':
+        return ConversationSummaryBufferMemory(
+            llm=llm_resumo, max_token_limit=get_config('memory_max_tokens'), **parametros
+        )
+    return ConversationBufferMemory(**parametros)
+
+def indice_publicado() -> tuple:
+    """(vector_store, manifesto) publicado para a configuração atual, ou (None, {})."""
+    with _TRAVA_VECTOR_STORES:
+        return _VECTOR_STORES.get(chave_indice(), (None, {}))
+
+def impressao_corpus(manifesto: dict = None) -> str:
+    """Identifica o corpus indexado: configuração do índice mais nome e hash de cada PDF.
+
+    Args:
+        manifesto (dict): Manifesto do índice (padrão: o do índice publicado).
+    """
+    chave = chave_indice()
+    if manifesto is None:
+        _, manifesto = indice_publicado()
+    arquivos = sorted((nome, entrada['hash']) for nome, entrada in manifesto.items())
+    # O tipo do índice e da busca entram na impressão: podem recuperar outros trechos
+    conteudo = json.dumps({
+        'indice': chave,
+        'tipo': get_config('faiss_indice_tipo'),
+        'busca': get_config('retrieval_search_type'),
+        'arquivos': arquivos
+    }, sort_keys=True)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def cache_respostas() -> CacheRespostas:
+    """Retorna o cache de respostas da configuração atual (tamanho, validade e limiar)."""
+    configuracao = (
+        get_config('respostas_cache_tamanho'),
+        get_config('respostas_cache_ttl_segundos'),
+        get_config('respostas_cache_similaridade')
     )
+    with _TRAVA_VECTOR_STORES:
+        if configuracao not in _CACHE_RESPOSTAS:
+            _CACHE_RESPOSTAS[configuracao] = CacheRespostas(*configuracao)
+        return _CACHE_RESPOSTAS[configuracao]
+
+@instrumenta('chatpdf.resposta')
+def responde_pergunta(pergunta: str, callbacks: list = None) -> dict:
+    """Responde à pergunta com a cadeia da sessão, reaproveitando respostas em cache.
+
+    A chave do cache é a pergunta autônoma: a própria pergunta no início da
+    conversa ou, havendo histórico, a reformulação feita pelo modelo de
+    reformulação da cadeia. Em um acerto, a resposta e as fontes guardadas
+    são devolvidas sem chamar o modelo de resposta, e a troca entra na
+    memória da conversa como uma resposta normal.
+
+    A cada pergunta, se outra sessão publicou um índice mais novo, o
+    recuperador da cadeia passa a usá-lo; a impressão do corpus (parte da
+    chave do cache) é a do índice em que a pergunta será respondida.
+
+    Args:
+        pergunta (str): Pergunta do usuário.
+        callbacks (list): Callbacks repassados à cadeia (por exemplo, ExibeTokens).
+
+    Returns:
+        dict: 'answer', 'source_documents', 'cache' (True se veio do cache) e
+        'tokens_prompt' (tokens do prompt enviado ao modelo da resposta).
+    """
+    from langchain.chains.conversational_retrieval.base import _get_chat_history
+    from modelos_chat import ContaTokensPrompt, MedeEtapas
+
+    chain = st.session_state['chain']
+    vector_store, manifesto = indice_publicado()
+    if vector_store is not None and vector_store is not st.session_state.get('indice_chain', (None,))[0]:
+        chain.retriever = cria_recuperador(vector_store)
+        st.session_state['indice_chain'] = (vector_store, manifesto)
+    impressao = impressao_corpus(st.session_state.get('indice_chain', (None, None))[1])
+    cache = cache_respostas()
+
+    historico = chain.memory.load_memory_variables({})['chat_history']
+    autonoma = pergunta
+    if historico:
+        # Mesmo prompt que a cadeia usará; em uma falha, a reformulação sai do cache do modelo
+        autonoma = chain.question_generator.invoke({
+            'question': pergunta,
+            'chat_history': (chain.get_chat_history or _get_chat_history)(historico)
+        })['text']
+    vetor = None
+    if get_config('respostas_cache_similaridade') is not None:
+        vetor = cria_embeddings().embed_query(autonoma)
+
+    entrada = cache.obtem(impressao, normaliza_pergunta(autonoma), vetor)
+    if entrada is not None:
+        chain.memory.save_context({'question': pergunta}, {'answer': entrada['answer']})
+        return {
+            'answer': entrada['answer'], 'source_documents': entrada['source_documents'],
+            'cache': True, 'tokens_prompt': 0
+        }
+
+    conta_tokens = ContaTokensPrompt(chain.combine_docs_chain.llm_chain.llm)
+    callbacks = (callbacks or []) + [conta_tokens]
+    if medidas_atuais() is not None:
+        callbacks.append(MedeEtapas(medidas_atuais(), nivel_atual()))
+    resposta = chain.invoke({'question': pergunta}, config={'callbacks': callbacks})
+    cache.armazena(
+        impressao, normaliza_pergunta(autonoma), resposta['answer'],
+        resposta.get('source_documents', []), vetor
+    )
+    return dict(resposta, cache=False, tokens_prompt=conta_tokens.tokens)
+
+def indice_bm25(vector_store) -> 'IndiceBM25':
+    """Retorna o índice BM25 dos trechos do vector store, compartilhado pelas sessões.
+
+    Na primeira chamada os trechos são lidos do docstore. Para um vector
+    store mais novo, o índice anterior é copiado e apenas os trechos
+    incluídos ou removidos são atualizados na cópia: os recuperadores que
+    ainda usam o par anterior (vector store e BM25) continuam consistentes.
+    """
+    from recuperacao import IndiceBM25
+
+    parametros = get_config('retrieval_hibrido_kwargs')
+    chave = (chave_indice(), parametros['k1'], parametros['b'])
+    with _TRAVA_VECTOR_STORES:
+        anterior = _INDICES_BM25.get(chave)
+    if anterior is not None and anterior[0] is vector_store:
+        return anterior[1]
+
+    if anterior is not None:
+        indice = anterior[1].copia()
+    else:
+        indice = IndiceBM25(k1=parametros['k1'], b=parametros['b'])
+    indice.sincroniza(vector_store.docstore, vector_store.index_to_docstore_id.values())
+    with _TRAVA_VECTOR_STORES:
+        _INDICES_BM25[chave] = (vector_store, indice)
+    return indice
+
+def cria_recuperador(vector_store):
+    """Cria o recuperador configurado em RETRIEVAL_SEARCH_TYPE."""
+    tipo = get_config('retrieval_search_type')
+    kwargs = get_config('retrieval_kwargs')
+    if tipo == 'hybrid':
+        from recuperacao import RecuperadorHibrido
+        return RecuperadorHibrido(
+            vector_store=vector_store,
+            indice_bm25=indice_bm25(vector_store),
+            k=kwargs.get('k', 5),
+            fetch_k=kwargs.get('fetch_k', 20),
+            rrf_c=get_config('retrieval_hibrido_kwargs')['rrf_c']
+        )
+    return vector_store.as_retriever(search_type=tipo, search_kwargs=kwargs)
+
+def cria_chain_conversa(progresso=None) -> None:
+    """Cria a cadeia de conversa para o chatbot.
+
+    Args:
+        progresso (callable): Recebe o andamento da indexação (ver sincroniza_vector_store).
+    """
+    from langchain.chains.conversational_retrieval.base import ConversationalRetrievalChain
+    from langchain.prompts import PromptTemplate
+
+    carrega_vector_store(progresso)
+    # Índice usado pela cadeia, com o seu manifesto (ver responde_pergunta)
+    st.session_state['indice_chain'] = indice_publicado()
+    vector_store = st.session_state['indice_chain'][0]
+
+    # Inicializa os modelos de chat: a resposta vem em streaming; a reformulação e o resumo, não
+    chat, chat_reformulacao, chat_resumo = cria_llms()
+    memory = cria_memoria(chat_resumo)
     
     # Configura o recuperador de documentos
-    retriever = vector_store.as_retriever(
-        search_type=get_config('retrieval_search_type'),
-        search_kwargs=get_config('retrieval_kwargs')
-    )
+    retriever = cria_recuperador(vector_store)
     
     # Configura o prompt
     prompt = PromptTemplate.from_template(get_config('prompt'))
@@ -110,6 +576,7 @@ def cria_chain_conversa() -> None:
     # Cria a cadeia de recuperação conversacional
     chat_chain = ConversationalRetrievalChain.from_llm(
         llm=chat,
+        condense_question_llm=chat_reformulacao,
         memory=memory,
         retriever=retriever,
         return_source_documents=True,
@@ -117,5 +584,7 @@ def cria_chain_conversa() -> None:
         combine_docs_chain_kwargs={'prompt': prompt}
     )
 
-    # Armazena a cadeia de conversa no estado da sessão
+    # Armazena a cadeia de conversa no estado da sessão; as mensagens exibidas
+    # ficam à parte, já que a memória pode ter resumido as mais antigas
     st.session_state['chain'] = chat_chain
+    st.session_state['mensagens'] = []